@@ -0,0 +1,186 @@
+"""
+日期规范化基准：在合成的大批量公告/开标记录上对比旧版逐条解析与 date_normalize（快速路径 + LRU 缓存）。
+
+合成数据模拟门户返回：发布日期集中在最近几天，开标与截止时间集中在整点/半点，另混入少量斜杠分隔、
+缺秒、带时区、空值与无法解析的输入。每轮开始前清空缓存，计时反映单次运行的真实收益；
+同时逐条校验新旧实现的结果一致。
+
+用法：
+    python bench_date_normalize.py                   # 默认 200000 条记录，重复 5 轮
+    python bench_date_normalize.py --records 1000000 --rounds 3
+"""
+import argparse
+import random
+import re
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import date_normalize
+
+BEIJING_TZ = date_normalize.BEIJING_TZ
+
+
+# 旧实现（逐次正则编译查找 + try/except 回退），仅作对照
+def legacy_parse_date_to_ymd(value):
+    if not value:
+        return None
+    try:
+        core = str(value)[:10]
+        dt = datetime.fromisoformat(core)
+        return dt.strftime("%Y-%m-%d")
+    except Exception:
+        pass
+    m = re.search(r"(?:^|[^\d])(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?:[^\d]|$)", str(value))
+    if m:
+        try:
+            year, month, day = int(m.group(1)), int(m.group(2)), int(m.group(3))
+            return f"{year:04d}-{month:02d}-{day:02d}"
+        except Exception:
+            return None
+    return None
+
+
+def legacy_parse_to_iso_datetime(value):
+    if not value:
+        return None
+    s = str(value).strip()
+    m = re.search(r"(\d{4})[/-](\d{1,2})[/-](\d{1,2})(?:[ T](\d{1,2})(?::(\d{1,2}))?(?::(\d{1,2}))?)?", s)
+    if m:
+        try:
+            y = int(m.group(1))
+            mo = int(m.group(2))
+            d = int(m.group(3))
+            hh = int(m.group(4)) if m.group(4) is not None else 0
+            mm_ = int(m.group(5)) if m.group(5) is not None else 0
+            ss = int(m.group(6)) if m.group(6) is not None else 0
+            return f"{y:04d}-{mo:02d}-{d:02d}T{hh:02d}:{mm_:02d}:{ss:02d}"
+        except Exception:
+            pass
+    try:
+        normalized = s.replace('/', '-').replace(' ', 'T')
+        dt = datetime.fromisoformat(normalized)
+        return dt.strftime("%Y-%m-%dT%H:%M:%S")
+    except Exception:
+        return None
+
+
+def legacy_parse_iso_to_display(dt_str):
+    if not dt_str:
+        return ""
+    try:
+        normalized = dt_str.replace(' ', 'T')
+        dt = datetime.fromisoformat(normalized)
+        return dt.strftime('%Y-%m-%d %H:%M')
+    except Exception:
+        try:
+            d = datetime.strptime(dt_str[:10], '%Y-%m-%d')
+            return d.strftime('%Y-%m-%d 00:00')
+        except Exception:
+            return ""
+
+
+def legacy_parse_kb_datetime(kb_raw):
+    dt = datetime.fromisoformat(kb_raw)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=BEIJING_TZ)
+    return dt.astimezone(BEIJING_TZ)
+
+
+def _odd(rng: random.Random, day: date) -> Optional[str]:
+    """少量非标准输入"""
+    return rng.choice([
+        f"{day.year}/{day.month}/{day.day}",
+        f"{day.isoformat()} 9:30",
+        f"{day.isoformat()}T14:00:00+08:00",
+        f"{day.isoformat()} 14:00:00.000",
+        "",
+        None,
+        "待定",
+    ])
+
+
+def synth_records(count: int, seed: int = 7) -> List[Dict[str, Optional[str]]]:
+    rng = random.Random(seed)
+    today = date(2026, 3, 2)
+    records = []
+    for _ in range(count):
+        published = today - timedelta(days=rng.randrange(5))
+        kb_day = today + timedelta(days=rng.randrange(30))
+        end_day = kb_day - timedelta(days=rng.randrange(3))
+        kb_time = f"{rng.choice([9, 10, 14, 15])}:{rng.choice(['00', '30'])}:00"
+        record = {
+            "publishDate": f"{published.isoformat()} {rng.randrange(8, 18):02d}:{rng.choice(['00', '15', '30', '45'])}:00",
+            "kbDate": f"{kb_day.isoformat()}T{int(kb_time.split(':')[0]):02d}:{kb_time[-5:]}",
+            "endDate": f"{end_day.isoformat()} 23:59:00",
+        }
+        if rng.random() < 0.02:
+            record[rng.choice(list(record))] = _odd(rng, published)
+        records.append(record)
+    return records
+
+
+def run_legacy(records):
+    out = []
+    for r in records:
+        iso_kb = legacy_parse_to_iso_datetime(r["kbDate"])
+        out.append((legacy_parse_date_to_ymd(r["publishDate"]), iso_kb, legacy_parse_to_iso_datetime(r["endDate"]),
+                    legacy_parse_iso_to_display(iso_kb or ""), _kb(legacy_parse_kb_datetime, r["kbDate"])))
+    return out
+
+
+def run_current(records):
+    out = []
+    for r in records:
+        iso_kb = date_normalize.parse_to_iso_datetime(r["kbDate"])
+        out.append((date_normalize.parse_date_to_ymd(r["publishDate"]), iso_kb,
+                    date_normalize.parse_to_iso_datetime(r["endDate"]), date_normalize.parse_iso_to_display(iso_kb or ""),
+                    _kb(date_normalize.parse_kb_datetime, r["kbDate"])))
+    return out
+
+
+def _kb(func: Callable[[str], datetime], value: Optional[str]) -> Optional[datetime]:
+    try:
+        return func(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def clear_caches() -> None:
+    for func in (date_normalize._ymd, date_normalize._iso_datetime, date_normalize.parse_iso_to_display,
+                 date_normalize.parse_kb_datetime):
+        func.cache_clear()
+
+
+def bench(func, records, rounds: int) -> Tuple[float, list]:
+    best, out = float("inf"), []
+    for _ in range(rounds):
+        clear_caches()
+        t0 = time.perf_counter()
+        out = func(records)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="日期规范化新旧实现基准对比")
+    parser.add_argument("--records", type=int, default=200000, help="合成记录条数")
+    parser.add_argument("--rounds", type=int, default=5, help="重复轮数（取最快一轮，每轮前清空缓存）")
+    args = parser.parse_args()
+
+    records = synth_records(args.records)
+    distinct = len({v for r in records for v in r.values()})
+    print(f"[INFO] 记录 {len(records)} 条（每条 3 个时间字段，5 次解析），不同取值 {distinct} 个，重复 {args.rounds} 轮取最快")
+
+    legacy_time, legacy_out = bench(run_legacy, records, args.rounds)
+    current_time, current_out = bench(run_current, records, args.rounds)
+    mismatches = sum(1 for a, b in zip(legacy_out, current_out) if a != b)
+    for name, elapsed in (("legacy", legacy_time), ("current", current_time)):
+        print(f"{name:>8}: {elapsed * 1000:8.1f} ms/轮  {len(records) / elapsed / 1e3:8.1f} k条/秒")
+    info = date_normalize._iso_datetime.cache_info()
+    print(f"[INFO] parse_to_iso_datetime 缓存：命中 {info.hits}，未命中 {info.misses}")
+    print(f"[SUMMARY] 加速比 {legacy_time / current_time:.2f}x，结果不一致 {mismatches} 条")
+
+
+if __name__ == "__main__":
+    main()
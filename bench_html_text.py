@@ -0,0 +1,78 @@
+"""
+html_to_text 基准：在 purchase_bulletins.json 的真实公告正文上对比旧版（多轮正则替换）与当前实现。
+当前实现为保留段落与表格结构多做了几轮替换，吞吐略低于旧版（约 0.8~0.9x），这里用来防止进一步退化。
+
+用法：
+    python bench_html_text.py                # 默认每个实现重复 20 轮
+    python bench_html_text.py --rounds 50 --file purchase_bulletins.json
+"""
+import argparse
+import json
+import re
+import time
+
+from html_text import html_to_text
+from storage import read_content
+
+# 旧实现（三轮正则 + 函数内 import），仅作对照
+_LEGACY_TAG_RE = re.compile(r"<[^>]+>")
+_LEGACY_SCRIPT_STYLE_RE = re.compile(r"<\s*(script|style)[^>]*>.*?<\s*/\s*\1\s*>", re.I | re.S)
+_LEGACY_WHITESPACE_RE = re.compile(r"[ \t\r\f\v]+")
+
+
+def legacy_html_to_text(html: str) -> str:
+    if not html:
+        return ""
+    html = _LEGACY_SCRIPT_STYLE_RE.sub(" ", html)
+    text = _LEGACY_TAG_RE.sub(" ", html)
+    try:
+        import html as html_lib
+        text = html_lib.unescape(text)
+    except Exception:
+        pass
+    text = _LEGACY_WHITESPACE_RE.sub(" ", text)
+    text = re.sub(r"\n+", "\n", text)
+    return text.strip()
+
+
+def load_documents(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    docs = [read_content(item) for item in data if isinstance(item, dict)]
+    return [d for d in docs if d]
+
+
+def bench(func, docs, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for doc in docs:
+            func(doc)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="html_to_text 新旧实现基准对比")
+    parser.add_argument("--file", default="purchase_bulletins.json", help="公告数据文件")
+    parser.add_argument("--rounds", type=int, default=20, help="重复轮数（取最快一轮）")
+    args = parser.parse_args()
+
+    docs = load_documents(args.file)
+    if not docs:
+        print(f"[ERROR] {args.file} 中没有可用的公告正文")
+        return
+    total_chars = sum(len(d) for d in docs)
+    print(f"[INFO] 公告 {len(docs)} 篇，HTML 共 {total_chars} 字符，重复 {args.rounds} 轮取最快")
+
+    results = {}
+    for name, func in (("legacy", legacy_html_to_text), ("current", html_to_text)):
+        elapsed = bench(func, docs, args.rounds)
+        out_chars = sum(len(func(d)) for d in docs)
+        results[name] = elapsed
+        print(f"{name:>8}: {elapsed * 1000:8.2f} ms/轮  {total_chars / elapsed / 1e6:6.2f} M字符/秒  输出 {out_chars} 字符")
+    print(f"[SUMMARY] 吞吐为旧版的 {results['legacy'] / results['current']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
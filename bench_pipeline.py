@@ -0,0 +1,189 @@
+"""
+流水线基准：在本地回放服务（replay_server.py）上按不同数据量分阶段计时，不访问门户与线上大模型。
+
+阶段：
+- fetch_openings / fetch_bulletins：经 HTTP 分页抓取开标列表与公告列表（含流式解析）
+- process_bulletins：对内存中的原始公告逐条清洗
+- classify：规则 → 缓存 → 批量/逐条大模型分类（冷缓存）
+- extract：详情抓取 → 清洗 → 规则 → 大模型抽取（冷缓存）
+- push_render：筛选一次并生成每日摘要的各渠道视图（钉钉 Markdown、Bark 纯文本，不发送）
+
+回放服务在子进程中运行，避免与被测代码争用 GIL；每个数据量重启一次。限速（CLASSIFY_RATE、EXTRACT_LLM_RATE）
+与退避基数默认放宽，使结果反映代码本身的吞吐；需要按线上配置测量时显式设置对应环境变量即可。
+
+用法：
+    python bench_pipeline.py                                  # 100 / 1000 / 10000 条
+    python bench_pipeline.py --sizes 1000 --latency 0.05 --llm-latency 0.5 --error-rate 0.02
+    python bench_pipeline.py --output .cache/bench_pipeline.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import requests
+
+from replay_server import build_replay_data, env_for
+
+STAGE_NAMES = ("fetch_openings", "fetch_bulletins", "process_bulletins", "classify", "extract", "push_render")
+# 基准默认放宽的限速与退避配置（已设置的环境变量优先）
+BENCH_ENV_DEFAULTS = {
+    "CLASSIFY_RATE": "1000",
+    "EXTRACT_LLM_RATE": "1000",
+    "RETRY_BASE_DELAY": "0.05",
+    "RETRY_MAX_DELAY": "1",
+}
+PAGE_SIZE = 100
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, records: int, args: argparse.Namespace) -> subprocess.Popen:
+    cmd = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_server.py"),
+        "--port", str(port), "--records", str(records),
+        "--latency", str(args.latency), "--llm-latency", str(args.llm_latency), "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate), "--error-status", str(args.error_status), "--seed", "1",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"回放服务启动失败（退出码 {proc.returncode}）")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/healthz", timeout=1)
+            return proc
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("回放服务启动超时")
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def timed(results: Dict[str, float], name: str, func: Callable[[], Any], quiet: bool) -> Any:
+    """执行并记录一个阶段的耗时；quiet 时屏蔽各阶段自身的逐条日志"""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, \
+            (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+        started = time.perf_counter()
+        value = func()
+        results[name] = time.perf_counter() - started
+    return value
+
+
+def run_size(records: int, cache_dir: str, quiet: bool) -> Dict[str, Any]:
+    import classify_projects
+    import extract_procurement_content
+    import fetch_opening_projects
+    import fetch_purchase_bulletins
+    import metrics
+    import nbygcg_info_ding_push as ding
+    from http_client import get_session
+
+    # 每个数据量使用冷缓存与独立的指标；回放服务已重启，丢弃连接池中的旧连接
+    for name in os.listdir(cache_dir):
+        os.remove(os.path.join(cache_dir, name))
+    metrics.REGISTRY = metrics.Registry()
+    get_session().close()
+    max_pages = records // PAGE_SIZE + 2
+    raw_bulletins = build_replay_data(records).bulletin_list
+
+    times: Dict[str, float] = {}
+    openings, _ = timed(times, "fetch_openings", lambda: fetch_opening_projects.fetch_opening_projects(
+        page_size=PAGE_SIZE, max_pages=max_pages), quiet)
+    bulletins = timed(times, "fetch_bulletins", lambda: fetch_purchase_bulletins.fetch_purchase_bulletins(
+        days=fetch_purchase_bulletins.WINDOW_DAYS, page_size=PAGE_SIZE, max_pages=max_pages), quiet)
+    timed(times, "process_bulletins", lambda: list(fetch_purchase_bulletins.process_bulletins(raw_bulletins)), quiet)
+    client = classify_projects.create_client()
+    timed(times, "classify", lambda: classify_projects.classify_records(client, openings, bulletins, force_all=True),
+          quiet)
+    extractor = extract_procurement_content.LLMExtractor(client)
+    timed(times, "extract", lambda: extract_procurement_content.extract_records(extractor, openings, bulletins), quiet)
+    timed(times, "push_render", lambda: ding.build_message(ding.build_digest(openings["projects"], bulletins)), quiet)
+
+    snapshot = metrics.REGISTRY.snapshot()
+    return {
+        "records": records,
+        "openings": len(openings["projects"]),
+        "bulletins": len(bulletins),
+        "stages": {name: round(times[name], 4) for name in STAGE_NAMES},
+        "endpoints": {name: {k: h[k] for k in ("count", "errors", "p50", "p95")}
+                      for name, h in snapshot["endpoints"].items()},
+        "tokens": snapshot["tokens"],
+    }
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    header = f"{'stage':<18}" + "".join(f"{r['records']:>14}" for r in results)
+    print(header)
+    print("-" * len(header))
+    for name in STAGE_NAMES:
+        print(f"{name:<18}" + "".join(f"{r['stages'][name] * 1000:>11.1f} ms" for r in results))
+    print(f"{'total':<18}" + "".join(f"{sum(r['stages'].values()):>12.2f} s" for r in results))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="基于本地回放服务的分阶段流水线基准")
+    parser.add_argument("--sizes", default="100,1000,10000", help="数据量（开标项目与公告各自的条数，逗号分隔）")
+    parser.add_argument("--latency", type=float, default=0.0, help="门户接口延迟（秒）")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="chat.completions 延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟随机浮动范围（± 秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入错误的概率（0~1）")
+    parser.add_argument("--error-status", type=int, default=503, help="注入错误的 HTTP 状态码")
+    parser.add_argument("--output", help="结果另存为 JSON")
+    parser.add_argument("--verbose", action="store_true", help="保留各阶段自身的日志输出")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    port = free_port()
+    cache_dir = tempfile.mkdtemp(prefix="nbygcg-bench-")
+    # 被测模块在导入时读取配置，须在导入前设置
+    for key, value in BENCH_ENV_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    os.environ.update(env_for(f"http://127.0.0.1:{port}"))
+    os.environ["CLASSIFY_CACHE_PATH"] = os.environ["EXTRACT_CACHE_PATH"] = os.path.join(cache_dir, "llm_cache.sqlite3")
+
+    results = []
+    try:
+        for records in sizes:
+            print(f"[INFO] ===== {records} 条 =====")
+            proc = start_server(port, records, args)
+            try:
+                result = run_size(records, cache_dir, not args.verbose)
+            finally:
+                stop_server(proc)
+            results.append(result)
+            print(f"[INFO] 开标项目 {result['openings']} 个，公告 {result['bulletins']} 条，"
+                  f"合计 {sum(result['stages'].values()):.2f}s")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print_table(results)
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"[INFO] 结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,56 @@
+import argparse
 import json
 from openai import OpenAI
-import time
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Hashable, List, Optional, Tuple
 from dotenv import load_dotenv
 
+import metrics
+from llm_cache import DEFAULT_CACHE_PATH, SQLiteCache, make_key, normalize_title, prompt_version
+from rate_limit import TokenBucket
+from resilience import call, llm_host
+from record_store import mark_processed, needs_update
+from storage import save_bulletins, save_openings
+from rule_classifier import pre_classify
+
 # 加载 .env 文件中的环境变量
 load_dotenv()
 
+VALID_TYPES = (
+    "信息化建设类项目",
+    "信息化服务类项目",
+    "信息化软硬件采购类项目",
+    "工程类项目",
+    "其他项目",
+)
+DEFAULT_TYPE = "其他项目"
+MODEL_NAME = os.getenv("OPENAI_MODEL", "Qwen/Qwen2.5-72B-Instruct")
+# 大模型接口主机：重试、Retry-After 退避、并发上限与熔断按主机共享（见 resilience）
+LLM_HOST = llm_host(os.getenv("OPENAI_BASE_URL"))
+
+# 并发与限速配置：
+# - CLASSIFY_CONCURRENCY：同时进行中的请求数上限
+# - CLASSIFY_RATE：每秒最多发起的请求数（令牌桶补充速率），按服务商配额设置
+# - CLASSIFY_BURST：令牌桶容量，允许的瞬时突发请求数
+CLASSIFY_CONCURRENCY = int(os.getenv("CLASSIFY_CONCURRENCY", "4"))
+CLASSIFY_RATE = float(os.getenv("CLASSIFY_RATE", "2"))
+CLASSIFY_BURST = float(os.getenv("CLASSIFY_BURST", "0")) or None
+
+# 分类缓存配置（SQLite）：
+# - CLASSIFY_CACHE_PATH：缓存文件路径
+# - CLASSIFY_CACHE_TTL_DAYS：缓存有效天数，0 表示不过期
+# - CLASSIFY_CACHE_MAX：最多保留条目数（按最近访问淘汰），0 表示不限
+CLASSIFY_CACHE_PATH = os.getenv("CLASSIFY_CACHE_PATH", DEFAULT_CACHE_PATH)
+CLASSIFY_CACHE_TTL_DAYS = float(os.getenv("CLASSIFY_CACHE_TTL_DAYS", "30"))
+CLASSIFY_CACHE_MAX = int(os.getenv("CLASSIFY_CACHE_MAX", "20000"))
+
+# 规则预判：1 表示先用关键词规则判定明确的工程类/其他项目，0 表示全部交给模型
+CLASSIFY_RULES = os.getenv("CLASSIFY_RULES", "1") != "0"
+
+# 批量分类：一次请求携带的标题数，<=1 表示关闭批量、逐条分类
+CLASSIFY_BATCH_SIZE = int(os.getenv("CLASSIFY_BATCH_SIZE", "30"))
+
 def load_projects():
     try:
         with open('opening_projects.json', 'r', encoding='utf-8') as file:
@@ -15,8 +59,7 @@ def load_projects():
         print("Error: opening_projects.json not found")
         return None
 
-def classify_project(client, project_name):
-    prompt = f"""# Role: 项目分类专家
+CLASSIFY_PROMPT_TEMPLATE = """# Role: 项目分类专家
 
 ## Profile
 - language: 中文
@@ -109,32 +152,208 @@ def classify_project(client, project_name):
 项目名称：{project_name}
 """
 
+# 批量分类提示词：复用单条提示词中 OutputFormat 之前的角色与规则部分，只替换输出格式
+BATCH_PROMPT_TEMPLATE = CLASSIFY_PROMPT_TEMPLATE.split("## OutputFormat")[0] + """## OutputFormat
+
+1. 输入为多个项目名称，每行格式为“编号. 项目名称”，每个项目独立判断，互不影响
+2. 输出格式：application/json，结构为 {{"results": [{{"id": 编号, "prjType": "分类结果"}}, ...]}}
+3. 每个输入编号必须且只能出现一次，id 为输入中的整数编号
+4. prjType 必须是五类标准(信息化建设类项目、信息化服务类项目、信息化软硬件采购类项目、工程类项目、其他项目)中的一种
+5. 不得添加解释性文字
+
+## Initialization
+作为项目分类专家，你必须遵守上述Rules，逐个判断下列项目，并按照输出格式要求返回标准JSON格式的结果。
+
+项目名称列表：
+{items}
+"""
+
+# 提示词版本：提示词模板变更后旧缓存自动失效
+PROMPT_VERSION = prompt_version(CLASSIFY_PROMPT_TEMPLATE, BATCH_PROMPT_TEMPLATE)
+
+def open_cache() -> SQLiteCache:
+    return SQLiteCache(
+        CLASSIFY_CACHE_PATH,
+        namespace="classify",
+        ttl_seconds=CLASSIFY_CACHE_TTL_DAYS * 86400,
+        max_entries=CLASSIFY_CACHE_MAX,
+    )
+
+def cache_key(title: str) -> str:
+    """缓存键：归一化标题 + 模型名 + 提示词版本"""
+    return make_key(normalize_title(title), MODEL_NAME, PROMPT_VERSION)
+
+def request_classification(client, project_name):
+    """调用大模型分类单个项目名称；限流/网络错误经 resilience 重试，最终失败时异常直接抛出（由调用方决定回退策略）"""
+    prompt = CLASSIFY_PROMPT_TEMPLATE.format(project_name=project_name)
+    response = call(
+        LLM_HOST,
+        metrics.instrument("chat.completions", client.chat.completions.create),
+        model=MODEL_NAME,
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant designed to output JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.2,
+        top_p=0.1
+    )
+    metrics.record_usage(MODEL_NAME, getattr(response, "usage", None))
+    return json.loads(response.choices[0].message.content)
+
+def request_batch_classification(client, titles: List[str]) -> Dict[int, str]:
+    """一次请求分类多个标题，返回 编号(从 1 开始) -> prjType。
+
+    仅包含编号合法且分类属于五类标准的结果；缺失或非法的编号由调用方逐条重试。
+    """
+    items = "\n".join(f"{i}. {title}" for i, title in enumerate(titles, 1))
+    prompt = BATCH_PROMPT_TEMPLATE.format(items=items)
+    response = call(
+        LLM_HOST,
+        metrics.instrument("chat.completions", client.chat.completions.create),
+        model=MODEL_NAME,
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant designed to output JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.2,
+        top_p=0.1
+    )
+    metrics.record_usage(MODEL_NAME, getattr(response, "usage", None))
+    data = json.loads(response.choices[0].message.content)
+    # 兼容直接返回数组，或以其他键名包裹数组
+    if isinstance(data, dict):
+        rows = data.get("results")
+        if not isinstance(rows, list):
+            rows = next((v for v in data.values() if isinstance(v, list)), [])
+    else:
+        rows = data if isinstance(data, list) else []
+    labels: Dict[int, str] = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        try:
+            idx = int(row.get("id"))
+        except (TypeError, ValueError):
+            continue
+        prj_type = row.get("prjType")
+        if 1 <= idx <= len(titles) and prj_type in VALID_TYPES and idx not in labels:
+            labels[idx] = prj_type
+    return labels
+
+def classify_project(client, project_name):
+    """分类单个项目：仅模型输出无法解析时回退为“其他项目”；接口错误（限流重试用尽、熔断等）向上抛出，不写入错误分类"""
     try:
-        model_name = os.getenv("OPENAI_MODEL", "Qwen/Qwen2.5-72B-Instruct")
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant designed to output JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.2,
-            top_p=0.1
-        )
-        return json.loads(response.choices[0].message.content)
-    except Exception as e:
+        return request_classification(client, project_name)
+    except ValueError as e:
         print(f"Error classifying project: {e}")
-        return {"prjType": "其他项目"}
+        return {"prjType": DEFAULT_TYPE}
+
+def classify_many(client, jobs: List[Tuple[Hashable, str]], concurrency: int = CLASSIFY_CONCURRENCY,
+                  limiter: Optional[TokenBucket] = None, cache: Optional[SQLiteCache] = None,
+                  batch_size: int = CLASSIFY_BATCH_SIZE, use_rules: bool = CLASSIFY_RULES) -> Dict[Hashable, str]:
+    """并发分类引擎。
+
+    jobs 为 (key, 标题) 列表，返回 key -> prjType。
+    - use_rules 时先用关键词规则判定明确的工程类/其他项目，不请求模型
+    - 命中缓存的标题不再请求模型，相同标题只请求一次
+    - batch_size > 1 时先按批请求，批量结果中缺失或非法的标题再逐条重试
+    - 并发数由线程池大小限制，请求速率由令牌桶限制（每次请求消耗一个令牌）
+    - 单条结果无法解析或不合法时回退为“其他项目”，回退结果不写入缓存
+    - 接口错误（限流/网络错误重试用尽、熔断）不回退：这些条目不出现在返回结果中，保持原分类，下次运行重试
+    结束时打印各阶段判定的条目数。
+    """
+    if limiter is None:
+        limiter = TokenBucket(CLASSIFY_RATE, CLASSIFY_BURST)
+    results: Dict[Hashable, str] = {}
+    stage_counts: Dict[str, int] = {"规则": 0, "缓存": 0, "批量": 0, "逐条": 0, "回退": 0, "失败": 0}
+
+    # 规则预判与缓存
+    pending: Dict[str, List[Hashable]] = {}
+    titles: Dict[str, str] = {}
+    for key, title in jobs:
+        ruled = pre_classify(title) if use_rules else None
+        if ruled:
+            results[key] = ruled
+            stage_counts["规则"] += 1
+            continue
+        ck = cache_key(title)
+        if ck not in pending:
+            cached = cache.get(ck) if cache is not None else None
+            if cached in VALID_TYPES:
+                results[key] = cached
+                stage_counts["缓存"] += 1
+                continue
+        pending.setdefault(ck, []).append(key)
+        titles.setdefault(ck, title)
+
+    def finish(ck: str, prj_type: str, stage: str) -> None:
+        if stage != "回退" and cache is not None:
+            cache.set(ck, prj_type)
+        for key in pending[ck]:
+            results[key] = prj_type
+        stage_counts[stage] += len(pending[ck])
+        print(f"分类结果: {titles[ck]} -> {prj_type}")
+
+    def run_batch(batch: List[str]) -> Dict[int, str]:
+        limiter.acquire()
+        return request_batch_classification(client, [titles[ck] for ck in batch])
+
+    def run_single(title: str) -> str:
+        limiter.acquire()
+        result = request_classification(client, title)
+        if not isinstance(result, dict) or result.get("prjType") not in VALID_TYPES:
+            raise ValueError(f"非法分类结果: {result}")
+        return result["prjType"]
+
+    todo = list(titles)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        if batch_size > 1 and len(todo) > 1:
+            batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+            futures = {pool.submit(run_batch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    labels = future.result()
+                except Exception as e:
+                    print(f"Error classifying batch: {e}")
+                    labels = {}
+                for idx, ck in enumerate(batch, 1):
+                    if idx in labels:
+                        finish(ck, labels[idx], "批量")
+            todo = [ck for ck in todo if pending[ck][0] not in results]
+            if todo:
+                print(f"批量结果缺失或非法: {len(todo)} 条，逐条重试")
+
+        futures = {pool.submit(run_single, titles[ck]): ck for ck in todo}
+        for future in as_completed(futures):
+            ck = futures[future]
+            try:
+                finish(ck, future.result(), "逐条")
+            except ValueError as e:
+                print(f"Error classifying project: {e}")
+                finish(ck, DEFAULT_TYPE, "回退")
+            except Exception as e:
+                print(f"Error classifying project: {titles[ck]} -> {e}（本次不分类，下次运行重试）")
+                stage_counts["失败"] += len(pending[ck])
+
+    summary = "，".join(f"{stage} {count}" for stage, count in stage_counts.items())
+    for stage, count in stage_counts.items():
+        metrics.count("classify_decisions", count, stage=stage)
+    print(f"[SUMMARY] 各阶段判定条数：{summary}")
+    return results
 
 def update_projects(original_data, classifications):
     for project in original_data["projects"]:
         bulletin_id = project["bulletinId"]
         if bulletin_id in classifications:
             project["prjType"] = classifications[bulletin_id]
+            mark_processed(project)
 
 def save_projects(data):
-    with open('opening_projects.json', 'w', encoding='utf-8') as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+    # 写入归档库并重新导出 opening_projects.json
+    save_openings(data, 'opening_projects.json')
 
 # ========== 新增：采购公告（purchase_bulletins.json）读写 ==========
 def load_purchase_bulletins():
@@ -146,76 +365,106 @@ def load_purchase_bulletins():
         return None
 
 def save_purchase_bulletins(data):
-    with open('purchase_bulletins.json', 'w', encoding='utf-8') as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+    # 写入归档库并重新导出 purchase_bulletins.json
+    save_bulletins(data, 'purchase_bulletins.json')
 
-def main():
-    # 从环境变量获取API配置
-    api_key = os.getenv('OPENAI_API_KEY')
-    base_url = os.getenv('OPENAI_BASE_URL')
+def should_classify(record, force_all=False):
+    """仅处理新增/变化的记录；未变化且已有合法分类的记录跳过。
+    抓取时 prjType 留空，分类接口失败的记录保持为空，下次运行仍会重新分类"""
+    return force_all or needs_update(record) or record.get("prjType") not in VALID_TYPES
 
+def create_client():
+    """按环境变量创建 OpenAI 客户端（分类与抽取可共用）；重试统一由 resilience 处理，关闭 SDK 自带的重试"""
+    api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
-        print("Error: OPENAI_API_KEY environment variable is not set")
-        print("Please create a .env file with your API key or set the environment variable")
-        return
+        raise RuntimeError("OPENAI_API_KEY environment variable is not set")
+    return OpenAI(api_key=api_key, base_url=os.getenv('OPENAI_BASE_URL'), max_retries=0)
 
-    # 初始化OpenAI客户端
-    client = OpenAI(
-        api_key=api_key,
-        base_url=base_url
-    )
+def classify_records(client, data, purchase_data, force_all=False):
+    """对内存中的开标项目（{"projects": [...]}）与采购公告（列表）分类，结果就地写入 prjType。
 
-    # ================= 处理开标项目（opening_projects.json） =================
+    data / purchase_data 为空时跳过对应部分；返回写入分类的条数。
+    """
+    # ================= 收集待分类条目 =================
     # 说明：
-    # - 输入文件：opening_projects.json
-    # - 数据结构：{"projects": [{"prjName": str, "bulletinId": str, "prjType": str, ...}, ...]}
-    # - 分类依据：对每个项目的 prjName 进行大模型分类（classify_project）
-    # - 输出效果：将分类结果写入对应项目对象的 prjType 字段
-    # - 容错与降级：
-    #   * 若文件缺失或解析失败：跳过该段处理，不影响后续采购公告处理
-    #   * 若单次 API 调用异常：返回 {"prjType": "其他项目"} 作为回退
-    # - 限频处理：每次请求后 sleep(1) 以降低触发限频的概率
-    data = load_projects()
+    # - opening_projects.json：{"projects": [{"prjName": str, "bulletinId": str, "prjType": str, ...}, ...]}
+    #   以 prjName 分类，key 为 ("opening", bulletinId)
+    # - purchase_bulletins.json：[ {"bulletinTitle": str, "prjType": str, ...}, ... ]（顶层为数组）
+    #   以 bulletinTitle 分类，key 为 ("bulletin", 下标)；无标题的公告跳过
+    # - 抓取脚本标记为未变化（syncStatus=unchanged）且已有分类的记录跳过，--all 时全部重新分类
+    # - 若文件缺失或解析失败：跳过该段处理，不影响另一文件
+    jobs: List[Tuple[Hashable, str]] = []
+    skipped = 0
     if data:
-        classifications = {}
         for project in data["projects"]:
-            print(f"\n正在分类开标项目: {project['prjName']}")
-            result = classify_project(client, project['prjName'])
-            classifications[project['bulletinId']] = result['prjType']
-            print(f"分类结果: {result['prjType']}")
-            time.sleep(1)
-        update_projects(data, classifications)
-        save_projects(data)
-        print("开标项目分类完成并已更新到 opening_projects.json")
-    else:
-        print("跳过开标项目分类：opening_projects.json 不存在或读取失败")
-
-    # ================= 处理采购公告（purchase_bulletins.json） =================
-    # 说明：
-    # - 输入文件：purchase_bulletins.json
-    # - 数据结构：[ {"bulletinTitle": str, "prjType": str, ...}, ... ]（顶层为数组）
-    # - 分类依据：对每条公告的 bulletinTitle 进行大模型分类（classify_project）
-    # - 输出效果：将分类结果写入每条公告对象的 prjType 字段
-    # - 容错与降级：
-    #   * 若文件缺失或解析失败：跳过该段处理
-    #   * 若某条公告无标题：跳过该条
-    #   * 若单次 API 调用异常：将 prjType 置为“其他项目”
-    # - 限频处理：每次请求后 sleep(1) 以降低触发限频的概率
-    purchase_data = load_purchase_bulletins()
+            if not should_classify(project, force_all):
+                skipped += 1
+                continue
+            jobs.append((("opening", project['bulletinId']), project['prjName']))
     if purchase_data:
-        for bulletin in purchase_data:
+        for idx, bulletin in enumerate(purchase_data):
             title = bulletin.get('bulletinTitle') or ''
             if not title:
                 continue
-            print(f"\n正在分类采购公告: {title}")
-            result = classify_project(client, title)
-            bulletin['prjType'] = result.get('prjType', '其他项目')
-            print(f"分类结果: {bulletin['prjType']}")
-            time.sleep(1)
+            if not should_classify(bulletin, force_all):
+                skipped += 1
+                continue
+            jobs.append((("bulletin", idx), title))
+
+    # ================= 并发分类 =================
+    # - 先用关键词规则判定明确的工程类/其他项目（CLASSIFY_RULES=0 可关闭）
+    # - 再查 SQLite 缓存（归一化标题 + 模型 + 提示词版本），命中则跳过模型调用
+    # - 未命中的标题按 CLASSIFY_BATCH_SIZE 分批请求，缺失或非法结果逐条重试
+    # - 开标项目与采购公告共用同一线程池与令牌桶，总速率受 CLASSIFY_RATE 约束
+    # - 返回值无法解析或不合法：回退为“其他项目”
+    # - 接口限流/网络错误：按 Retry-After 与抖动退避重试（见 resilience），仍失败则本次不分类，不写入错误结果
+    print(f"未变化跳过: {skipped}，待分类条目: {len(jobs)}，并发: {CLASSIFY_CONCURRENCY}，限速: {CLASSIFY_RATE}/s，批量: {CLASSIFY_BATCH_SIZE}")
+    cache = open_cache()
+    try:
+        results = classify_many(client, jobs, cache=cache)
+        evicted = cache.evict()
+        print(f"[SUMMARY] 分类缓存：{cache.stats()}，淘汰 {evicted} 条")
+    finally:
+        cache.close()
+
+    # ================= 写回内存中的记录 =================
+    if data:
+        classifications = {key[1]: prj_type for key, prj_type in results.items() if key[0] == "opening"}
+        update_projects(data, classifications)
+    if purchase_data:
+        for key, prj_type in results.items():
+            if key[0] == "bulletin":
+                purchase_data[key[1]]['prjType'] = prj_type
+                mark_processed(purchase_data[key[1]])
+    return len(results)
+
+def main():
+    parser = argparse.ArgumentParser(description="对开标项目与采购公告进行分类（写入 prjType）")
+    parser.add_argument("--all", action="store_true", help="重新分类全部记录（默认只分类新增/变化的记录）")
+    args = parser.parse_args()
+
+    try:
+        client = create_client()
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        print("Please create a .env file with your API key or set the environment variable")
+        return
+
+    data = load_projects()
+    purchase_data = load_purchase_bulletins()
+    if not data:
+        print("跳过开标项目分类：opening_projects.json 不存在或读取失败")
+    if not purchase_data:
+        print("跳过采购公告分类：purchase_bulletins.json 不存在或读取失败")
+    classify_records(client, data, purchase_data, force_all=args.all)
+
+    # ================= 写回结果 =================
+    if data:
+        save_projects(data)
+        print("开标项目分类完成并已更新到 opening_projects.json")
+    if purchase_data:
         save_purchase_bulletins(purchase_data)
         print("采购公告分类完成并已更新到 purchase_bulletins.json")
-    else:
-        print("跳过采购公告分类：purchase_bulletins.json 不存在或读取失败")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
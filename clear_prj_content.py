@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """
-清空 opening_projects.json 与 purchase_bulletins.json 中各条目的 prjContent 字段（置为 null）。
+清空 opening_projects.json 与 purchase_bulletins.json 中各条目的 prjContent 字段（置为 null），
+同步写入归档库（storage.py）后重新导出。
 
 用法示例：
   python clear_prj_content.py
@@ -14,6 +15,8 @@ import sys
 from pathlib import Path
 from typing import Any, Dict, List
 
+from storage import save_bulletins, save_openings
+
 
 def load_json(path: Path) -> Any:
     try:
@@ -49,8 +52,8 @@ def clear_openings(path: Path) -> int:
                 item["prjContent"] = None
                 changed += 1
     try:
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        # 写入归档库并重新导出，否则下次导出会恢复旧的 prjContent
+        save_openings(data, str(path))
         print(f"[INFO] 已保存: {path}，置空 {changed} 条 prjContent")
     except Exception as e:
         print(f"[ERROR] 保存失败: {path} -> {e}")
@@ -69,8 +72,7 @@ def clear_bulletins(path: Path) -> int:
                 item["prjContent"] = None
                 changed += 1
     try:
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        save_bulletins(data, str(path))
         print(f"[INFO] 已保存: {path}，置空 {changed} 条 prjContent")
     except Exception as e:
         print(f"[ERROR] 保存失败: {path} -> {e}")
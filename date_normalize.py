@@ -0,0 +1,106 @@
+"""
+日期规范化：公告/开标记录中 publishDate、endDate、kbDate 等字段的解析与格式化，抓取与推送脚本共用。
+
+- parse_date_to_ymd：任意日期字符串 -> YYYY-MM-DD
+- parse_to_iso_datetime：任意日期时间字符串 -> YYYY-MM-DDTHH:MM:SS（缺少的时分秒补零）
+- parse_iso_to_display：ISO 日期时间 -> 推送中展示的 YYYY-MM-DD HH:MM
+- parse_kb_datetime：开标时间 -> 北京时区的 datetime
+
+门户返回的格式固定为少数几种（“2026-03-02”“2026-03-02 09:30:00”“2026-03-02T09:30:00”），先用预编译的正则
+按这些格式直接切片，命中即返回，不经过 datetime 解析；其余输入走原有的逐级回退逻辑，结果与原实现逐字一致。
+同一批数据中的时间戳大量重复（同日发布、同一时段开标），各函数的结果按输入字符串做 LRU 缓存。
+对比见 bench_date_normalize.py。
+"""
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional
+from zoneinfo import ZoneInfo
+
+BEIJING_TZ = ZoneInfo("Asia/Shanghai")
+# 每个函数缓存的不同输入个数（一次运行中不同的时间戳通常只有几千个）
+CACHE_SIZE = 8192
+
+# 快速路径：门户返回的精确格式
+# 只认 ASCII 数字：全角等其他数字仍走回退路径，由 int() 转成 ASCII
+_YMD_PREFIX_RE = re.compile(r"\d{4}-\d{2}-\d{2}(?!\d)", re.ASCII)
+_ISO_SECONDS_RE = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}", re.ASCII)
+# 回退路径（与原实现相同的宽松匹配）
+_YMD_RE = re.compile(r"(?:^|[^\d])(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?:[^\d]|$)")
+_DATETIME_RE = re.compile(
+    r"(\d{4})[/-](\d{1,2})[/-](\d{1,2})(?:[ T](\d{1,2})(?::(\d{1,2}))?(?::(\d{1,2}))?)?"
+)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _ymd(s: str) -> Optional[str]:
+    if _YMD_PREFIX_RE.match(s):
+        return s[:10]
+    try:
+        # 兼容 '2025-09-01'、'2025-09-01 12:34:56'：先仅取前 10 位尝试
+        return datetime.fromisoformat(s[:10]).strftime("%Y-%m-%d")
+    except ValueError:
+        pass
+    m = _YMD_RE.search(s)
+    if m:
+        return f"{int(m.group(1)):04d}-{int(m.group(2)):02d}-{int(m.group(3)):02d}"
+    return None
+
+
+def parse_date_to_ymd(value: Any) -> Optional[str]:
+    """将日期字符串解析为 YYYY-MM-DD 格式。失败则返回 None。"""
+    if not value:
+        return None
+    return _ymd(str(value))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _iso_datetime(s: str) -> Optional[str]:
+    if _ISO_SECONDS_RE.match(s):
+        return f"{s[:10]}T{s[11:19]}"
+    m = _DATETIME_RE.search(s)
+    if m:
+        y, mo, d, hh, mm, ss = (int(g) if g is not None else 0 for g in m.groups())
+        return f"{y:04d}-{mo:02d}-{d:02d}T{hh:02d}:{mm:02d}:{ss:02d}"
+    # 回退：归一化分隔符后尝试 fromisoformat
+    try:
+        return datetime.fromisoformat(s.replace("/", "-").replace(" ", "T")).strftime("%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return None
+
+
+def parse_to_iso_datetime(value: Any) -> Optional[str]:
+    """将输入解析为标准的 YYYY-MM-DDTHH:MM:SS 字符串。
+    - 允许分隔符为 '-' 或 '/'
+    - 允许时间用空格或 'T' 连接
+    - 若缺少分或秒，自动补零
+    """
+    if not value:
+        return None
+    return _iso_datetime(str(value).strip())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_iso_to_display(dt_str: str) -> str:
+    """将 ISO 日期时间字符串转换为 'YYYY-MM-DD HH:MM'，失败返回空串"""
+    if not dt_str:
+        return ""
+    try:
+        # 兼容 'YYYY-MM-DDTHH:MM:SS' 或 'YYYY-MM-DD HH:MM:SS'
+        return datetime.fromisoformat(dt_str.replace(" ", "T")).strftime("%Y-%m-%d %H:%M")
+    except ValueError:
+        pass
+    # 若仅有日期
+    try:
+        return datetime.strptime(dt_str[:10], "%Y-%m-%d").strftime("%Y-%m-%d 00:00")
+    except ValueError:
+        return ""
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_kb_datetime(kb_raw: str) -> datetime:
+    """解析开标时间：若无时区则按北京时区解释；若有时区则转换到北京时区（无法解析时抛出 ValueError）"""
+    dt = datetime.fromisoformat(kb_raw)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=BEIJING_TZ)
+    return dt.astimezone(BEIJING_TZ)
@@ -0,0 +1,165 @@
+"""
+看板数据发布：将两个 JSON 导出为带内容哈希的压缩静态文件，并生成 manifest.json。
+
+- 输出到 DIST_DIR（默认 data/）：<name>.<hash>.json（紧凑 JSON）及预压缩的 .json.gz / .json.br
+- 文件名包含内容哈希，内容不变则文件名不变，浏览器/CDN 可长期缓存
+- manifest.json 记录当前版本各数据集的文件名，index.html 先读取它（不缓存）再加载数据
+- 导出时去掉增量合并的内部字段（contentHash、syncStatus），它们每次运行都可能变化，只会增大文件并产生无意义的提交
+- manifest 的 history 按发布顺序（新的在前）记录各数据集最近 DIST_KEEP 个版本的文件名（默认 2，
+  给仍持有旧 manifest 的页面留出余量），不在其中的旧文件删除；不依赖文件 mtime（检出后所有文件 mtime 相同）
+- 未安装 brotli 时跳过 .br，只生成 .gz
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from record_store import INTERNAL_FIELDS
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+DIST_DIR = os.getenv("DIST_DIR", "data")
+DIST_KEEP = int(os.getenv("DIST_KEEP", "2"))
+MANIFEST_NAME = "manifest.json"
+
+# 数据集名称 -> 源 JSON 文件
+DATASETS = {
+    "opening_projects": "opening_projects.json",
+    "purchase_bulletins": "purchase_bulletins.json",
+}
+
+
+def strip_internal(content: Any) -> Any:
+    """去掉记录中的内部字段（INTERNAL_FIELDS）；开标数据的记录在 projects 下，公告数据本身是记录列表"""
+    records = content.get("projects") if isinstance(content, dict) else content
+    for record in records or []:
+        if isinstance(record, dict):
+            for field in INTERNAL_FIELDS:
+                record.pop(field, None)
+    return content
+
+
+def minify(content: Any) -> bytes:
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_bytes(path: str, payload: bytes) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+def write_dataset(name: str, payload: bytes, dist_dir: str = DIST_DIR) -> Dict[str, Any]:
+    """写入一个数据集的紧凑 JSON 与压缩副本，返回 manifest 条目"""
+    digest = hashlib.sha256(payload).hexdigest()[:12]
+    filename = f"{name}.{digest}.json"
+    path = os.path.join(dist_dir, filename)
+    entry: Dict[str, Any] = {"file": f"{dist_dir}/{filename}", "hash": digest, "bytes": len(payload)}
+    if not os.path.exists(path):
+        _write_bytes(path, payload)
+        # mtime=0 保证相同内容生成相同的 .gz
+        _write_bytes(path + ".gz", gzip.compress(payload, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_bytes(path + ".br", brotli.compress(payload, quality=11))
+    if os.path.exists(path + ".gz"):
+        entry["gzipBytes"] = os.path.getsize(path + ".gz")
+    if os.path.exists(path + ".br"):
+        entry["brBytes"] = os.path.getsize(path + ".br")
+    return entry
+
+
+def prune(name: str, keep: List[str], dist_dir: str = DIST_DIR) -> int:
+    """删除数据集 name 不在 keep（manifest history 中的文件名）里的版本文件"""
+    prefix = f"{name}."
+    keep_set = set(keep)
+    removed = 0
+    for fn in os.listdir(dist_dir):
+        if not (fn.startswith(prefix) and fn.endswith(".json")) or fn in keep_set:
+            continue
+        for suffix in ("", ".gz", ".br"):
+            target = os.path.join(dist_dir, fn + suffix)
+            if os.path.exists(target):
+                os.remove(target)
+                removed += 1
+    return removed
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _history(previous: Optional[Dict[str, Any]], name: str, current: str,
+             max_versions: int = DIST_KEEP) -> List[str]:
+    """当前文件在前，接上一份 manifest 中该数据集的历史，保留最近 max_versions 个"""
+    older: List[str] = []
+    if previous:
+        older = list((previous.get("history") or {}).get(name) or [])
+        if not older:
+            # 尚未记录 history 的旧 manifest：只知道上一个版本的文件
+            entry = (previous.get("files") or {}).get(name)
+            if entry and entry.get("file"):
+                older = [os.path.basename(entry["file"])]
+    versions = [current] + [fn for fn in older if fn != current]
+    return versions[:max(max_versions, 1)]
+
+
+def build(dist_dir: str = DIST_DIR, datasets: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """发布全部数据集并写入 manifest.json，返回 manifest"""
+    datasets = datasets or DATASETS
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+    previous = _read_manifest(manifest_path)
+    files: Dict[str, Any] = {}
+    history: Dict[str, List[str]] = {}
+    for name, source in datasets.items():
+        if not os.path.exists(source):
+            print(f"[WARN] 源文件不存在，跳过：{source}")
+            continue
+        with open(source, "r", encoding="utf-8") as f:
+            content = json.load(f)
+        entry = write_dataset(name, minify(strip_internal(content)), dist_dir)
+        files[name] = entry
+        history[name] = _history(previous, name, os.path.basename(entry["file"]))
+        removed = prune(name, history[name], dist_dir)
+        size_info = f"{entry['bytes']} B"
+        if "gzipBytes" in entry:
+            size_info += f"，gzip {entry['gzipBytes']} B"
+        if "brBytes" in entry:
+            size_info += f"，br {entry['brBytes']} B"
+        print(f"[INFO] {name} -> {entry['file']}（{size_info}，清理旧文件 {removed} 个）")
+
+    manifest = {
+        "version": hashlib.sha256("".join(e["hash"] for e in files.values()).encode("utf-8")).hexdigest()[:12],
+        "generatedAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": files,
+        "history": history,
+    }
+    if previous and previous.get("version") == manifest["version"] and previous.get("history") == history:
+        # 数据未变化时不改写 manifest，避免产生无意义的提交
+        print(f"[INFO] 数据未变化，manifest 保持版本 {manifest['version']}")
+        return previous
+    _write_bytes(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+    print(f"[SUMMARY] manifest 版本 {manifest['version']}，数据集 {len(files)} 个")
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="发布看板数据（压缩 + 内容哈希文件名 + manifest.json）")
+    parser.add_argument("--dist", default=DIST_DIR, help=f"输出目录（默认 {DIST_DIR}）")
+    args = parser.parse_args()
+    build(args.dist)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,54 @@
+import argparse
+import hashlib
 import json
 import os
-import re
-import time
-from typing import Any, Dict, List, Optional, Tuple
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import requests
 from dotenv import load_dotenv
 from openai import OpenAI
 
+import metrics
+from field_extractor import build_prj_content, extract_fields, record_fields
+from html_text import html_to_text
+from http_client import INQUIRE_BASE_URL, PORTAL_BASE_URL, request as http_request
+from llm_cache import DEFAULT_CACHE_PATH, SQLiteCache, make_key, prompt_version
+from rate_limit import TokenBucket
+from resilience import THROTTLE_STATUSES, CircuitOpenError, call, llm_host, status_of
+from section_selector import SELECTOR_VERSION, estimate_tokens, select_sections
+from storage import read_content, save_bulletins, save_openings
+
 # 加载环境变量 (.env)
 load_dotenv()
 
 ACCEPT_TYPES = {"信息化建设类项目", "信息化软硬件采购类项目"}
 DEFAULT_TIMEOUT = 20
+# 流水线配置：
+# - EXTRACT_FETCH_CONCURRENCY：详情抓取线程数（共用一个带连接池的 Session）
+# - EXTRACT_CLEAN_WORKERS：HTML 清洗线程数
+# - EXTRACT_LLM_CONCURRENCY：LLM 抽取线程数
+# - EXTRACT_LLM_RATE：每秒最多发起的 LLM 请求数
+# - EXTRACT_QUEUE_SIZE：级间队列容量（背压上限）
+FETCH_CONCURRENCY = int(os.getenv("EXTRACT_FETCH_CONCURRENCY", "8"))
+CLEAN_WORKERS = int(os.getenv("EXTRACT_CLEAN_WORKERS", "1"))
+LLM_CONCURRENCY = int(os.getenv("EXTRACT_LLM_CONCURRENCY", "2"))
+LLM_RATE = float(os.getenv("EXTRACT_LLM_RATE", "1"))
+QUEUE_SIZE = int(os.getenv("EXTRACT_QUEUE_SIZE", "16"))
+# 抽取结果缓存（SQLite，与分类缓存可共用同一文件，命名空间不同）：
+# - EXTRACT_CACHE_PATH：缓存文件路径
+# - EXTRACT_CACHE_TTL_DAYS：缓存有效天数，0 表示不过期
+# - EXTRACT_CACHE_MAX：最多保留条目数（按最近访问淘汰），0 表示不限
+# - EXTRACT_FAILURE_TTL_DAYS：未抽取到内容的记录（同一缓存键）在此天数内不再请求 LLM，0 表示不记录失败
+EXTRACT_CACHE_PATH = os.getenv("EXTRACT_CACHE_PATH", DEFAULT_CACHE_PATH)
+EXTRACT_CACHE_TTL_DAYS = float(os.getenv("EXTRACT_CACHE_TTL_DAYS", "90"))
+EXTRACT_CACHE_MAX = int(os.getenv("EXTRACT_CACHE_MAX", "5000"))
+EXTRACT_FAILURE_TTL_DAYS = float(os.getenv("EXTRACT_FAILURE_TTL_DAYS", "3"))
+# 发送给 LLM 的正文 token 预算：超出时按章节相关性裁剪（见 section_selector）
+TOKEN_BUDGET = int(os.getenv("EXTRACT_TOKEN_BUDGET", "3000"))
+# 模板规则抽取：1 表示先按公告模板（标段表格、招标范围/采购内容等字段）拼出 prjContent，解析失败才请求 LLM
+EXTRACT_RULES = os.getenv("EXTRACT_RULES", "1") != "0"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
@@ -44,45 +80,11 @@ def read_purchase_bulletins(path: str = "purchase_bulletins.json") -> Optional[L
         return None
 
 
-def save_json(content: Any, path: str) -> None:
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(content, f, ensure_ascii=False, indent=4)
-        print(f"[INFO] 已保存: {path}")
-    except Exception as e:
-        print(f"[ERROR] 保存 {path} 失败: {e}")
-
-
-# 基础 HTML 清洗：移除脚本、样式、标签，仅保留纯文本
-TAG_RE = re.compile(r"<[^>]+>")
-SCRIPT_STYLE_RE = re.compile(r"<\s*(script|style)[^>]*>.*?<\s*/\s*\1\s*>", re.I | re.S)
-WHITESPACE_RE = re.compile(r"[ \t\r\f\v]+")
-
-
-def html_to_text(html: str) -> str:
-    if not html:
-        return ""
-    # 去掉 script/style
-    html = SCRIPT_STYLE_RE.sub(" ", html)
-    # 去掉标签
-    text = TAG_RE.sub(" ", html)
-    # HTML 实体简单还原
-    try:
-        import html as html_lib
-        text = html_lib.unescape(text)
-    except Exception:
-        pass
-    # 规范空白
-    text = WHITESPACE_RE.sub(" ", text)
-    text = re.sub(r"\n+", "\n", text)
-    return text.strip()
-
-
-def fetch_page_text(url: str, timeout: int = DEFAULT_TIMEOUT) -> Optional[str]:
+def fetch_page_text(url: str, timeout: int = DEFAULT_TIMEOUT, session: Optional[requests.Session] = None) -> Optional[str]:
     if not url:
         return None
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout)
+        resp = http_request("GET", url, session=session, endpoint="page", headers=HEADERS, timeout=timeout)
         resp.raise_for_status()
         resp.encoding = resp.apparent_encoding or resp.encoding or "utf-8"
         return html_to_text(resp.text)
@@ -91,18 +93,19 @@ def fetch_page_text(url: str, timeout: int = DEFAULT_TIMEOUT) -> Optional[str]:
         return None
 
 
-def fetch_opening_inquire_text(prj_id: str, timeout: int = DEFAULT_TIMEOUT) -> Optional[str]:
+def fetch_opening_inquire_html(prj_id: str, timeout: int = DEFAULT_TIMEOUT, session: Optional[requests.Session] = None) -> Optional[str]:
     """
     通过近期开标接口获取在线答疑/询问内容：
     GET https://ygcg.nbcqjy.org:8075/api/Notoken/GetOnlineInquire?PrjId=<prj_id>
 
-    返回可能是 JSON 或 HTML，做尽量健壮的解析并转为纯文本。
+    返回可能是 JSON 或 HTML，做尽量健壮的解析，返回原始正文（HTML 或文本），清洗由调用方完成。
     """
     if not prj_id:
         return None
-    url = f"https://ygcg.nbcqjy.org:8075/api/Notoken/GetOnlineInquire?PrjId={prj_id}"
+    url = f"{INQUIRE_BASE_URL}/api/Notoken/GetOnlineInquire?PrjId={prj_id}"
     try:
-        resp = requests.get(url, headers={"User-Agent": HEADERS["User-Agent"], "Accept": "*/*"}, timeout=timeout, verify=True)
+        resp = http_request("GET", url, session=session, endpoint="GetOnlineInquire",
+                            headers={"User-Agent": HEADERS["User-Agent"], "Accept": "*/*"}, timeout=timeout, verify=True)
         resp.raise_for_status()
         # 优先尝试 JSON，按固定路径 Body.Data.Remark（或 PrjContent）提取
         try:
@@ -112,11 +115,11 @@ def fetch_opening_inquire_text(prj_id: str, timeout: int = DEFAULT_TIMEOUT) -> O
             # 首选 Remark
             remark = detail.get("Remark") if isinstance(detail, dict) else None
             if isinstance(remark, str) and remark.strip():
-                return html_to_text(remark)
+                return remark
             # 备选 PrjContent
             prj_content = detail.get("PrjContent") if isinstance(detail, dict) else None
             if isinstance(prj_content, str) and prj_content.strip():
-                return html_to_text(prj_content)
+                return prj_content
 
             # 若固定字段未取到，则进行兜底遍历
             text_candidates: List[str] = []
@@ -139,36 +142,37 @@ def fetch_opening_inquire_text(prj_id: str, timeout: int = DEFAULT_TIMEOUT) -> O
             merged = "\n".join([t for t in text_candidates if t and isinstance(t, str)])
             merged = merged.strip()
             if merged:
-                return html_to_text(merged)
+                return merged
         except ValueError:
             # 非 JSON，当作 HTML 文本处理
             pass
         # 如果不是 JSON 或没取到内容，按纯文本/HTML处理
         resp.encoding = resp.apparent_encoding or resp.encoding or "utf-8"
-        return html_to_text(resp.text)
+        return resp.text
     except Exception as e:
         print(f"[WARN] 开标接口请求失败: {url} -> {e}")
         return None
 
 
-def fetch_bulletin_text(auto_id: str, timeout: int = DEFAULT_TIMEOUT) -> Optional[str]:
+def fetch_bulletin_html(auto_id: str, timeout: int = DEFAULT_TIMEOUT, session: Optional[requests.Session] = None) -> Optional[str]:
     """
     调用公告详情接口：
     POST https://ygcg.nbcqjy.org/api/Portal/GetBulletinContent
     Body: {"autoID": <bulletinId>}
 
-    尽量从响应中提取正文内容（HTML 或文本），并转为纯文本。
+    尽量从响应中提取正文内容（HTML 或文本），返回原始正文，清洗由调用方完成。
     """
     if not auto_id:
         return None
-    url = "https://ygcg.nbcqjy.org/api/Portal/GetBulletinContent"
+    url = f"{PORTAL_BASE_URL}/api/Portal/GetBulletinContent"
     headers = {
         "Content-Type": "application/json;charset=UTF-8",
         "User-Agent": HEADERS["User-Agent"],
         "Accept": "application/json, text/plain, */*",
     }
     try:
-        resp = requests.post(url, headers=headers, data=json.dumps({"autoID": auto_id}), timeout=timeout)
+        resp = http_request("POST", url, session=session, endpoint="GetBulletinContent", headers=headers,
+                            data=json.dumps({"autoID": auto_id}), timeout=timeout)
         resp.raise_for_status()
 
         # 优先尝试 JSON
@@ -193,14 +197,14 @@ def fetch_bulletin_text(auto_id: str, timeout: int = DEFAULT_TIMEOUT) -> Optiona
             if isinstance(article, dict):
                 bc = get_case_insensitive(article, "bulletinContent")
                 if isinstance(bc, str) and bc.strip():
-                    return html_to_text(bc)
+                    return bc
 
             # 2) 备选：Body.Data.BulletinContent（另一种结构）
             body_alt = get_case_insensitive(root, "body") or get_case_insensitive(root, "Body")
             data_alt = get_case_insensitive(body_alt, "data") or get_case_insensitive(body_alt, "Data") if isinstance(body_alt, dict) else None
             bc2 = get_case_insensitive(data_alt, "bulletinContent") if isinstance(data_alt, dict) else None
             if isinstance(bc2, str) and bc2.strip():
-                return html_to_text(bc2)
+                return bc2
 
             # 3) 仍未取到，兜底遍历常见字段
             text_candidates: List[str] = []
@@ -223,19 +227,31 @@ def fetch_bulletin_text(auto_id: str, timeout: int = DEFAULT_TIMEOUT) -> Optiona
             merged = "\n".join([t for t in text_candidates if t and isinstance(t, str)])
             merged = merged.strip()
             if merged:
-                return html_to_text(merged)
+                return merged
         except ValueError:
             # 非 JSON，当作 HTML 文本处理
             pass
 
         # 退路：按文本/HTML 处理
         resp.encoding = resp.apparent_encoding or resp.encoding or "utf-8"
-        return html_to_text(resp.text)
+        return resp.text
     except Exception as e:
         print(f"[WARN] 公告接口请求失败: {url} -> {e}")
         return None
 
 
+def fetch_opening_inquire_text(prj_id: str, timeout: int = DEFAULT_TIMEOUT, session: Optional[requests.Session] = None) -> Optional[str]:
+    """获取开标接口详情并转为纯文本"""
+    html = fetch_opening_inquire_html(prj_id, timeout=timeout, session=session)
+    return html_to_text(html) if html else None
+
+
+def fetch_bulletin_text(auto_id: str, timeout: int = DEFAULT_TIMEOUT, session: Optional[requests.Session] = None) -> Optional[str]:
+    """获取公告详情接口正文并转为纯文本"""
+    html = fetch_bulletin_html(auto_id, timeout=timeout, session=session)
+    return html_to_text(html) if html else None
+
+
 # LLM 提取“项目采购内容”
 EXTRACT_PROMPT_TEMPLATE = (
     """
@@ -252,22 +268,75 @@ EXTRACT_PROMPT_TEMPLATE = (
 )
 
 
+# 提示词版本：提示词或正文裁剪策略变更后旧缓存自动失效
+EXTRACT_PROMPT_VERSION = prompt_version(EXTRACT_PROMPT_TEMPLATE, str(TOKEN_BUDGET), SELECTOR_VERSION)
+
+
+def open_extract_cache() -> SQLiteCache:
+    return SQLiteCache(
+        EXTRACT_CACHE_PATH,
+        namespace="extract",
+        ttl_seconds=EXTRACT_CACHE_TTL_DAYS * 86400,
+        max_entries=EXTRACT_CACHE_MAX,
+    )
+
+
+def open_failure_cache() -> Optional[SQLiteCache]:
+    """抽取失败记录（命名空间 extract_failed），有效期较短，到期后重新请求 LLM"""
+    if EXTRACT_FAILURE_TTL_DAYS <= 0:
+        return None
+    return SQLiteCache(
+        EXTRACT_CACHE_PATH,
+        namespace="extract_failed",
+        ttl_seconds=EXTRACT_FAILURE_TTL_DAYS * 86400,
+        max_entries=EXTRACT_CACHE_MAX,
+    )
+
+
+def extract_cache_key(text: str, title: Optional[str], model: str) -> str:
+    """缓存键：清洗后正文哈希 + 标题 + 模型名 + 提示词版本"""
+    text_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return make_key(text_hash, title or "", model, EXTRACT_PROMPT_VERSION)
+
+
+def llm_unavailable(exc: BaseException) -> bool:
+    """模型接口不可用：熔断中，或限流重试已用尽；此时继续请求只会失败，由流水线停止 LLM 抽取"""
+    return isinstance(exc, CircuitOpenError) or status_of(exc) in THROTTLE_STATUSES
+
+
 class LLMExtractor:
-    def __init__(self) -> None:
+    def __init__(self, client: Optional[OpenAI] = None) -> None:
+        """client 为已创建的 OpenAI 客户端（如统一入口中与分类共用），未传入时按环境变量创建"""
         api_key = os.getenv("OPENAI_API_KEY")
         base_url = os.getenv("OPENAI_BASE_URL")
         model = os.getenv("OPENAI_MODEL", "Qwen/Qwen2.5-72B-Instruct")
-        if not api_key:
+        if client is None and not api_key:
             raise RuntimeError("未设置 OPENAI_API_KEY 环境变量")
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        # 重试与限流退避统一由 resilience 处理，关闭 SDK 自带的重试
+        self.client = client or OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        self.host = llm_host(base_url)
         self.model = model
 
-    def extract(self, text: str, title: Optional[str] = None) -> Optional[str]:
+    def extract(self, text: str, title: Optional[str] = None,
+                limiter: Optional[TokenBucket] = None) -> Optional[str]:
+        """limiter 在实际发出请求前取令牌，正文过短、裁剪后为空等不请求的情况不消耗令牌。
+
+        未抽取到内容（输出无法解析、prjContent 为空等）返回 None；接口不可用（见 llm_unavailable）时抛出异常。
+        """
         if not text or len(text) < 30:
             return None
-        user_content = EXTRACT_PROMPT_TEMPLATE + (f"\n标题：{title}\n" if title else "") + "\n" + text[:8000]
+        selected = select_sections(text, TOKEN_BUDGET)
+        if not selected.strip():
+            return None
+        if selected is not text:
+            print(f"[DEBUG] 正文按章节裁剪：约 {estimate_tokens(text)} -> {estimate_tokens(selected)} tokens")
+        user_content = EXTRACT_PROMPT_TEMPLATE + (f"\n标题：{title}\n" if title else "") + "\n" + selected
+        if limiter is not None:
+            limiter.acquire()
         try:
-            resp = self.client.chat.completions.create(
+            resp = call(
+                self.host,
+                metrics.instrument("chat.completions", self.client.chat.completions.create),
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant designed to output JSON."},
@@ -277,6 +346,7 @@ class LLMExtractor:
                 temperature=0.2,
                 top_p=0.1,
             )
+            metrics.record_usage(self.model, getattr(resp, "usage", None))
             raw = resp.choices[0].message.content
             # 清洗模型输出，处理 ```json ... ``` 或多余文本
             cleaned = (raw or "").strip()
@@ -303,6 +373,8 @@ class LLMExtractor:
                 return content.strip()
             return None
         except Exception as e:
+            if llm_unavailable(e):
+                raise
             print(f"[WARN] LLM 抽取失败: {e}")
             return None
 
@@ -317,75 +389,267 @@ def need_process(prj_type: Optional[str], prj_content: Any) -> bool:
     return False
 
 
-def process_opening_projects(extractor: LLMExtractor, path: str = "opening_projects.json", rate_sleep: float = 1.0) -> Tuple[int, int]:
-    data = read_opening_projects(path)
-    if not data or not isinstance(data, dict):
-        return (0, 0)
-    items = data.get("projects") or []
-    total, updated = 0, 0
-    for item in items:
-        prj_type = item.get("prjType")
-        if not need_process(prj_type, item.get("prjContent")):
-            continue
-        prj_id = item.get("prjId")
-        title = item.get("prjName") or item.get("prjNo")
-        total += 1
-        print(f"[OPENING] 抓取(接口): {title} -> prjId={prj_id}")
-        text = fetch_opening_inquire_text(prj_id)
-        if not text:
-            print("[OPENING] 抓取失败，跳过")
-            continue
-        print(f"[DEBUG][OPENING] 正文预览: {text[:500]}")
-        content = extractor.extract(text, title=title)
-        if content:
-            item["prjContent"] = content
-            updated += 1
-            print(f"[OPENING] 已更新 prjContent: {content}")
-        else:
-            print("[OPENING] 未能从正文抽取到有效内容")
-        time.sleep(rate_sleep)
-    # 保存
-    save_json(data, path)
-    return (total, updated)
+class ExtractJob:
+    """流水线中的一条待抽取记录（item 为 JSON 中的原始 dict，结果直接写回）"""
 
+    __slots__ = ("kind", "item", "key", "title", "fetch", "fallback", "refresh")
 
-def process_purchase_bulletins(extractor: LLMExtractor, path: str = "purchase_bulletins.json", rate_sleep: float = 1.0) -> Tuple[int, int]:
-    data = read_purchase_bulletins(path)
+    def __init__(self, kind: str, item: Dict[str, Any], key: Optional[str], title: Optional[str],
+                 fetch: Callable[[str], Optional[str]], fallback: Optional[Callable[[], Optional[str]]] = None,
+                 refresh: bool = False) -> None:
+        self.kind = kind
+        self.item = item
+        self.key = key
+        self.title = title
+        self.fetch = fetch
+        # 接口抓取失败时的本地正文来源（按需读取）
+        self.fallback = fallback
+        # refresh=True：忽略已有 prjContent 与缓存，强制重新抽取
+        self.refresh = refresh
+
+
+def is_refresh(item: Dict[str, Any], refresh_ids: Optional[Set[str]]) -> bool:
+    return bool(refresh_ids) and item.get("prjType") in ACCEPT_TYPES and str(item.get("bulletinId")) in refresh_ids
+
+
+def collect_opening_jobs(data: Any, refresh_ids: Optional[Set[str]] = None) -> List[ExtractJob]:
+    if not data or not isinstance(data, dict):
+        return []
+    jobs = []
+    for item in data.get("projects") or []:
+        refresh = is_refresh(item, refresh_ids)
+        if refresh or need_process(item.get("prjType"), item.get("prjContent")):
+            title = item.get("prjName") or item.get("prjNo")
+            jobs.append(ExtractJob("OPENING", item, item.get("prjId"), title, fetch_opening_inquire_html,
+                                   refresh=refresh))
+    return jobs
+
+
+def collect_bulletin_jobs(data: Any, refresh_ids: Optional[Set[str]] = None) -> List[ExtractJob]:
     if not data or not isinstance(data, list):
-        return (0, 0)
-    total, updated = 0, 0
+        return []
+    jobs = []
     for item in data:
-        prj_type = item.get("prjType")
-        if not need_process(prj_type, item.get("prjContent")):
-            continue
-        auto_id = item.get("bulletinId")
-        title = item.get("bulletinTitle") or item.get("title") or item.get("prjName")
-        total += 1
-        print(f"[BULLETIN] 抓取(接口): {title} -> autoID={auto_id}")
-        text = fetch_bulletin_text(auto_id)
-        if not text:
-            print("[BULLETIN] 接口抓取失败，尝试从本地字段 bulletinContent 提取")
-            html = item.get("bulletinContent")
+        refresh = is_refresh(item, refresh_ids)
+        if refresh or need_process(item.get("prjType"), item.get("prjContent")):
+            title = item.get("bulletinTitle") or item.get("title") or item.get("prjName")
+            jobs.append(ExtractJob("BULLETIN", item, item.get("bulletinId"), title, fetch_bulletin_html,
+                                   fallback=lambda item=item: read_content(item), refresh=refresh))
+    return jobs
+
+
+_STOP = object()
+
+
+def run_extract_pipeline(extractor: LLMExtractor, jobs: List[ExtractJob],
+                         fetch_workers: int = FETCH_CONCURRENCY, clean_workers: int = CLEAN_WORKERS,
+                         llm_workers: int = LLM_CONCURRENCY, llm_rate: float = LLM_RATE,
+                         queue_size: int = QUEUE_SIZE, cache: Optional[SQLiteCache] = None,
+                         failed: Optional[SQLiteCache] = None, use_rules: bool = EXTRACT_RULES) -> Dict[str, Tuple[int, int]]:
+    """抓取 → 清洗 → LLM 抽取 三级流水线。
+
+    - 各级由独立线程池处理，通过有界队列衔接；下游处理不过来时上游阻塞（背压），内存占用保持平稳
+    - 开标项目与采购公告混合在同一条流水线中处理
+    - LLM 请求速率由令牌桶限制（替代原先每条 sleep），只在实际发出请求前取令牌
+    - use_rules 时清洗后先按公告模板解析（见 field_extractor）：招标人、代理机构、递交截止时间写入 extractedFields，
+      解析出采购内容即直接写入 prjContent，不进入 LLM 队列
+    - 传入 cache 时按清洗后正文哈希查缓存，命中则不请求 LLM（job.refresh 时跳过查询并覆盖缓存）
+    - 传入 failed 时记录未抽取到内容的缓存键，有效期内（EXTRACT_FAILURE_TTL_DAYS）不再请求 LLM
+    - 单条清洗/抽取出错只记为失败，不中断所在线程（否则有界队列写满后整条流水线会卡死）
+    - 模型接口不可用（熔断、限流重试用尽）时停止 LLM 抽取：其余记录不再请求（仍可命中缓存），留待下次运行，
+      不写入失败记录
+    结束时打印各来源的条数与免调用 LLM 的比例；返回 kind -> (待处理数, 已更新数)。
+    """
+    fetch_q: "queue.Queue[Any]" = queue.Queue()
+    clean_q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+    llm_q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+    limiter = TokenBucket(llm_rate)
+    stats: Dict[str, List[int]] = {}
+    source_counts: Dict[str, int] = {"规则": 0, "缓存": 0, "近期失败": 0, "LLM": 0}
+    failures: Dict[str, int] = {"清洗": 0, "抽取": 0, "接口不可用": 0}
+    unavailable = threading.Event()
+    stats_lock = threading.Lock()
+
+    for job in jobs:
+        stats.setdefault(job.kind, [0, 0])[0] += 1
+        fetch_q.put(job)
+    fetch_workers = max(1, fetch_workers)
+    clean_workers = max(1, clean_workers)
+    llm_workers = max(1, llm_workers)
+    for _ in range(fetch_workers):
+        fetch_q.put(_STOP)
+
+    def fetch_stage() -> None:
+        while True:
+            job = fetch_q.get()
+            if job is _STOP:
+                return
+            print(f"[{job.kind}] 抓取(接口): {job.title} -> {job.key}")
+            try:
+                raw = job.fetch(job.key) if job.key else None
+            except Exception as e:
+                print(f"[WARN][{job.kind}] 抓取异常: {e}")
+                raw = None
+            clean_q.put((job, raw))
+
+    def clean_one(job: ExtractJob, raw: Optional[str]) -> None:
+        text = html_to_text(raw) if raw else None
+        if not text and job.fallback:
+            print(f"[{job.kind}] 接口抓取失败，尝试从本地正文（bulletinContent/contentUrl）提取")
+            html = job.fallback()
             text = html_to_text(html) if isinstance(html, str) else None
-            if not text:
-                print("[BULLETIN] 无可用正文，跳过")
-                continue
-        print(f"[DEBUG][BULLETIN] 正文预览: {text[:500]}")
-        # 使用 LLM 对正文进行“项目采购内容”提炼
-        content = extractor.extract(text, title=title)
+        if not text:
+            print(f"[{job.kind}] 无可用正文，跳过: {job.title}")
+            return
+        content = None
+        if use_rules:
+            fields = extract_fields(text)
+            parsed = record_fields(fields)
+            if parsed:
+                job.item["extractedFields"] = parsed
+            content = build_prj_content(fields, title=job.title)
+        if content:
+            job.item["prjContent"] = content
+            with stats_lock:
+                stats[job.kind][1] += 1
+                source_counts["规则"] += 1
+            print(f"[{job.kind}] 模板规则抽取，已更新 prjContent: {content}")
+            return
+        llm_q.put((job, text))
+
+    def llm_one(job: ExtractJob, text: str) -> None:
+        print(f"[DEBUG][{job.kind}] 正文预览: {text[:500]}")
+        use_cache = not job.refresh and (cache is not None or failed is not None)
+        ck = extract_cache_key(text, job.title, extractor.model) if cache is not None or failed is not None else None
+        content = cache.get(ck) if use_cache and cache is not None else None
         if content:
-            item["prjContent"] = content
-            updated += 1
-            print(f"[BULLETIN] 已更新 prjContent(LLM): {content}")
+            source = "缓存"
+            print(f"[{job.kind}] 命中抽取缓存: {job.title}")
+        elif use_cache and failed is not None and failed.get(ck):
+            source = "近期失败"
+            print(f"[{job.kind}] 近期抽取失败，跳过 LLM: {job.title}")
         else:
-            print("[BULLETIN] 未能从正文抽取到有效内容")
-        time.sleep(rate_sleep)
-    # 保存
-    save_json(data, path)
-    return (total, updated)
+            stopped = unavailable.is_set()
+            if not stopped:
+                try:
+                    content = extractor.extract(text, title=job.title, limiter=limiter)
+                except Exception as e:
+                    if not llm_unavailable(e):
+                        raise
+                    stopped = True
+                    with stats_lock:
+                        first = not unavailable.is_set()
+                        unavailable.set()
+                    if first:
+                        print(f"[ERROR] 模型接口不可用（{type(e).__name__}: {e}），停止本次 LLM 抽取，其余记录下次运行重试")
+            if stopped:
+                with stats_lock:
+                    failures["接口不可用"] += 1
+                return
+            source = "LLM"
+            if content and cache is not None:
+                cache.set(ck, content)
+            elif not content and failed is not None:
+                failed.set(ck, "1")
+        with stats_lock:
+            source_counts[source] += 1
+            if content:
+                stats[job.kind][1] += 1
+        if content:
+            job.item["prjContent"] = content
+            print(f"[{job.kind}] 已更新 prjContent: {content}")
+        else:
+            print(f"[{job.kind}] 未能从正文抽取到有效内容: {job.title}")
+
+    def worker(q: "queue.Queue[Any]", handle: Callable[..., None], stage: str) -> Callable[[], None]:
+        """单条处理出错（读取本地正文、规则解析、缓存读写、模型调用等）只记为失败并继续，
+        保证线程持续消费队列直到收到结束标记，上游不会因队列写满而永久阻塞"""
+        def run() -> None:
+            while True:
+                entry = q.get()
+                if entry is _STOP:
+                    return
+                job = entry[0]
+                try:
+                    handle(*entry)
+                except Exception as e:
+                    with stats_lock:
+                        failures[stage] += 1
+                    print(f"[ERROR][{job.kind}] {stage}失败，跳过: {job.title}（{type(e).__name__}: {e}）")
+        return run
+
+    def start(target: Callable[[], None], count: int) -> List[threading.Thread]:
+        threads = [threading.Thread(target=target, daemon=True) for _ in range(count)]
+        for t in threads:
+            t.start()
+        return threads
+
+    fetchers = start(fetch_stage, fetch_workers)
+    cleaners = start(worker(clean_q, clean_one, "清洗"), clean_workers)
+    llms = start(worker(llm_q, llm_one, "抽取"), llm_workers)
+    # 逐级关闭：上游全部结束后，向下游投放与线程数相同的结束标记
+    for t in fetchers:
+        t.join()
+    for _ in cleaners:
+        clean_q.put(_STOP)
+    for t in cleaners:
+        t.join()
+    for _ in llms:
+        llm_q.put(_STOP)
+    for t in llms:
+        t.join()
+    # 免调用 LLM 比例 = (规则 + 缓存 + 近期失败) / 进入抽取的条数（无可用正文而跳过的不计）
+    attempted = sum(source_counts.values())
+    avoided = attempted - source_counts["LLM"]
+    summary = "，".join(f"{source} {count}" for source, count in source_counts.items())
+    for source, count in source_counts.items():
+        metrics.count("extract_sources", count, source=source)
+    rate = f"{avoided / attempted:.1%}" if attempted else "-"
+    print(f"[SUMMARY] 抽取来源：{summary}；免调用 LLM 比例：{rate}（{avoided}/{attempted}）")
+    if any(failures.values()):
+        for stage, count in failures.items():
+            metrics.count("extract_failures", count, stage=stage)
+        print("[SUMMARY] 处理失败：" + "，".join(f"{stage} {count}" for stage, count in failures.items()))
+    return {kind: (total, updated) for kind, (total, updated) in stats.items()}
+
+
+def extract_records(extractor: LLMExtractor, openings: Any, bulletins: Any, refresh_ids: Optional[Set[str]] = None,
+                    use_cache: bool = True) -> Dict[str, Tuple[int, int]]:
+    """对内存中的开标项目（{"projects": [...]}）与采购公告（列表）抽取 prjContent，结果就地写入；返回各类的统计"""
+    jobs = collect_opening_jobs(openings, refresh_ids) + collect_bulletin_jobs(bulletins, refresh_ids)
+    print(f"[INFO] 待抽取: {len(jobs)} 条，抓取并发: {FETCH_CONCURRENCY}，清洗线程: {CLEAN_WORKERS}，"
+          f"LLM 并发: {LLM_CONCURRENCY}，LLM 限速: {LLM_RATE}/s")
+    cache = open_extract_cache() if use_cache else None
+    failed = open_failure_cache() if use_cache else None
+    try:
+        stats = run_extract_pipeline(extractor, jobs, cache=cache, failed=failed)
+        if cache is not None:
+            evicted = cache.evict()
+            print(f"[SUMMARY] 抽取缓存：{cache.stats()}，淘汰 {evicted} 条")
+        if failed is not None:
+            evicted = failed.evict()
+            print(f"[SUMMARY] 抽取失败记录：{failed.stats()}，淘汰 {evicted} 条")
+    finally:
+        for c in (cache, failed):
+            if c is not None:
+                c.close()
+
+    o_total, o_updated = stats.get("OPENING", (0, 0))
+    print(f"[SUMMARY] 开标项目待处理: {o_total}，已更新: {o_updated}")
+    b_total, b_updated = stats.get("BULLETIN", (0, 0))
+    print(f"[SUMMARY] 采购公告待处理: {b_total}，已更新: {b_updated}")
+    return stats
 
 
 def main():
+    parser = argparse.ArgumentParser(description="抽取信息化项目的“项目采购内容”到 prjContent")
+    parser.add_argument("--openings", default="opening_projects.json", help="开标项目 JSON 路径")
+    parser.add_argument("--bulletins", default="purchase_bulletins.json", help="采购公告 JSON 路径")
+    parser.add_argument("--refresh", nargs="+", default=[], metavar="BULLETIN_ID",
+                        help="强制重新抽取的 bulletinId（忽略已有 prjContent、缓存与失败记录）")
+    parser.add_argument("--no-cache", action="store_true", help="不使用抽取结果缓存")
+    args = parser.parse_args()
+
     # 初始化 LLM 提取器
     try:
         extractor = LLMExtractor()
@@ -393,13 +657,17 @@ def main():
         print(f"[ERROR] 模型初始化失败：{e}")
         return
 
-    # 处理 opening_projects.json
-    o_total, o_updated = process_opening_projects(extractor)
-    print(f"[SUMMARY] 开标项目待处理: {o_total}，已更新: {o_updated}")
-
-    # 处理 purchase_bulletins.json
-    b_total, b_updated = process_purchase_bulletins(extractor)
-    print(f"[SUMMARY] 采购公告待处理: {b_total}，已更新: {b_updated}")
+    openings = read_opening_projects(args.openings)
+    bulletins = read_purchase_bulletins(args.bulletins)
+    extract_records(extractor, openings, bulletins, {str(i) for i in args.refresh}, use_cache=not args.no_cache)
+
+    # 保存：写入归档库并重新导出 JSON
+    if isinstance(openings, dict):
+        save_openings(openings, args.openings)
+        print(f"[INFO] 已保存: {args.openings}")
+    if isinstance(bulletins, list):
+        save_bulletins(bulletins, args.bulletins)
+        print(f"[INFO] 已保存: {args.bulletins}")
 
 
 if __name__ == "__main__":
@@ -1,63 +1,150 @@
-import requests
+import hashlib
 import json
 import os
 from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
 
-
-def fetch_opening_projects():
-    url = "https://ygcg.nbcqjy.org/api/Portal/GetOpenList"
-
-    # 构造请求参数
-    payload = "{\"pageIndex\": 1,\"pageSize\": 200}"
+from date_normalize import BEIJING_TZ, parse_kb_datetime
+from http_client import PORTAL_BASE_URL, request
+from record_store import OPENING_HASH_FIELDS, OPENING_KEYS, count_status, merge_records
+from storage import export_openings, open_archive
+
+OPEN_LIST_URL = f"{PORTAL_BASE_URL}/api/Portal/GetOpenList"
+# 分页与窗口配置：
+# - OPENING_PAGE_SIZE：每页条数
+# - OPENING_MAX_PAGES：单次运行最多抓取的页数（安全上限）
+# - OPENING_DAYS_AHEAD：保留今天起未来 N 天内开标的项目（默认 1，即今天与明天）
+PAGE_SIZE = int(os.getenv("OPENING_PAGE_SIZE", "50"))
+MAX_PAGES = int(os.getenv("OPENING_MAX_PAGES", "20"))
+DAYS_AHEAD = int(os.getenv("OPENING_DAYS_AHEAD", "1"))
+# 条件刷新状态（当日列表内容摘要、ETag 等）存放位置，与公告抓取共用
+STATE_PATH = os.getenv("FETCH_STATE_PATH", os.path.join(".cache", "fetch_state.json"))
+
+
+def fetch_open_page(page_index, page_size=PAGE_SIZE, conditional_headers=None):
+    """抓取 GetOpenList 单页，返回 (响应对象, 项目列表)；命中条件请求（304）时项目列表为 None"""
+    payload = json.dumps({"pageIndex": page_index, "pageSize": page_size})
     headers = {
         'Content-Type': 'application/json;charset-utf-8'
     }
-
-    # 发送POST请求
-    response = requests.post(url, headers=headers, data=payload)
+    if conditional_headers:
+        headers.update(conditional_headers)
+    response = request("POST", OPEN_LIST_URL, endpoint="GetOpenList", headers=headers, data=payload)
+    if response.status_code == 304:
+        return response, None
+    response.raise_for_status()
     response_data = response.json()
+    return response, response_data["body"]["data"]["projectList"] or []
+
+
+def build_project(project, dt):
+    return {
+        "kbDate": dt.strftime("%Y-%m-%d"),
+        "prjName": project["prjName"],
+        "bulletinId": project["bulletinId"],
+        "prjId": project.get("prjId"),
+        "prjNo": project.get("prjNo"),
+        "prjUrl": (
+            f"https://ygcg.nbcqjy.org/detail?type=1&prjId={project.get('prjId')}" if project.get("prjId")
+            else f"https://ygcg.nbcqjy.org/detail?bulletinId={project.get('bulletinId')}"
+        ),
+        # 分类前留空：分类失败的记录下次运行仍会重新分类（见 classify_projects.should_classify）
+        "prjType": None,
+        "prjContent": None
+    }
+
+
+def update_digest(digest, project_list):
+    """把一页内容计入列表摘要：窗口内所有页的摘要不变时，同一天内重复运行沿用已有数据"""
+    raw = json.dumps(project_list, ensure_ascii=False, sort_keys=True)
+    digest.update(raw.encode("utf-8"))
+
+
+def load_state(path=STATE_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            return data if isinstance(data, dict) else {}
+    except (FileNotFoundError, ValueError):
+        return {}
 
-    # 使用北京时区计算今天与未来一天的日期
-    beijing_tz = ZoneInfo("Asia/Shanghai")
-    beijing_now = datetime.now(beijing_tz)
+
+def fetch_opening_projects(days_ahead=DAYS_AHEAD, page_size=PAGE_SIZE, max_pages=MAX_PAGES, previous=None):
+    """分页抓取开标列表，保留 [今天, 今天+days_ahead] 内开标的项目。
+
+    - 根据首页的开标时间先后判断列表排序方向，越过窗口边界后提前停止翻页
+    - previous 为上次运行的状态（{"date", "daysAhead", "digest", "etag", "lastModified"}）：
+      同一天、同一窗口重复运行时，先发送条件请求，返回 304 则不再翻页；否则照常翻页，
+      窗口内各页内容的摘要与上次一致时返回 None，表示沿用已有数据（不再合并写库）
+    返回 (数据, 新状态)。
+    """
+    beijing_now = datetime.now(BEIJING_TZ)
     today = beijing_now.date()
-    future_date = today + timedelta(days=1)
+    future_date = today + timedelta(days=days_ahead)
+    today_str = today.strftime("%Y-%m-%d")
+
+    same_window = bool(previous) and previous.get("date") == today_str and previous.get("daysAhead") == days_ahead
+    conditional_headers = {}
+    if same_window:
+        if previous.get("etag"):
+            conditional_headers["If-None-Match"] = previous["etag"]
+        if previous.get("lastModified"):
+            conditional_headers["If-Modified-Since"] = previous["lastModified"]
+
+    response, first = fetch_open_page(1, page_size, conditional_headers)
+    if first is None:
+        print("首页未变化（HTTP 304），沿用已有数据")
+        return None, previous
+    state = {
+        "date": today_str,
+        "daysAhead": days_ahead,
+        "etag": response.headers.get("ETag"),
+        "lastModified": response.headers.get("Last-Modified"),
+    }
+    digest = hashlib.sha1()
+
+    # 判断排序方向：首页首尾开标时间比较
+    ascending = True
+    if len(first) >= 2:
+        try:
+            ascending = parse_kb_datetime(first[0]["kbDate"]) <= parse_kb_datetime(first[-1]["kbDate"])
+        except Exception:
+            pass
 
-    # 提取符合条件的项目
     filtered_projects = []
-    for project in response_data["body"]["data"]["projectList"]:
-        # 解析开标时间：若无时区则按北京时区解释；若有时区则转换到北京时区
-        kb_raw = project["kbDate"]
-        dt = datetime.fromisoformat(kb_raw)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=beijing_tz)
-        else:
-            dt = dt.astimezone(beijing_tz)
-        kb_date = dt.date()
-        if today <= kb_date <= future_date:
-            filtered_projects.append({
-                "kbDate": dt.strftime("%Y-%m-%d"),
-                "prjName": project["prjName"],
-                "bulletinId": project["bulletinId"],
-                "prjId": project.get("prjId"),
-                "prjNo": project.get("prjNo"),
-                "prjUrl": (
-                    f"https://ygcg.nbcqjy.org/detail?type=1&prjId={project.get('prjId')}" if project.get("prjId")
-                    else f"https://ygcg.nbcqjy.org/detail?bulletinId={project.get('bulletinId')}"
-                ),
-                "prjType": "其他项目",
-                "prjContent": None
-            })
+    page, page_index = first, 1
+    while True:
+        print(f"已抓取第 {page_index} 页，{len(page)} 条")
+        update_digest(digest, page)
+        passed_window = False
+        for project in page:
+            dt = parse_kb_datetime(project["kbDate"])
+            kb_date = dt.date()
+            if today <= kb_date <= future_date:
+                filtered_projects.append(build_project(project, dt))
+            elif (ascending and kb_date > future_date) or (not ascending and kb_date < today):
+                passed_window = True
+        if passed_window or len(page) < page_size:
+            break
+        if page_index >= max_pages:
+            print(f"[WARN] 已达最大页数 {max_pages}，可能仍有未抓取的项目")
+            break
+        page_index += 1
+        _, page = fetch_open_page(page_index, page_size)
+
+    state["digest"] = digest.hexdigest()
+    if same_window and previous.get("digest") == state["digest"]:
+        print("列表内容与今日上次运行一致，沿用已有数据")
+        return None, state
 
     # 按开标日期升序排序
     filtered_projects.sort(key=lambda x: x["kbDate"])
 
-    return {
-        "today": today.strftime("%Y-%m-%d"),
+    data = {
+        "today": today_str,
         "future_date": future_date.strftime("%Y-%m-%d"),
         "projects": filtered_projects
     }
+    return data, state
 
 
 def save_to_json(data, savepath="opening_projects.json"):
@@ -71,14 +158,45 @@ def save_to_json(data, savepath="opening_projects.json"):
         json.dump(data, file, ensure_ascii=False, indent=4)
 
 
-def main():
-    # 获取数据
-    data = fetch_opening_projects()
+def previous_state(archive, state):
+    """上次运行的条件刷新状态；已有导出窗口时才允许沿用，避免数据丢失后因状态未变而不再抓取"""
+    has_existing = archive.get_meta("openings_window") is not None
+    return state.get("openings") if has_existing else None
 
-    # 保存到JSON文件
-    save_to_json(data)
 
-    print(f"数据已保存到 opening_projects.json")
+def store_openings(archive, data, output="opening_projects.json"):
+    """将抓取结果与库中尚未开标的项目合并后写入归档库，返回当前窗口的数据。
+
+    data 为 None（列表未变化）时直接按已有窗口读取；output 为 None 时只返回数据，不导出 JSON。
+    """
+    if data is not None:
+        # 同一项目名称未变化时保留已有的分类与抽取结果
+        existing = archive.query_openings(kb_from=data["today"])
+        data["projects"] = merge_records(data["projects"], existing,
+                                         OPENING_KEYS, OPENING_HASH_FIELDS, keep_missing=False)
+        counts = count_status(data["projects"])
+        print(f"新增 {counts['new']} 个，变化 {counts['changed']} 个，未变化 {counts['unchanged']} 个")
+        archive.upsert_openings(data["projects"])
+        archive.set_meta("openings_window", {"today": data["today"], "future_date": data["future_date"]})
+    return export_openings(archive, output)
+
+
+def main():
+    output = "opening_projects.json"
+    state = load_state()
+    archive = open_archive()
+    try:
+        # 获取数据
+        data, new_state = fetch_opening_projects(previous=previous_state(archive, state))
+        # 写入归档库，并按窗口导出 JSON 文件
+        data = store_openings(archive, data, output)
+        # 写库成功后才保存状态：写库失败时下次运行不会因状态未变而跳过刷新
+        state["openings"] = new_state
+        save_to_json(state, STATE_PATH)
+        print(f"数据已保存到 {archive.path}，并导出到 {output}")
+    finally:
+        archive.close()
+
     print(f"今日日期: {data['today']}")
     print(f"未来日期: {data['future_date']}")
     print(f"找到 {len(data['projects'])} 个项目")
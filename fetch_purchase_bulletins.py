@@ -1,170 +1,281 @@
 import os
 import json
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import re
 from zoneinfo import ZoneInfo
 
-def fetch_purchase_bulletins():
-    url = "https://ygcg.nbcqjy.org/api/Portal/GetBulletinList"
-    # 按用户提供的构造方式使用字符串作为请求体
-    payload = "{\"pageIndex\": 1,\"pageSize\": 100,\"classID\": \"21\"}"
+import metrics
+from date_normalize import parse_date_to_ymd
+from http_client import DEFAULT_TIMEOUT, PORTAL_BASE_URL, get_session
+from json_stream import iter_array_items, scan_fields
+from resilience import call, host_of
+from record_schema import BULLETIN_ITEM_PATHS, BulletinNormalizer, locate_items
+from record_store import BULLETIN_HASH_FIELDS, BULLETIN_KEYS, count_status, merge_records
+from storage import export_bulletins, open_archive
+
+BULLETIN_LIST_URL = f"{PORTAL_BASE_URL}/api/Portal/GetBulletinList"
+CLASS_ID = "21"
+CLASS_NAME = "采购公告"
+
+
+def parse_classes(spec):
+    """解析 "classID:类别名,..."（类别名可省略，默认用 classID），返回 [(classID, 类别名)]"""
+    classes = []
+    for part in (spec or "").split(","):
+        class_id, _, name = part.strip().partition(":")
+        class_id = class_id.strip()
+        if class_id and class_id not in dict(classes):
+            classes.append((class_id, name.strip() or class_id))
+    return classes or [(CLASS_ID, CLASS_NAME)]
+
+
+# 抓取的公告类别（变更公告、结果公告、意向公开等），各类别并发抓取
+BULLETIN_CLASSES = parse_classes(os.getenv("BULLETIN_CLASS_IDS", f"{CLASS_ID}:{CLASS_NAME}"))
+# 分页配置：
+# - BULLETIN_PAGE_SIZE：每页条数
+# - BULLETIN_PAGE_CONCURRENCY：首页之后每轮并发抓取的页数
+# - BULLETIN_MAX_PAGES：单次运行最多抓取的页数（安全上限）
+PAGE_SIZE = int(os.getenv("BULLETIN_PAGE_SIZE", "30"))
+PAGE_CONCURRENCY = int(os.getenv("BULLETIN_PAGE_CONCURRENCY", "3"))
+MAX_PAGES = int(os.getenv("BULLETIN_MAX_PAGES", "20"))
+# 导出窗口：发布日期在 [今天-WINDOW_DAYS, 今天) 内的公告
+WINDOW_DAYS = 3
+# 增量抓取高水位（上次已保存的最新公告）存放位置
+STATE_PATH = os.getenv("FETCH_STATE_PATH", os.path.join(".cache", "fetch_state.json"))
+
+
+# GetBulletinList 响应中公告数组可能出现的位置（见 record_schema）
+ITEM_PATHS = BULLETIN_ITEM_PATHS
+# 取值计划按原始记录结构缓存，各页（含并发抓取的页）共用
+NORMALIZER = BulletinNormalizer()
+PUBLISH_DATE_KEYS = ("publishDate", "fbDate", "pubDate")
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def stream_bulletin_page(page_index, page_size=PAGE_SIZE, class_id=CLASS_ID, start=None, stats=None):
+    """流式抓取 GetBulletinList 的单页，逐条产出原始公告（dict）。
+
+    响应按块解析，每次只完整解码一条公告；给定 start（YYYY-MM-DD）时，
+    发布日期早于 start 的公告只解码日期字段即丢弃，其正文 HTML 不会被解码。
+    stats（dict）会被写入本页原始条数 total 与是否出现窗口外公告 older。
+    本函数不重试，由 _fetch_page_records 按页整体重试。
+    """
+    payload = json.dumps({"pageIndex": page_index, "pageSize": page_size, "classID": class_id})
     headers = {
         'Content-Type': 'application/json;charset-utf-8'
     }
+    stats = stats if stats is not None else {}
+    stats["total"] = 0
+    stats["older"] = False
+    with get_session().post(BULLETIN_LIST_URL, headers=headers, data=payload, timeout=DEFAULT_TIMEOUT, stream=True) as resp:
+        resp.raise_for_status()
+        resp.encoding = resp.encoding or "utf-8"
+        chunks = resp.iter_content(chunk_size=STREAM_CHUNK_SIZE, decode_unicode=True)
+        for raw in iter_array_items(chunks, ITEM_PATHS):
+            stats["total"] += 1
+            if start:
+                fields = scan_fields(raw, PUBLISH_DATE_KEYS)
+                pd = parse_date_to_ymd(next((fields[k] for k in PUBLISH_DATE_KEYS if fields.get(k)), None))
+                if pd and pd < start:
+                    stats["older"] = True
+                    continue
+            yield json.loads(raw)
+
 
-    resp = requests.post(url, headers=headers, data=payload, timeout=30)
-    resp.raise_for_status()
-    return resp.json()
+def load_state(path=STATE_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            return data if isinstance(data, dict) else {}
+    except (FileNotFoundError, ValueError):
+        return {}
 
 
-def save_json(content, savepath="purchase_bulletins.json"):
-    save_dir = os.path.dirname(savepath)
+def save_state(state, path=STATE_PATH):
+    save_dir = os.path.dirname(path)
     if save_dir and not os.path.exists(save_dir):
         os.makedirs(save_dir)
-    with open(savepath, "w", encoding="utf-8") as f:
-        json.dump(content, f, ensure_ascii=False, indent=2)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+def _page_should_stop(records, start, high_water):
+    """判断本页之后是否还需继续翻页（列表按发布时间倒序返回）。
+
+    - 本页出现早于窗口起点的公告：更早的页都在窗口外
+    - 本页包含上次保存的最新公告，或出现早于其发布日期的公告：之后的页上次已抓取
+    """
+    hw_id = (high_water or {}).get("bulletinId")
+    hw_date = (high_water or {}).get("publishDate")
+    for r in records:
+        pd = r.get("publishDate")
+        if pd and pd < start:
+            return True
+        if hw_id and r.get("bulletinId") == hw_id:
+            return True
+        if hw_date and pd and pd < hw_date:
+            return True
+    return False
+
+
+def _fetch_page_records(page_index, page_size, class_id, start):
+    """流式抓取并清洗一页，返回 (窗口内公告列表, 本页原始条数, 是否出现窗口外公告)。
+
+    响应读到一半断开等可重试的失败按页整体重试（见 resilience）；重试用尽仍失败则抛出，
+    避免只保存部分页面后高水位前移、漏掉中间的公告。
+    """
+    def fetch():
+        stats = {}
+        records = list(process_bulletins(stream_bulletin_page(page_index, page_size, class_id, start, stats)))
+        return records, stats["total"], stats["older"]
+
+    return call(host_of(BULLETIN_LIST_URL), metrics.instrument("GetBulletinList", fetch))
+
+
+def fetch_purchase_bulletins(days=3, page_size=PAGE_SIZE, class_id=CLASS_ID, high_water=None,
+                             concurrency=PAGE_CONCURRENCY, max_pages=MAX_PAGES, category=None):
+    """分页抓取一个类别的公告并清洗，直到发布日期早于窗口起点或到达上次的高水位。
+
+    首页单独请求；之后每轮并发请求 concurrency 页，任一页满足停止条件或不足一页即结束。
+    各页以流式解析，发布日期早于窗口起点的公告在解码正文前即被丢弃。
+    返回清洗后的窗口内公告列表（按接口返回顺序），每条带 classId 与 category（类别名，未配置时用 classId）。
+    """
+    category = category or dict(BULLETIN_CLASSES).get(class_id) or (CLASS_NAME if class_id == CLASS_ID else class_id)
+    label = f"[{category}] " if class_id != CLASS_ID else ""
+    today = datetime.now(ZoneInfo("Asia/Shanghai")).date()
+    start = (today - timedelta(days=days)).strftime("%Y-%m-%d")
+
+    first, total, older = _fetch_page_records(1, page_size, class_id, start)
+    pages = [first]
+    print(f"{label}已抓取第 1 页，{total} 条（窗口内 {len(first)} 条）")
+    done = older or total < page_size or _page_should_stop(first, start, high_water)
+    next_page = 2
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        while not done and next_page <= max_pages:
+            indexes = list(range(next_page, min(next_page + concurrency, max_pages + 1)))
+            results = list(pool.map(lambda i: _fetch_page_records(i, page_size, class_id, start), indexes))
+            next_page = indexes[-1] + 1
+            for index, (records, total, older) in zip(indexes, results):
+                pages.append(records)
+                print(f"{label}已抓取第 {index} 页，{total} 条（窗口内 {len(records)} 条）")
+                if older or total < page_size or _page_should_stop(records, start, high_water):
+                    done = True
+                    break
+    if not done:
+        print(f"[WARN] {label}已达最大页数 {max_pages}，可能仍有未抓取的公告")
+    # 翻页期间各页以紧凑的 Bulletin 保存，合并入库前再转为 dict
+    fetched = []
+    for records in pages:
+        for r in records:
+            record = r.to_dict()
+            record["classId"] = class_id
+            record["category"] = category
+            fetched.append(record)
+    return fetched
+
+
+def fetch_bulletin_classes(days=3, high_waters=None, classes=None, **kwargs):
+    """并发抓取多个类别的公告，按 classes 的顺序拼接返回。
+
+    各类别的翻页各自进行，请求共用 http_client 的连接池，并经 resilience 的按主机并发上限
+    （HOST_CONCURRENCY）排队，总耗时接近最慢的一个类别而不是各类别之和。
+    high_waters 为 {classID: 高水位}；任一类别失败时抛出，不保存部分结果。
+    """
+    classes = classes or BULLETIN_CLASSES
+    high_waters = high_waters or {}
+    if len(classes) == 1:
+        class_id, name = classes[0]
+        return fetch_purchase_bulletins(days=days, class_id=class_id, high_water=high_waters.get(class_id),
+                                        category=name, **kwargs)
+    with ThreadPoolExecutor(max_workers=len(classes)) as pool:
+        futures = [
+            pool.submit(fetch_purchase_bulletins, days=days, class_id=class_id,
+                        high_water=high_waters.get(class_id), category=name, **kwargs)
+            for class_id, name in classes
+        ]
+        results = [f.result() for f in futures]
+    for (class_id, name), records in zip(classes, results):
+        print(f"[INFO] {name}（classID {class_id}）：{len(records)} 条")
+    return [r for records in results for r in records]
+
+
+def merge_bulletins(fetched, existing):
+    """按 bulletinId 增量合并（见 record_store.merge_records），未重新抓取的旧记录保留"""
+    merged = merge_records(fetched, existing, BULLETIN_KEYS, BULLETIN_HASH_FIELDS, keep_missing=True)
+    # 按发布日期倒序（同日保持原有先后）
+    return sorted(merged, key=lambda b: b.get("publishDate") or "", reverse=True)
+
 
 def extract_items(data):
     """从原始返回中尽量稳妥地取出公告列表数组。"""
-    if isinstance(data, dict):
-        body = data.get("body") or {}
-        inner = body.get("data") if isinstance(body, dict) else {}
-        if isinstance(inner, dict):
-            for key in ["list", "bulletinList", "items", "rows", "data"]:
-                items = inner.get(key)
-                if isinstance(items, list):
-                    return items
-        # 有些接口直接在 body 下给 list
-        for key in ["list", "bulletinList", "items", "rows"]:
-            items = body.get(key) if isinstance(body, dict) else None
-            if isinstance(items, list):
-                return items
-    return []
-
-def parse_date_to_ymd(value):
-    """将日期字符串解析为 YYYY-MM-DD 格式。失败则返回 None。"""
-    if not value:
-        return None
-    # 常见格式尝试：ISO、yyyy-mm-dd、yyyy/mm/dd、带时间
-    try:
-        # 兼容 '2025-09-01'、'2025-09-01 12:34:56'
-        # 先仅取前10位尝试
-        core = str(value)[:10]
-        dt = datetime.fromisoformat(core)
-        return dt.strftime("%Y-%m-%d")
-    except Exception:
-        pass
-    # 使用正则抓取年月日
-    m = re.search(r"(?:^|[^\d])(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?:[^\d]|$)", str(value))
-    if m:
-        try:
-            year, month, day = int(m.group(1)), int(m.group(2)), int(m.group(3))
-            return f"{year:04d}-{month:02d}-{day:02d}"
-        except Exception:
-            return None
-    return None
-
-def parse_to_iso_datetime(value):
-    """将输入解析为标准的 YYYY-MM-DDTHH:MM:SS 字符串。
-    - 允许分隔符为 '-' 或 '/'
-    - 允许时间用空格或 'T' 连接
-    - 若缺少分或秒，自动补零
-    """
-    if not value:
-        return None
-    s = str(value).strip()
-    # 先尝试用正则拆解
-    m = re.search(r"(\d{4})[/-](\d{1,2})[/-](\d{1,2})(?:[ T](\d{1,2})(?::(\d{1,2}))?(?::(\d{1,2}))?)?", s)
-    if m:
-        try:
-            y = int(m.group(1))
-            mo = int(m.group(2))
-            d = int(m.group(3))
-            hh = int(m.group(4)) if m.group(4) is not None else 0
-            mm_ = int(m.group(5)) if m.group(5) is not None else 0
-            ss = int(m.group(6)) if m.group(6) is not None else 0
-            return f"{y:04d}-{mo:02d}-{d:02d}T{hh:02d}:{mm_:02d}:{ss:02d}"
-        except Exception:
-            pass
-    # 回退：归一化分隔符后尝试 fromisoformat
-    try:
-        normalized = s.replace('/', '-').replace(' ', 'T')
-        dt = datetime.fromisoformat(normalized)
-        return dt.strftime("%Y-%m-%dT%H:%M:%S")
-    except Exception:
-        return None
+    return locate_items(data, ITEM_PATHS)
 
 def process_bulletins(raw_data):
-    """将原始公告数据清洗为需要的字段结构。"""
-    items = extract_items(raw_data)
-    processed = []
-    for it in items:
-        if not isinstance(it, dict):
-            continue
-        prj_type_id = it.get("prjTypeId") or it.get("projectTypeId") or it.get("typeId")
-        publish_date_raw = it.get("publishDate") or it.get("fbDate") or it.get("pubDate")
-        publish_date_ymd = parse_date_to_ymd(publish_date_raw)
-        # 提取 autoId 作为 bulletinId（若无则回退 id），并尽量规范为字符串
-        raw_bid = it.get("autoId") if it.get("autoId") is not None else (it.get("id") if it.get("id") is not None else it.get("bulletinId"))
-        bulletin_id = str(raw_bid) if raw_bid is not None else None
-        prj_id = it.get("prjId") or it.get("projectId") or it.get("prjid") or it.get("PrjId")
-        # 根据需求：公告的 prjUrl 固定使用 bulletinId 的链接形式
-        prj_url = f"https://ygcg.nbcqjy.org/detail?bulletinId={bulletin_id}" if bulletin_id else None
-        processed.append({
-            "prjTypeId": prj_type_id,
-            "publishDate": publish_date_ymd,  # YYYY-MM-DD 格式
-            "bulletinTitle": it.get("bulletinTitle") or it.get("title") or "",
-            "bulletinContent": it.get("bulletinContent") or it.get("content") or "",
-            "endDate": parse_to_iso_datetime(it.get("endDate") or it.get("bjEndDate") or it.get("deadline")),
-            "prjNo": it.get("prjNo") or it.get("projectNo") or it.get("code"),
-            "kbDate": parse_to_iso_datetime(it.get("kbDate") or it.get("openDate") or it.get("bidOpenDate")),
-            "bulletinId": bulletin_id,
-            "prjId": prj_id,
-            "prjUrl": prj_url,
-            "prjType": "其他项目",
-            "prjContent": None
-        })
-    return processed
-
-def filter_recent_bulletins(items, days=3, exclude_today=True):
-    """按 publishDate 只保留最近 days 天内的数据。
-    - publishDate 需为 YYYY-MM-DD
-    - exclude_today=True 表示不包含今天，只取 [today-days, today) 区间
+    """逐条清洗公告（生成器），产出 record_schema.Bulletin。
+
+    raw_data 可以是接口原始返回（dict），也可以是原始公告的可迭代对象（如流式解析结果）；
+    每种记录结构只编译一次取值计划。
+    """
+    items = extract_items(raw_data) if isinstance(raw_data, dict) else raw_data
+    return NORMALIZER.normalize(items)
+
+
+def window_start(days=WINDOW_DAYS):
+    today = datetime.now(ZoneInfo("Asia/Shanghai")).date()
+    return (today - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def fetch_inputs(archive, state, days=WINDOW_DAYS):
+    """增量抓取的输入：库中窗口内已有的公告，以及各类别上次保存的高水位 {classID: 高水位}
+    （库中无窗口内公告时为空，即全量抓取；新增的类别没有高水位，同样全量抓取）"""
+    existing = archive.query_bulletins(publish_from=window_start(days))
+    high_waters = dict(state.get("bulletins", {})) if existing else {}
+    return existing, high_waters
+
+
+def store_bulletins(archive, fetched, existing, state, days=WINDOW_DAYS, output="purchase_bulletins.json"):
+    """合并抓取结果并写入归档库，更新 state 中的高水位，返回导出窗口内的公告。
+
+    全部公告（含今天）写入库，导出窗口为 [today-days, today)；output 为 None 时只返回数据，不导出 JSON。
     """
-    # 使用北京时区获取当前日期
     today = datetime.now(ZoneInfo("Asia/Shanghai")).date()
-    start = today - timedelta(days=days)
-    filtered = []
-    for b in items:
-        pd = b.get("publishDate")
-        if not pd:
-            continue
-        try:
-            d = datetime.strptime(pd, "%Y-%m-%d").date()
-        except Exception:
-            continue
-        if exclude_today:
-            if start <= d < today:
-                filtered.append(b)
-        else:
-            if start <= d <= today:
-                filtered.append(b)
+    merged = merge_bulletins(fetched, existing)
+    archive.upsert_bulletins(merged)
+    archive.set_meta("bulletins_window", {"from": window_start(days), "to": (today - timedelta(days=1)).strftime("%Y-%m-%d")})
+    filtered = export_bulletins(archive, output)
+    # 高水位按类别取本次抓取的第一条（即门户列表首页的第一条，门户顺序中最新的公告）：
+    # 抓取到的公告（含今天）都已写入库，下次翻到这一条即可停止。本次某类别未抓取到窗口内公告时沿用原高水位
+    high_waters = state.setdefault("bulletins", {})
+    seen = set()
+    for b in fetched:
+        class_id = b.get("classId") or CLASS_ID
+        if class_id not in seen:
+            seen.add(class_id)
+            high_waters[class_id] = {"bulletinId": b.get("bulletinId"), "publishDate": b.get("publishDate")}
+    counts = count_status(filtered)
+    print(f"本次抓取 {len(fetched)} 条，合并后 {len(merged)} 条")
+    print(f"新增 {counts['new']} 条，变化 {counts['changed']} 条，未变化 {counts['unchanged']} 条")
     return filtered
 
 
 def main():
+    output = "purchase_bulletins.json"
+    archive = open_archive()
     try:
-        data = fetch_purchase_bulletins()
-        # 清洗、提取并保存到单一文件
-        processed = process_bulletins(data)
-        filtered = filter_recent_bulletins(processed, days=3, exclude_today=True)
-        save_json(filtered, "purchase_bulletins.json")
-        print(f"已保存采购公告（处理后），记录数：{len(filtered)}")
-        print("输出文件：purchase_bulletins.json")
+        # 增量抓取：库中已有窗口内的公告时，只翻到上次保存的最新公告为止，其余沿用库中记录；
+        # 内容未变化的公告保留已有的分类与抽取结果
+        state = load_state()
+        existing, high_waters = fetch_inputs(archive, state)
+        fetched = fetch_bulletin_classes(days=WINDOW_DAYS, high_waters=high_waters)
+        filtered = store_bulletins(archive, fetched, existing, state, output=output)
+        save_state(state)
+        print(f"已保存采购公告到 {archive.path}，导出记录数：{len(filtered)}")
+        print(f"输出文件：{output}")
     except Exception as e:
         print(f"抓取失败: {e}")
         raise
+    finally:
+        archive.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+"""
+基于模板的公告字段抽取（规则阶段）。
+
+多数公告套用同一类模板：“招标人为…”“招标代理机构：…”等句式，以及“标段号 | 服务内容 | 服务期限 | 最高限价”
+这类标段表格（html_to_text 输出为“ | ”分隔的行）。本模块按这些模板从清洗后的正文中解析出结构化字段：
+
+- tenderer / agency：招标人（采购人）、招标代理机构
+- budget：最高限价 / 控制价 / 预算金额（优先级依次降低）
+- lots：标段表格各行（标段号、内容、期限、限价）
+- scope：“招标范围 / 采购内容 / 项目内容”等字段行
+- service_period：服务期限 / 工期 / 交货期
+- deadline：投标（响应）文件递交截止时间，YYYY-MM-DDTHH:MM:SS
+
+build_prj_content 在解析出采购内容（标段表格或 scope）时拼出 prjContent，否则返回 None，由调用方回退到大模型抽取。
+采购内容须有实际信息（见 informative）：“本工程施工图范围内施工和保修”这类套话、只复述标题的 scope 不算，
+否则拼出的 prjContent 只剩工期、限价，不如交给大模型。
+record_fields 取出招标人、代理机构与递交截止时间，由抽取流程写入记录的 extractedFields（不论 prjContent 来自规则还是大模型）。
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# 写入记录 extractedFields 的字段
+RECORD_FIELDS = ("tenderer", "agency", "deadline")
+# prjContent 最大长度（与大模型抽取提示词的 80~200 字一致）
+MAX_CONTENT_CHARS = 200
+# scope 等自由文本字段的最小有效长度
+MIN_SCOPE_CHARS = 6
+# 采购内容去掉套话与标点后至少保留的字数
+MIN_INFO_CHARS = 4
+# 招标范围 / 标段内容中的套话，不携带项目本身的信息
+GENERIC_SCOPE_TERMS = [
+    "本工程", "本项目", "本标段", "本次", "招标文件", "招标", "施工图纸", "施工图", "设计图纸", "图纸",
+    "工程量清单", "清单", "范围内", "范围", "所含", "所有", "全部", "具体", "相关", "包括", "包含", "以及",
+    "施工", "保修", "维修", "缺陷责任期", "工程", "项目", "内容", "要求", "完成", "的", "等", "和", "及", "与",
+]
+
+_VALUE = r"\s*([^，,。；;\n]+)"
+# (字段, 正则)：同一字段按顺序尝试，取第一个命中
+_PARTY_PATTERNS: List[Tuple[str, "re.Pattern[str]"]] = [
+    ("tenderer", re.compile(r"(?:招标人|采购人)(?:名称)?\s*[：:]" + _VALUE)),
+    ("tenderer", re.compile(r"(?:招标人|采购人)为" + _VALUE)),
+    ("agency", re.compile(r"(?:招标代理机构|采购代理机构|招标代理人|代理机构|代理单位)(?:名称)?\s*[：:]" + _VALUE)),
+    ("agency", re.compile(r"(?:招标代理机构|采购代理机构|招标代理人|代理机构)为" + _VALUE)),
+]
+_AMOUNT = r"(\d[\d,]*(?:\.\d+)?\s*(?:亿元|万元|元))"
+# 金额标签按优先级排列：最高限价 > 控制价 > 预算
+BUDGET_LABELS = ["最高投标限价", "最高限价", "招标控制价", "采购控制价", "控制价", "采购预算", "预算金额", "预算"]
+_BUDGET_PATTERNS = [(label, re.compile(label + r"[^\d\n。；]{0,20}?" + _AMOUNT)) for label in BUDGET_LABELS]
+PERIOD_LABELS = ["服务合同期限", "服务期限", "服务期", "施工总工期", "施工工期", "计划工期", "工期", "交货期要求", "交货期"]
+_PERIOD_RE = re.compile(r"(" + "|".join(PERIOD_LABELS) + r")\s*[：:为]\s*([^。；;\n]+)")
+SCOPE_LABELS = ["招标范围", "采购内容", "项目内容", "建设内容", "服务内容", "采购需求"]
+_SCOPE_RE = re.compile(r"(?:" + "|".join(SCOPE_LABELS) + r")\s*[：:]\s*([^\n]+)")
+_DEADLINE_DATE_RE = re.compile(
+    r"(\d{4})\s*年\s*(\d{1,2})\s*月\s*(\d{1,2})\s*日\s*(?:(\d{1,2})\s*[时:：点]\s*(?:(\d{1,2})\s*分?)?)?"
+)
+# “具体详见招标文件第四章”之类的引用说明，拼 prjContent 时去掉
+_REFERENCE_RE = re.compile(r"[，,；;]?\s*[（(]?\s*(?:具体)?(?:详见|见)[^，,。；;）)]*[）)]?")
+_SPACE_RE = re.compile(r"\s+")
+_GENERIC_RE = re.compile("|".join(re.escape(t) for t in sorted(GENERIC_SCOPE_TERMS, key=len, reverse=True)))
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+# 标段表格列识别：(字段, 表头关键词)，按顺序取第一个命中的列
+LOT_COLUMNS = [
+    ("lot", ("标段", "标项", "包号", "分包", "序号")),
+    ("content", ("服务内容", "采购内容", "招标内容", "项目名称", "内容")),
+    ("period", ("期限", "工期", "服务期", "交货期")),
+    ("price", ("限价", "控制价", "预算", "金额")),
+]
+
+
+def _clean(value: str) -> str:
+    return _SPACE_RE.sub(" ", value).strip(" ：:，,。；;")
+
+
+def _drop_references(value: str) -> str:
+    """去掉“详见…”引用说明，只保留第一句"""
+    return _clean(_REFERENCE_RE.sub("", value).split("。", 1)[0])
+
+
+def _core(value: str) -> str:
+    return _NON_WORD_RE.sub("", _GENERIC_RE.sub("", value))
+
+
+def informative(value: str, title: Optional[str] = None) -> bool:
+    """采购内容是否有实际信息：去掉套话与标点后至少 MIN_INFO_CHARS 个字，且不只是复述标题"""
+    core = _core(value)
+    if len(core) < MIN_INFO_CHARS:
+        return False
+    return not title or core not in _core(title)
+
+
+def parse_lots(lines: List[str]) -> List[Dict[str, str]]:
+    """识别标段表格：表头含内容列且含期限或金额列，其后列数相同的行为各标段（专家名单等表格不会命中）"""
+    lots: List[Dict[str, str]] = []
+    i = 0
+    while i < len(lines):
+        if " | " not in lines[i]:
+            i += 1
+            continue
+        header = [c.strip() for c in lines[i].split(" | ")]
+        columns: Dict[str, int] = {}
+        for field, keywords in LOT_COLUMNS:
+            for idx, cell in enumerate(header):
+                if idx not in columns.values() and any(k in cell for k in keywords):
+                    columns[field] = idx
+                    break
+        i += 1
+        if "content" not in columns or not ({"period", "price"} & columns.keys()):
+            continue
+        while i < len(lines) and " | " in lines[i]:
+            cells = [c.strip() for c in lines[i].split(" | ")]
+            i += 1
+            if len(cells) != len(header):
+                break
+            lot = {field: cells[idx] for field, idx in columns.items() if cells[idx]}
+            if lot.get("content"):
+                if "price" in columns:
+                    lot["price_label"] = header[columns["price"]]
+                lots.append(lot)
+        if lots:
+            break
+    return lots
+
+
+def parse_deadline(lines: List[str]) -> Optional[str]:
+    """投标（响应）文件递交截止时间；保证金到账截止、答疑截止等不算"""
+    for line in lines:
+        pos = line.find("截止时间")
+        if pos < 0 or "保证金" in line or "到账" in line or "答疑" in line or "澄清" in line:
+            continue
+        m = _DEADLINE_DATE_RE.search(line, pos)
+        if m:
+            y, mo, d = int(m.group(1)), int(m.group(2)), int(m.group(3))
+            hh = int(m.group(4)) if m.group(4) else 0
+            mm = int(m.group(5)) if m.group(5) else 0
+            return f"{y:04d}-{mo:02d}-{d:02d}T{hh:02d}:{mm:02d}:00"
+    return None
+
+
+def extract_fields(text: str) -> Dict[str, Any]:
+    """从清洗后的正文中解析结构化字段，未命中的字段不出现在结果中"""
+    fields: Dict[str, Any] = {}
+    if not text:
+        return fields
+    for field, pattern in _PARTY_PATTERNS:
+        if field in fields:
+            continue
+        for m in pattern.finditer(text):
+            value = _clean(m.group(1))
+            if 2 <= len(value) <= 60:
+                fields[field] = value
+                break
+    for label, pattern in _BUDGET_PATTERNS:
+        m = pattern.search(text)
+        if m:
+            fields["budget"] = _SPACE_RE.sub("", m.group(1))
+            fields["budget_label"] = label
+            break
+    m = _PERIOD_RE.search(text)
+    if m:
+        fields["service_period"] = _clean(m.group(2))
+        fields["service_period_label"] = m.group(1)
+    for m in _SCOPE_RE.finditer(text):
+        scope = _drop_references(m.group(1))
+        if len(scope) >= MIN_SCOPE_CHARS and informative(scope):
+            fields["scope"] = scope
+            break
+
+    lines = text.splitlines()
+    lots = parse_lots(lines)
+    if lots:
+        fields["lots"] = lots
+    deadline = parse_deadline(lines)
+    if deadline:
+        fields["deadline"] = deadline
+    return fields
+
+
+def _lot_summary(lot: Dict[str, str], numbered: bool) -> str:
+    text = _drop_references(lot["content"])
+    if numbered and lot.get("lot"):
+        text = f"标段{lot['lot']}：{text}"
+    period = _drop_references(lot.get("period", ""))
+    if period:
+        text += f"，期限：{period}"
+    if lot.get("price"):
+        text += f"，{lot.get('price_label') or '最高限价'}：{lot['price']}"
+    return text
+
+
+def build_prj_content(fields: Dict[str, Any], max_chars: int = MAX_CONTENT_CHARS,
+                      title: Optional[str] = None) -> Optional[str]:
+    """按解析出的字段拼出 prjContent；没有有效的采购内容（标段表格或招标范围/采购内容字段）时返回 None。
+
+    传入 title 时，只复述标题的 scope 也视为无效。
+    """
+    lots = [lot for lot in fields.get("lots", []) if informative(_drop_references(lot.get("content", "")))]
+    parts: List[str] = []
+    if lots:
+        parts.extend(_lot_summary(lot, len(lots) > 1) for lot in lots)
+        has_price = any(lot.get("price") for lot in lots)
+        has_period = any(lot.get("period") for lot in lots)
+    elif fields.get("scope") and informative(fields["scope"], title):
+        parts.append(fields["scope"])
+        has_price = has_period = False
+    else:
+        return None
+    if fields.get("budget") and not has_price:
+        parts.append(f"{fields.get('budget_label') or '预算'}：{fields['budget']}")
+    period = _drop_references(fields.get("service_period", ""))
+    if period and not has_period:
+        parts.append(f"{fields.get('service_period_label') or '服务期限'}：{period}")
+    content = "；".join(parts)
+    if len(content) > max_chars:
+        content = content[:max_chars - 1].rstrip("，,；;、 ") + "…"
+    return content
+
+
+def record_fields(fields: Dict[str, Any]) -> Dict[str, str]:
+    """prjContent 之外保存到记录上的结构化字段，未解析出的字段不出现在结果中"""
+    return {field: fields[field] for field in RECORD_FIELDS if fields.get(field)}
@@ -0,0 +1,108 @@
+"""
+HTML 转纯文本（保留段落与表格结构）。
+
+- 注释、script/style 等不可见内容整体丢弃（含 Word 导出 HTML 条件注释中的 <xml> 样式块）
+- 段落、标题、列表项、<br> 等块级边界换行；表格每行（<tr>）输出为一行，单元格以 “ | ” 分隔，
+  标段/服务内容/最高限价等表格字段在清洗后仍能按行对应；其余（行内）标签直接去除
+- 实体还原后，每行内的连续空白（含 &nbsp;、全角空格与原文中的换行）合并为一个空格
+
+这是为保留结构而做的改写，不是提速：在真实公告上吞吐约为旧实现（标签一律替换为空格）的 0.8~0.9 倍，
+见 bench_html_text.py。逐字符的工作尽量留在正则引擎与 str 内建方法里：先整体删除不可见块与小写行内标签，
+再把结构性标签替换为换行/单元格标记，只有大写等少见标签回调 Python 分派。已测过的其他写法都更慢——
+单次 TAG_RE.sub 按标签名回调分派约慢 2.5 倍，html.parser 或手写 tokenizer 约慢 3 倍，
+常见无属性标签先用 str.replace 处理因反复复制整段正文约慢 2.5 倍。
+"""
+import re
+from html import unescape
+from itertools import groupby
+from typing import Iterable
+
+# 起止处换行的块级标签
+BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "body", "br", "caption", "dd", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "html", "li", "main", "nav", "ol", "p", "pre", "section", "ul",
+})
+# 表格行边界；单元格内的段落不再换行，而是并入所在行
+ROW_TAGS = frozenset({"table", "tbody", "tfoot", "thead", "tr"})
+CELL_TAGS = frozenset({"td", "th"})
+# 内容整体丢弃的标签
+SKIP_TAGS = frozenset({"head", "noscript", "script", "style", "template", "title", "xml"})
+
+CELL_SEP = " | "
+# 内部标记：表格行边界 / 块级边界 / 单元格起点（与正文中原有的换行区分开）
+ROW_MARK = "\x1d"
+LINE_MARK = "\x1e"
+CELL_MARK = "\x1f"
+
+
+def _alternation(names: Iterable[str]) -> str:
+    """按首字母分组生成正则分支（如 t(?:able|body|d|h|r)），比平铺的长分支匹配快得多"""
+    parts = []
+    for first, group in groupby(sorted(names), key=lambda n: n[0]):
+        rest = sorted((n[1:] for n in group), key=len, reverse=True)
+        tails = [re.escape(r) for r in rest if r]
+        if tails:
+            parts.append(f"{re.escape(first)}(?:{'|'.join(tails)}){'' if all(rest) else '?'}")
+        else:
+            parts.append(re.escape(first))
+    return "|".join(parts)
+
+
+# 注释（不回溯的写法）与不可见块
+SKIP_RE = re.compile(
+    r"<!--[^-]*(?:-(?!->)[^-]*)*(?:-->|$)|<(" + "|".join(sorted(SKIP_TAGS)) + r")\b.*?(?:</\1\s*>|$)",
+    re.I | re.S,
+)
+_STRUCT_ALT = _alternation(BLOCK_TAGS | ROW_TAGS | CELL_TAGS)
+# 小写标签（绝大多数）直接用字符串替换，不回调 Python：单元格起点 → 单元格标记，块级标签 → 换行标记，其余删除
+CELL_OPEN_RE = re.compile(r"<t[dh](?=[\s/>])[^>]*>")
+ROW_TAG_RE = re.compile(r"</?(?:" + _alternation(ROW_TAGS) + r")(?=[\s/>])[^>]*>")
+BLOCK_TAG_RE = re.compile(r"</?(?:" + _alternation(BLOCK_TAGS) + r")(?=[\s/>])[^>]*>")
+INLINE_TAG_RE = re.compile(r"<(?=/?[a-z])(?!/?(?:" + _STRUCT_ALT + r")[\s/>])[^>]*>|</t[dh]\s*>")
+# 剩余标签（含大写标签、声明）逐个映射
+TAG_RE = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9:-]*)[^>]*>|<[!?][^>]*>")
+
+
+def _tag_repl(m: "re.Match[str]") -> str:
+    name = m.group(2)
+    if name is None:
+        return ""
+    name = name.lower()
+    if name in BLOCK_TAGS:
+        return LINE_MARK
+    if name in ROW_TAGS:
+        return ROW_MARK
+    if name in CELL_TAGS and not m.group(1):
+        return CELL_MARK
+    return ""
+
+
+def html_to_text(html: str) -> str:
+    if not html:
+        return ""
+    html = SKIP_RE.sub("", html)
+    html = INLINE_TAG_RE.sub("", html)
+    html = CELL_OPEN_RE.sub(CELL_MARK, html)
+    html = ROW_TAG_RE.sub(ROW_MARK, html)
+    html = BLOCK_TAG_RE.sub(LINE_MARK, html)
+    if "<" in html:
+        html = TAG_RE.sub(_tag_repl, html)
+    if "&" in html:
+        html = unescape(html)
+    lines = []
+    for chunk in html.split(ROW_MARK):
+        if CELL_MARK in chunk:
+            # 表格行：单元格内的换行并入单元格，空单元格保留以保证列对齐，整行为空则跳过
+            head, *cells = (" ".join(c.replace(LINE_MARK, " ").split()) for c in chunk.split(CELL_MARK))
+            if any(cells):
+                row = CELL_SEP.join(cells)
+                lines.append(f"{head} {row}" if head else row)
+            elif head:
+                lines.append(head)
+            continue
+        for line in chunk.split(LINE_MARK):
+            line = " ".join(line.split())
+            if line:
+                lines.append(line)
+    return "\n".join(lines)
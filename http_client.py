@@ -0,0 +1,62 @@
+import os
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import timed
+from resilience import RETRY_ATTEMPTS, RETRY_STATUSES, call, host_of
+
+DEFAULT_POOL_SIZE = 16
+DEFAULT_TIMEOUT = 30
+# 门户接口地址（GetOpenList / GetBulletinList / GetBulletinContent）与在线答疑接口地址（GetOnlineInquire），
+# 可指向本地回放服务（见 replay_server.py）
+PORTAL_BASE_URL = os.getenv("PORTAL_BASE_URL", "https://ygcg.nbcqjy.org").rstrip("/")
+INQUIRE_BASE_URL = os.getenv("INQUIRE_BASE_URL", "https://ygcg.nbcqjy.org:8075").rstrip("/")
+
+_shared_session: Optional[requests.Session] = None
+_shared_lock = threading.Lock()
+
+
+def build_session(pool_size: int = DEFAULT_POOL_SIZE, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """创建带连接池的 Session：同一主机的请求复用 TCP/TLS 连接（keep-alive）"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def get_session() -> requests.Session:
+    """进程内共享的 Session（首次调用时创建）"""
+    global _shared_session
+    if _shared_session is None:
+        with _shared_lock:
+            if _shared_session is None:
+                _shared_session = build_session()
+    return _shared_session
+
+
+def request(method: str, url: str, session: Optional[requests.Session] = None, endpoint: Optional[str] = None,
+            attempts: int = RETRY_ATTEMPTS, **kwargs) -> requests.Response:
+    """经容错层（见 resilience）发出请求：默认超时，429/5xx 等按退避策略重试，受按主机并发上限与熔断保护。
+
+    可重试的状态码重试用尽后抛出 requests.HTTPError；其余状态码原样返回，由调用方 raise_for_status。
+    attempts=1 表示不在传输层重试（非幂等请求由调用方自行判断能否重发，见 notifier）。
+    每次实际发出的请求按 endpoint（默认为主机名）记录延迟，见 metrics。
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    http = session or get_session()
+
+    def send() -> requests.Response:
+        with timed(endpoint or host_of(url)):
+            resp = http.request(method, url, **kwargs)
+            if resp.status_code in RETRY_STATUSES:
+                resp.close()
+                raise requests.HTTPError(f"{resp.status_code} {resp.reason} for url: {url}", response=resp)
+        return resp
+
+    return call(host_of(url), send, attempts=attempts)
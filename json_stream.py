@@ -0,0 +1,194 @@
+"""
+流式 JSON 解析：从响应流中逐条取出数组元素，无需先把整个响应解析成对象。
+
+- iter_array_items(chunks, paths)：按路径（如 ("body", "data", "list")）找到第一个匹配的数组，
+  逐个产出元素的原始 JSON 文本；路径之外的值只扫描跳过，不解码
+- scan_fields(raw, keys)：只解码对象顶层的指定字段（如发布日期），其余字段（如正文 HTML）不解码，
+  用于在完整解析一条记录之前先判断是否需要它
+
+扫描以正则在结构字符间跳转，字符串整体匹配，缓冲区只保留当前元素及未消费的数据。
+"""
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+_WS_RE = re.compile(r"\s*")
+_STRING_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_STRUCT_RE = re.compile(r'["{}\[\]]')
+_SCALAR_RE = re.compile(r"[^\s,\]}:]+")
+
+
+class _Reader:
+    """分块文本的游标；mark 之前（无 mark 时为 pos 之前）已消费的数据在补充新块时丢弃"""
+
+    def __init__(self, chunks: Iterable[str]) -> None:
+        self._chunks = iter(chunks)
+        self.buf = ""
+        self.pos = 0
+        self.mark: Optional[int] = None
+        self.eof = False
+
+    def more(self) -> bool:
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            keep = self.pos if self.mark is None else self.mark
+            self.buf = self.buf[keep:] + chunk
+            self.pos -= keep
+            if self.mark is not None:
+                self.mark = 0
+            return True
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符，数据结束时返回空串"""
+        while True:
+            self.pos = _WS_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"JSON 格式错误：期望 {ch!r}，实际 {got!r}（位置 {self.pos}）")
+        self.pos += 1
+
+    def _match(self, pattern: "re.Pattern[str]") -> "re.Match[str]":
+        while True:
+            m = pattern.match(self.buf, self.pos)
+            # 标量可能被块边界截断：匹配到缓冲区末尾时先补充数据再判断
+            if m and (m.end() < len(self.buf) or self.eof):
+                return m
+            if not self.more():
+                if m:
+                    return m
+                raise ValueError(f"JSON 数据不完整（位置 {self.pos}）")
+
+    def read_string(self) -> str:
+        if self.peek() != '"':
+            raise ValueError(f"JSON 格式错误：期望字符串（位置 {self.pos}）")
+        m = self._match(_STRING_RE)
+        self.pos = m.end()
+        return json.loads(m.group())
+
+    def skip_value(self) -> None:
+        ch = self.peek()
+        if ch == '"':
+            self.pos = self._match(_STRING_RE).end()
+        elif ch in "{[":
+            depth = 0
+            while True:
+                m = _STRUCT_RE.search(self.buf, self.pos)
+                if m is None:
+                    self.pos = len(self.buf)
+                    if not self.more():
+                        raise ValueError("JSON 数据不完整")
+                    continue
+                self.pos = m.start()
+                c = m.group()
+                if c == '"':
+                    self.pos = self._match(_STRING_RE).end()
+                    continue
+                self.pos += 1
+                depth += 1 if c in "{[" else -1
+                if depth == 0:
+                    return
+        elif ch:
+            self.pos = self._match(_SCALAR_RE).end()
+        else:
+            raise ValueError("JSON 数据不完整")
+
+    def read_value(self) -> Any:
+        start = self.pos = _WS_RE.match(self.buf, self.pos).end()
+        self.mark = start
+        try:
+            self.skip_value()
+            return json.loads(self.buf[self.mark:self.pos])
+        finally:
+            self.mark = None
+
+    def iter_object(self) -> Iterator[str]:
+        """遍历对象的键；调用方必须在每次产出后读取或跳过对应的值"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(":")
+            yield key
+            ch = self.peek()
+            self.pos += 1
+            if ch == "}":
+                return
+            if ch != ",":
+                raise ValueError(f"JSON 格式错误：对象中出现 {ch!r}（位置 {self.pos - 1}）")
+
+    def iter_array_raw(self) -> Iterator[str]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            self.peek()
+            self.mark = self.pos
+            self.skip_value()
+            raw = self.buf[self.mark:self.pos]
+            self.mark = None
+            yield raw
+            ch = self.peek()
+            self.pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"JSON 格式错误：数组中出现 {ch!r}（位置 {self.pos - 1}）")
+
+
+def _walk(reader: _Reader, prefix: Tuple[str, ...], paths: Sequence[Tuple[str, ...]]) -> Iterator[str]:
+    found = False
+    for key in reader.iter_object():
+        path = prefix + (key,)
+        if found:
+            reader.skip_value()
+            continue
+        ch = reader.peek()
+        if path in paths and ch == "[":
+            yield from reader.iter_array_raw()
+            found = True
+        elif ch == "{" and any(p[:len(path)] == path for p in paths):
+            for raw in _walk(reader, path, paths):
+                found = True
+                yield raw
+        else:
+            reader.skip_value()
+
+
+def iter_array_items(chunks: Iterable[str], paths: Sequence[Tuple[str, ...]]) -> Iterator[str]:
+    """从分块的 JSON 文本中逐个产出第一个匹配路径的数组元素（原始 JSON 文本）。
+
+    按文档顺序匹配，找到一个数组后其余数据只做扫描；调用方可随时停止迭代以放弃剩余响应。
+    """
+    reader = _Reader(chunks)
+    if reader.peek() != "{":
+        return
+    yield from _walk(reader, (), [tuple(p) for p in paths])
+
+
+def scan_fields(raw: str, keys: Iterable[str]) -> Dict[str, Any]:
+    """只解码 JSON 对象顶层的指定字段，取齐后立即返回；raw 不是对象时返回空字典"""
+    wanted = set(keys)
+    found: Dict[str, Any] = {}
+    reader = _Reader([raw])
+    if reader.peek() != "{":
+        return found
+    for key in reader.iter_object():
+        if key in wanted and key not in found:
+            found[key] = reader.read_value()
+            if len(found) == len(wanted):
+                break
+        else:
+            reader.skip_value()
+    return found
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Optional
+
+import metrics
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite3")
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_title(title: str) -> str:
+    """标题归一化：全角转半角（NFKC）、去除所有空白、英文转小写"""
+    if not title:
+        return ""
+    text = unicodedata.normalize("NFKC", str(title))
+    return _SPACE_RE.sub("", text).lower()
+
+
+def prompt_version(*parts: str) -> str:
+    """根据提示词内容生成短版本号，提示词变更后缓存自动失效"""
+    h = hashlib.sha1()
+    for p in parts:
+        h.update((p or "").encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:12]
+
+
+def make_key(*parts: str) -> str:
+    """将多个组成部分拼接后哈希为缓存键"""
+    return prompt_version(*parts)
+
+
+class SQLiteCache:
+    """基于 SQLite 的持久化键值缓存，支持 TTL 过期与 LRU 淘汰。
+
+    - namespace: 命名空间，不同用途（分类/抽取）共用一个文件时互不干扰
+    - ttl_seconds: 条目有效期（按写入时间计算），None 或 0 表示不过期
+    - max_entries: 命名空间内最多保留条目数，超出时按最近访问时间淘汰，None 或 0 表示不限
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, namespace: str = "default",
+                 ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None) -> None:
+        cache_dir = os.path.dirname(path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self.path = path
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds or None
+        self.max_entries = max_entries or None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace   TEXT NOT NULL,
+                key         TEXT NOT NULL,
+                value       TEXT NOT NULL,
+                created_at  REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(namespace, accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                self.misses += 1
+                metrics.count("cache_requests", namespace=self.namespace, result="miss")
+                return None
+            self._conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+            metrics.count("cache_requests", namespace=self.namespace, result="hit")
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache(namespace, key, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, value, now, now),
+            )
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """删除过期条目，并按 LRU 裁剪到 max_entries，返回删除条数"""
+        removed = 0
+        with self._lock:
+            if self.ttl_seconds:
+                cur = self._conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND created_at < ?",
+                    (self.namespace, time.time() - self.ttl_seconds),
+                )
+                removed += cur.rowcount
+            if self.max_entries:
+                cur = self._conn.execute(
+                    """
+                    DELETE FROM cache WHERE namespace = ? AND key NOT IN (
+                        SELECT key FROM cache WHERE namespace = ? ORDER BY accessed_at DESC LIMIT ?
+                    )
+                    """,
+                    (self.namespace, self.namespace, self.max_entries),
+                )
+                removed += cur.rowcount
+            self._conn.commit()
+        return removed
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        return f"命中 {self.hits}，未命中 {self.misses}，命中率 {rate:.1f}%"
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,252 @@
+"""
+运行指标：阶段耗时、接口延迟直方图、大模型 token 用量与缓存命中，运行结束时输出报告。
+
+- stage(name, seconds)：统一入口各阶段的墙钟耗时
+- observe(endpoint, seconds, error)：单次调用延迟（GetOpenList / GetBulletinList / GetBulletinContent /
+  GetOnlineInquire / chat.completions），每次实际发出的请求各记一次（重试分别计入）
+- record_usage(model, usage)：OpenAI 响应中的 prompt / completion token 数
+- count(name, **labels)：计数器，如缓存命中（cache_requests{namespace,result}）、抽取来源、分类阶段
+- write_report()：写出 JSON 报告（METRICS_JSON，并追加一行到 METRICS_HISTORY 便于按天对比）与
+  Prometheus textfile（METRICS_PROM，供 node_exporter 的 textfile collector 采集）
+
+指标在进程内累积（线程安全），不依赖第三方库；不调用 write_report 时只占少量内存。
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+METRICS_JSON = os.getenv("METRICS_JSON", os.path.join(".cache", "metrics", "last_run.json"))
+METRICS_HISTORY = os.getenv("METRICS_HISTORY", os.path.join(".cache", "metrics", "history.jsonl"))
+METRICS_PROM = os.getenv("METRICS_PROM", os.path.join(".cache", "metrics", "nbygcg.prom"))
+
+# 延迟直方图分桶上界（秒）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+PROM_PREFIX = "nbygcg"
+
+T = TypeVar("T")
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count", "errors", "samples")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.errors = 0
+        self.samples: List[float] = []
+
+    def add(self, seconds: float, error: bool) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.errors += int(error)
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.stages: Dict[str, float] = {}
+        self.latency: Dict[str, _Histogram] = {}
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.counters: Dict[str, Dict[LabelKey, int]] = {}
+
+    def stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def observe(self, endpoint: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            hist = self.latency.get(endpoint)
+            if hist is None:
+                hist = self.latency[endpoint] = _Histogram()
+            hist.add(seconds, error)
+
+    def record_usage(self, model: str, usage: Any) -> None:
+        """usage 为 OpenAI 响应的 usage 对象（或 dict），缺失时忽略"""
+        if usage is None:
+            return
+        get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, None)
+        with self._lock:
+            entry = self.tokens.setdefault(model, {"prompt": 0, "completion": 0, "total": 0, "requests": 0})
+            entry["prompt"] += get("prompt_tokens") or 0
+            entry["completion"] += get("completion_tokens") or 0
+            entry["total"] += get("total_tokens") or 0
+            entry["requests"] += 1
+
+    def count(self, name: str, value: int = 1, **labels: str) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {
+                name: {
+                    "count": h.count,
+                    "errors": h.errors,
+                    "sumSeconds": round(h.total, 4),
+                    "p50": round(h.quantile(0.5), 4),
+                    "p95": round(h.quantile(0.95), 4),
+                    "max": round(max(h.samples), 4) if h.samples else 0.0,
+                    "buckets": {("+Inf" if i == len(LATENCY_BUCKETS) else f"{LATENCY_BUCKETS[i]:g}"): c
+                                for i, c in enumerate(h.counts)},
+                }
+                for name, h in sorted(self.latency.items())
+            }
+            return {
+                "startedAt": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+                "durationSeconds": round(time.time() - self.started_at, 3),
+                "stages": {name: round(s, 3) for name, s in self.stages.items()},
+                "endpoints": endpoints,
+                "tokens": {model: dict(v) for model, v in self.tokens.items()},
+                "counters": {name: [{"labels": dict(key), "value": v} for key, v in sorted(series.items())]
+                             for name, series in sorted(self.counters.items())},
+            }
+
+
+REGISTRY = Registry()
+
+
+def stage(name: str, seconds: float) -> None:
+    REGISTRY.stage(name, seconds)
+
+
+def observe(endpoint: str, seconds: float, error: bool = False) -> None:
+    REGISTRY.observe(endpoint, seconds, error)
+
+
+def record_usage(model: str, usage: Any) -> None:
+    REGISTRY.record_usage(model, usage)
+
+
+def count(name: str, value: int = 1, **labels: str) -> None:
+    REGISTRY.count(name, value, **labels)
+
+
+@contextmanager
+def timed(endpoint: str) -> Iterator[None]:
+    """记录 with 块的耗时；块内抛出异常时计为一次错误"""
+    started = time.perf_counter()
+    error = True
+    try:
+        yield
+        error = False
+    finally:
+        observe(endpoint, time.perf_counter() - started, error)
+
+
+def instrument(endpoint: str, func: Callable[..., T]) -> Callable[..., T]:
+    """包装 func，使每次调用都记录延迟（配合 resilience.call 时每次重试分别计入）"""
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        with timed(endpoint):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: List[Tuple[str, str]]) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+def to_prometheus(snapshot: Dict[str, Any]) -> str:
+    """按 Prometheus 文本格式输出（textfile collector 使用）"""
+    p = PROM_PREFIX
+    lines = [
+        f"# HELP {p}_run_duration_seconds Wall time of the last run.",
+        f"# TYPE {p}_run_duration_seconds gauge",
+        f"{p}_run_duration_seconds {snapshot['durationSeconds']}",
+        f"# HELP {p}_run_timestamp_seconds Unix time when the report was written.",
+        f"# TYPE {p}_run_timestamp_seconds gauge",
+        f"{p}_run_timestamp_seconds {int(time.time())}",
+        f"# HELP {p}_stage_duration_seconds Wall time per pipeline stage in the last run.",
+        f"# TYPE {p}_stage_duration_seconds gauge",
+    ]
+    lines += [f"{p}_stage_duration_seconds{_labels([('stage', name)])} {s}" for name, s in snapshot["stages"].items()]
+
+    lines += [
+        f"# HELP {p}_request_duration_seconds Latency of upstream calls (each attempt counted).",
+        f"# TYPE {p}_request_duration_seconds histogram",
+    ]
+    for endpoint, h in snapshot["endpoints"].items():
+        cumulative = 0
+        for le, c in h["buckets"].items():
+            cumulative += c
+            lines.append(f"{p}_request_duration_seconds_bucket{_labels([('endpoint', endpoint), ('le', le)])} {cumulative}")
+        lines.append(f"{p}_request_duration_seconds_sum{_labels([('endpoint', endpoint)])} {h['sumSeconds']}")
+        lines.append(f"{p}_request_duration_seconds_count{_labels([('endpoint', endpoint)])} {h['count']}")
+    lines += [
+        f"# HELP {p}_request_errors_total Failed upstream call attempts.",
+        f"# TYPE {p}_request_errors_total counter",
+    ]
+    lines += [f"{p}_request_errors_total{_labels([('endpoint', e)])} {h['errors']}" for e, h in snapshot["endpoints"].items()]
+
+    lines += [
+        f"# HELP {p}_llm_tokens_total Token usage reported by chat.completions.",
+        f"# TYPE {p}_llm_tokens_total counter",
+    ]
+    for model, usage in snapshot["tokens"].items():
+        for kind in ("prompt", "completion", "total"):
+            lines.append(f"{p}_llm_tokens_total{_labels([('model', model), ('kind', kind)])} {usage[kind]}")
+
+    for name, series in snapshot["counters"].items():
+        metric = f"{p}_{name}_total"
+        lines += [f"# TYPE {metric} counter"]
+        lines += [f"{metric}{_labels(sorted(s['labels'].items()))} {s['value']}" for s in series]
+    return "\n".join(lines) + "\n"
+
+
+def _write_text(path: str, text: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    # textfile collector 可能随时读取，先写临时文件再替换
+    os.replace(tmp, path)
+
+
+def write_report(json_path: Optional[str] = METRICS_JSON, history_path: Optional[str] = METRICS_HISTORY,
+                 prom_path: Optional[str] = METRICS_PROM) -> Dict[str, Any]:
+    """写出本次运行的指标报告，路径为空的输出跳过；返回报告内容"""
+    snapshot = REGISTRY.snapshot()
+    if json_path:
+        _write_text(json_path, json.dumps(snapshot, ensure_ascii=False, indent=2))
+    if history_path:
+        directory = os.path.dirname(history_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(history_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")) + "\n")
+    if prom_path:
+        _write_text(prom_path, to_prometheus(snapshot))
+    return snapshot
+
+
+def summary_lines(snapshot: Dict[str, Any]) -> List[str]:
+    """报告的简要文字版（阶段耗时、各接口 p50/p95、token 用量），用于日志"""
+    lines = []
+    if snapshot["stages"]:
+        lines.append("阶段耗时：" + "，".join(f"{name} {s:.1f}s" for name, s in snapshot["stages"].items()))
+    for endpoint, h in snapshot["endpoints"].items():
+        lines.append(f"{endpoint}: {h['count']} 次（失败 {h['errors']}），p50 {h['p50']:.2f}s，p95 {h['p95']:.2f}s，"
+                     f"合计 {h['sumSeconds']:.1f}s")
+    for model, usage in snapshot["tokens"].items():
+        lines.append(f"{model}: {usage['requests']} 次请求，prompt {usage['prompt']} / completion {usage['completion']} tokens")
+    return lines
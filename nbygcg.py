@@ -0,0 +1,235 @@
+"""
+统一入口：在一个进程内按阶段执行 抓取 → 规范化 → 分类 → 抽取 → 导出 → 推送。
+
+用法：
+    python nbygcg.py run                                      # 全部阶段
+    python nbygcg.py run --stages fetch,normalize,classify    # 只执行指定阶段（按固定顺序执行）
+    python nbygcg.py run --skip push                          # 跳过指定阶段
+    python nbygcg.py run --stages push                        # 基于库中当前窗口的数据推送
+    python nbygcg.py search 轨道交通                           # 在归档库全部历史中全文检索标题与正文
+
+阶段：
+- fetch：并发抓取近期开标列表与最新公告（两个接口互不依赖，同时进行；公告各类别也并发抓取）
+- normalize：与库中已有记录合并（保留未变化记录的分类与抽取结果），写入归档库，得到当前窗口的数据
+- classify / extract：对内存中的数据分类、抽取采购内容，分类与抽取共用一个 OpenAI 客户端
+- export：写回归档库，导出两个 JSON 与看板数据（data/manifest.json），整个运行只序列化这一次
+- push：每日摘要，筛选、生成一次后并发推送到所有已配置的钉钉机器人与 Bark 设备（见 notifier）
+
+各阶段共享同一个 RunContext（归档库连接、抓取状态、内存中的数据与客户端），阶段之间不经 JSON 文件中转；
+未执行 normalize 的运行中，后续阶段按当前导出窗口从库中读取数据。各阶段模块按需导入，只推送时不会加载 openai。
+运行结束时写出指标报告（阶段耗时、接口延迟、token 用量与缓存命中，见 metrics）。
+"""
+import argparse
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+import metrics
+from storage import Archive, export_bulletins, export_openings, open_archive
+
+STAGES = ("fetch", "normalize", "classify", "extract", "export", "push")
+
+
+class RunContext:
+    """一次运行中各阶段共享的数据与客户端"""
+
+    def __init__(self, archive: Archive, state: Dict[str, Any]) -> None:
+        self.archive = archive
+        # 抓取状态（开标列表条件刷新、公告高水位），两个抓取共用同一个文件
+        self.state = state
+        # fetch 阶段的原始结果，供 normalize 合并
+        self.fetched_openings: Optional[Dict[str, Any]] = None
+        self.fetched_bulletins: Optional[List[Dict[str, Any]]] = None
+        self.existing_bulletins: List[Dict[str, Any]] = []
+        self.fetched = False
+        # 当前窗口的数据：开标 {"today", "future_date", "projects"}，公告为记录列表（含正文）
+        self.openings: Optional[Dict[str, Any]] = None
+        self.bulletins: Optional[List[Dict[str, Any]]] = None
+        self.dirty = False
+        self._llm_client = None
+
+    def ensure_data(self) -> None:
+        """本次未执行 normalize 时按导出窗口从库中读取数据"""
+        if self.openings is None:
+            self.openings = export_openings(self.archive, None)
+        if self.bulletins is None:
+            self.bulletins = export_bulletins(self.archive, None)
+
+    def llm_client(self):
+        if self._llm_client is None:
+            from classify_projects import create_client
+            self._llm_client = create_client()
+        return self._llm_client
+
+
+def stage_fetch(ctx: RunContext) -> None:
+    import fetch_opening_projects as openings_fetcher
+    import fetch_purchase_bulletins as bulletins_fetcher
+
+    previous = openings_fetcher.previous_state(ctx.archive, ctx.state)
+    ctx.existing_bulletins, high_waters = bulletins_fetcher.fetch_inputs(ctx.archive, ctx.state)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        openings_future = pool.submit(openings_fetcher.fetch_opening_projects, previous=previous)
+        bulletins_future = pool.submit(bulletins_fetcher.fetch_bulletin_classes,
+                                       days=bulletins_fetcher.WINDOW_DAYS, high_waters=high_waters)
+        ctx.fetched_openings, ctx.state["openings"] = openings_future.result()
+        ctx.fetched_bulletins = bulletins_future.result()
+    ctx.fetched = True
+
+
+def stage_normalize(ctx: RunContext) -> None:
+    import fetch_opening_projects as openings_fetcher
+    import fetch_purchase_bulletins as bulletins_fetcher
+
+    if not ctx.fetched:
+        print("[WARN] 本次未执行 fetch 阶段，跳过 normalize")
+        return
+    ctx.openings = openings_fetcher.store_openings(ctx.archive, ctx.fetched_openings, output=None)
+    ctx.bulletins = bulletins_fetcher.store_bulletins(ctx.archive, ctx.fetched_bulletins, ctx.existing_bulletins,
+                                                      ctx.state, output=None)
+    bulletins_fetcher.save_state(ctx.state)
+    ctx.dirty = True
+    print(f"[INFO] 开标项目 {len(ctx.openings['projects'])} 个，采购公告 {len(ctx.bulletins)} 条")
+
+
+def stage_classify(ctx: RunContext) -> None:
+    from classify_projects import classify_records
+
+    ctx.ensure_data()
+    classify_records(ctx.llm_client(), ctx.openings, ctx.bulletins)
+    ctx.dirty = True
+
+
+def stage_extract(ctx: RunContext) -> None:
+    from extract_procurement_content import LLMExtractor, extract_records
+
+    ctx.ensure_data()
+    extract_records(LLMExtractor(ctx.llm_client()), ctx.openings, ctx.bulletins)
+    ctx.dirty = True
+
+
+def stage_export(ctx: RunContext) -> None:
+    from export_dashboard import build
+    from storage import save_bulletins, save_openings
+
+    ctx.ensure_data()
+    if ctx.dirty:
+        save_openings(ctx.openings, archive=ctx.archive)
+        save_bulletins(ctx.bulletins, archive=ctx.archive)
+    else:
+        export_openings(ctx.archive)
+        export_bulletins(ctx.archive)
+    build()
+
+
+def stage_push(ctx: RunContext) -> None:
+    from nbygcg_info_ding_push import push_digest
+
+    ctx.ensure_data()
+    push_digest(ctx.openings.get("projects") or [], ctx.bulletins)
+
+
+STAGE_FUNCS: Dict[str, Callable[[RunContext], None]] = {
+    "fetch": stage_fetch,
+    "normalize": stage_normalize,
+    "classify": stage_classify,
+    "extract": stage_extract,
+    "export": stage_export,
+    "push": stage_push,
+}
+
+
+def parse_stages(value: Optional[str], skip: Optional[str] = None) -> List[str]:
+    """解析逗号分隔的阶段列表，按固定顺序返回；未知阶段抛出 ValueError"""
+    chosen = [s.strip() for s in value.split(",") if s.strip()] if value else list(STAGES)
+    skipped = [s.strip() for s in skip.split(",") if s.strip()] if skip else []
+    unknown = [s for s in chosen + skipped if s not in STAGES]
+    if unknown:
+        raise ValueError(f"未知阶段: {', '.join(unknown)}（可选: {', '.join(STAGES)}）")
+    return [s for s in STAGES if s in chosen and s not in skipped]
+
+
+def run(stages: List[str]) -> None:
+    from fetch_purchase_bulletins import load_state
+
+    archive = open_archive()
+    ctx = RunContext(archive, load_state())
+    try:
+        for name in stages:
+            print(f"[INFO] ===== 阶段 {name} =====")
+            started = time.perf_counter()
+            try:
+                STAGE_FUNCS[name](ctx)
+            finally:
+                elapsed = time.perf_counter() - started
+                metrics.stage(name, elapsed)
+            print(f"[INFO] 阶段 {name} 完成，用时 {elapsed:.1f}s")
+    finally:
+        archive.close()
+        report_metrics()
+
+
+def report_metrics() -> None:
+    """写出本次运行的指标报告（失败的运行也写，便于定位慢在哪一步）"""
+    try:
+        snapshot = metrics.write_report()
+    except OSError as e:
+        print(f"[WARN] 写入指标报告失败: {e}")
+        return
+    for line in metrics.summary_lines(snapshot):
+        print(f"[SUMMARY] {line}")
+    print(f"[INFO] 指标报告: {metrics.METRICS_JSON}，{metrics.METRICS_PROM}")
+
+
+def search(text: str, limit: int) -> None:
+    """全文检索归档库，逐行打印 类型、主键与标题"""
+    archive = open_archive()
+    try:
+        hits = archive.search(text, limit)
+    finally:
+        archive.close()
+    kinds = {"opening": "开标", "bulletin": "公告"}
+    for hit in hits:
+        print(f"[{kinds.get(hit['kind'], hit['kind'])}] {hit['key']}  {hit['title']}")
+    print(f"[INFO] 共 {len(hits)} 条结果")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="nbygcg", description="宁波阳光采购数据处理统一入口")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="按阶段执行 抓取 → 规范化 → 分类 → 抽取 → 导出 → 推送")
+    run_parser.add_argument("--stages", help=f"只执行这些阶段（逗号分隔，可选: {','.join(STAGES)}）")
+    run_parser.add_argument("--skip", help="跳过这些阶段（逗号分隔）")
+    search_parser = sub.add_parser("search", help="全文检索归档库中的开标项目与采购公告（标题、正文与采购内容）")
+    search_parser.add_argument("text", help="关键词（3 个字及以上走全文索引）")
+    search_parser.add_argument("--limit", type=int, default=50, help="最多返回条数（默认 50）")
+    args = parser.parse_args(argv)
+
+    if args.command == "search":
+        search(args.text, args.limit)
+        return 0
+
+    try:
+        stages = parse_stages(args.stages, args.skip)
+    except ValueError as e:
+        parser.error(str(e))
+    if not stages:
+        print("[WARN] 没有需要执行的阶段")
+        return 0
+    print(f"[INFO] 执行阶段: {' → '.join(stages)}")
+    try:
+        run(stages)
+    except Exception as e:
+        traceback.print_exc()
+        print(f"[ERROR] 运行失败: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
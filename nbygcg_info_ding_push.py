@@ -1,18 +1,30 @@
+"""
+每日摘要推送：筛选一次数据（昨日信息化采购公告 + 明日信息化开标），生成一条消息，
+经 notifier 并发发往所有已配置的渠道——钉钉收到 Markdown 视图（含采购内容摘要），Bark 收到精简的纯文本视图。
+"""
 import json
 from datetime import datetime, timedelta
-import hashlib
-import hmac
-import base64
-from typing import List, Dict
+from typing import List, Dict, NamedTuple
 import os
-from dotenv import load_dotenv
-import requests
-import urllib.parse
-import time
+
+from date_normalize import parse_iso_to_display
+from notifier import Message, notify
+from storage import DB_PATH, load_bulletins, load_openings
+
+DIGEST_TITLE = "阳光采购每日摘要"
+DASHBOARD_URL = "https://nbygcg.qingwalashi.cn/"
+
+
+class Digest(NamedTuple):
+    """筛选后的摘要数据（按项目类型分组），各渠道的消息视图都由它生成"""
+    yesterday_bulletins: Dict[str, List[Dict]]
+    tomorrow_projects: Dict[str, List[Dict]]
 
 
 def load_projects(file_path: str) -> List[Dict]:
-    """加载开标项目数据（opening_projects.json -> projects 列表）"""
+    """加载开标项目数据：归档库存在时查询当前窗口，否则读取 opening_projects.json -> projects 列表"""
+    if os.path.exists(DB_PATH):
+        return load_openings()
     current_dir = os.path.dirname(os.path.abspath(__file__))
     full_path = os.path.join(current_dir, file_path)
     with open(full_path, 'r', encoding='utf-8') as f:
@@ -34,8 +46,10 @@ def filter_tomorrow_projects(projects: List[Dict]) -> Dict[str, List[Dict]]:
     return grouped
 
 
-def load_purchase_bulletins(file_path: str = 'purchase_bulletins.json') -> List[Dict]:
-    """加载采购公告列表（顶层为数组）"""
+def load_purchase_bulletins(file_path: str = 'purchase_bulletins.json', publish_date: str = None) -> List[Dict]:
+    """加载采购公告列表：归档库存在时按发布日期走索引查询，否则读取 JSON（顶层为数组）"""
+    if os.path.exists(DB_PATH):
+        return load_bulletins(publish_date, publish_date)
     current_dir = os.path.dirname(os.path.abspath(__file__))
     full_path = os.path.join(current_dir, file_path)
     with open(full_path, 'r', encoding='utf-8') as f:
@@ -45,24 +59,6 @@ def load_purchase_bulletins(file_path: str = 'purchase_bulletins.json') -> List[
         return []
 
 
-def parse_iso_to_display(dt_str: str) -> str:
-    """将 ISO 日期时间字符串转换为 'YYYY-MM-DD HH:MM'，失败返回空串"""
-    if not dt_str:
-        return ""
-    try:
-        # 兼容 'YYYY-MM-DDTHH:MM:SS' 或 'YYYY-MM-DD HH:MM:SS'
-        normalized = dt_str.replace(' ', 'T')
-        dt = datetime.fromisoformat(normalized)
-        return dt.strftime('%Y-%m-%d %H:%M')
-    except Exception:
-        # 若仅有日期
-        try:
-            d = datetime.strptime(dt_str[:10], '%Y-%m-%d')
-            return d.strftime('%Y-%m-%d 00:00')
-        except Exception:
-            return ""
-
-
 def filter_yesterday_bulletins(bulletins: List[Dict]) -> Dict[str, List[Dict]]:
     """筛选昨日新增的采购公告（按项目类型分组）"""
     target_types = [
@@ -144,69 +140,59 @@ def generate_push_content(yesterday_bulletins: Dict[str, List[Dict]], tomorrow_p
     return "\n".join(lines)
 
 
-def generate_sign(timestamp: int, secret: str) -> str:
-    string_to_sign = '{}\n{}'.format(timestamp, secret)
-    secret_enc = secret.encode('utf-8')
-    string_to_sign_enc = string_to_sign.encode('utf-8')
-    hmac_code = hmac.new(secret_enc, string_to_sign_enc, digestmod=hashlib.sha256).digest()
-    sign = urllib.parse.quote_plus(base64.b64encode(hmac_code).decode('utf-8'))
-    return sign
-
-
-def send_dingtalk_notification(content: str):
-    """发送钉钉群推送通知"""
-    load_dotenv()
-    webhook_url = os.getenv('DINGTALK_WEBHOOK_URL')
-    access_token = os.getenv('DINGTALK_ACCESS_TOKEN')
-    secret = os.getenv('DINGTALK_SECRET')
-    if webhook_url and access_token:
-        try:
-            webhook = f"{webhook_url}?access_token={access_token}"
-            if secret:
-                timestamp = str(round(time.time() * 1000))
-                sign = generate_sign(timestamp, secret)
-                webhook += f'&timestamp={timestamp}&sign={sign}'
-            headers = {
-                'Content-Type': 'application/json; charset=utf-8'
-            }
-            data = {
-                "msgtype": "markdown",
-                "markdown": {
-                    "title": "阳光采购每日摘要",
-                    "text": content
-                }
-            }
-            response = requests.post(webhook, headers=headers, json=data)
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('errcode') == 0:
-                    print("钉钉推送成功")
-                else:
-                    print(f"钉钉推送失败: {result.get('errmsg')}")
-            else:
-                print(f"钉钉推送失败: HTTP {response.status_code}")
-        except Exception as e:
-            print(f"钉钉推送异常: {str(e)}")
-    else:
-        print("警告: 未找到钉钉群webhook配置环境变量，跳过钉钉推送")
+def render_text(digest: Digest) -> str:
+    """生成纯文本视图（Bark 等）：只列标题与开标时间，不含采购内容摘要"""
+    lines: List[str] = ["昨日新增信息化采购公告:"]
+    bulletins = [it for items in digest.yesterday_bulletins.values() for it in items if it.get('prjUrl')]
+    for it in bulletins:
+        title = it.get('bulletinTitle') or it.get('title') or '未命名项目'
+        kb_display = parse_iso_to_display(it.get('kbDate') or '')
+        lines.append(f"- {title}（开标：{kb_display}）" if kb_display else f"- {title}")
+    if not bulletins:
+        lines.append("- 昨日无新增采购公告")
+    lines.append("")
+    lines.append("明日信息化开标项目:")
+    projects = [p for items in digest.tomorrow_projects.values() for p in items if p.get('prjUrl')]
+    for project in projects:
+        lines.append(f"- {project['prjName']}")
+    if not projects:
+        lines.append("- 明日无开标项目")
+    lines.append("")
+    lines.append(f"查看更多: {DASHBOARD_URL}")
+    return "\n".join(lines)
+
+
+def build_digest(projects: List[Dict], bulletins: List[Dict]) -> Digest:
+    return Digest(filter_yesterday_bulletins(bulletins), filter_tomorrow_projects(projects))
+
+
+def build_message(digest: Digest) -> Message:
+    """同一份摘要数据生成各渠道视图：Markdown 供钉钉，纯文本供 Bark"""
+    markdown = generate_push_content(digest.yesterday_bulletins, digest.tomorrow_projects)
+    return Message(DIGEST_TITLE, markdown, render_text(digest))
+
+
+def push_digest(projects: List[Dict], bulletins: List[Dict]) -> str:
+    """按开标项目与采购公告生成每日摘要（明日开标 + 昨日公告），并发推送到所有已配置的钉钉机器人与 Bark 设备，返回推送内容"""
+    message = build_message(build_digest(projects, bulletins))
+    print(message.markdown)
+    notify(message)
+    return message.markdown
 
 
 def main():
     # 明日开标项目
     projects = load_projects('opening_projects.json')
-    tomorrow_projects = filter_tomorrow_projects(projects)
 
     # 昨日新增采购公告
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
     try:
-        bulletins = load_purchase_bulletins('purchase_bulletins.json')
+        bulletins = load_purchase_bulletins('purchase_bulletins.json', publish_date=yesterday)
     except FileNotFoundError:
         bulletins = []
-    yesterday_bulletins = filter_yesterday_bulletins(bulletins)
 
     # 生成并发送推送
-    push_content = generate_push_content(yesterday_bulletins, tomorrow_projects)
-    print(push_content)
-    send_dingtalk_notification(push_content)
+    push_digest(projects, bulletins)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,257 @@
+"""
+统一推送：摘要只生成一次，并发推送到所有已配置的渠道（钉钉群机器人、Bark 设备）。
+
+- 每个 webhook / 设备 key 是一个独立渠道，各渠道在线程池中并行发送，单个渠道失败不影响其他渠道
+- 请求经 http_client.request 发出（带超时 NOTIFY_TIMEOUT，受按主机并发上限与熔断保护），但不在传输层重试：
+  超时或 5xx 时消息可能已经送达，重发会在群里产生重复消息
+- 每个渠道一个令牌桶限速：钉钉机器人每分钟最多 20 条（DINGTALK_RATE_PER_MINUTE），按固定间隔发送，
+  任意一分钟内都不超过上限
+- 唯一的重试路径是渠道自身的发送循环（_send_with_retry）：每次尝试前先取令牌，只在确定未送达时退避重发——
+  连接未建立、HTTP 429、钉钉 errcode 130101（发送过快）
+- 多个 webhook / key 用逗号分隔配置，见 channels_from_env
+"""
+import base64
+import hashlib
+import hmac
+import os
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+import requests
+from dotenv import load_dotenv
+from urllib3.exceptions import NewConnectionError
+
+import metrics
+from http_client import request
+from rate_limit import TokenBucket
+from resilience import RETRY_ATTEMPTS, THROTTLE_STATUSES, backoff_delay, retry_after_of, status_of
+
+NOTIFY_TIMEOUT = float(os.getenv("NOTIFY_TIMEOUT", "10"))
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", "8"))
+DINGTALK_RATE_PER_MINUTE = float(os.getenv("DINGTALK_RATE_PER_MINUTE", "20"))
+BARK_RATE_PER_MINUTE = float(os.getenv("BARK_RATE_PER_MINUTE", "60"))
+DEFAULT_DINGTALK_WEBHOOK = "https://oapi.dingtalk.com/robot/send"
+DEFAULT_BARK_SERVER = "https://api.day.app"
+# 钉钉返回的“发送过快”错误码
+DINGTALK_THROTTLED = 130101
+JSON_HEADERS = {'Content-Type': 'application/json; charset=utf-8'}
+
+
+class Message(NamedTuple):
+    title: str
+    markdown: str  # 钉钉等支持 Markdown 的渠道使用
+    text: str  # Bark 等纯文本渠道使用
+
+
+class NotifyError(RuntimeError):
+    """推送被渠道拒绝（HTTP 非 200 或钉钉 errcode 非 0）"""
+
+
+_MD_HEADING_RE = re.compile(r"^#{1,6}\s*", re.MULTILINE)
+_MD_QUOTE_RE = re.compile(r"^(\s*)>\s?", re.MULTILINE)
+_MD_LINK_RE = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+
+
+def markdown_to_text(markdown: str) -> str:
+    """把摘要 Markdown 转为纯文本：去掉标题符号与引用符号，链接只保留文字"""
+    text = _MD_HEADING_RE.sub("", markdown)
+    text = _MD_QUOTE_RE.sub(r"\1", text)
+    return _MD_LINK_RE.sub(r"\1", text)
+
+
+def make_message(title: str, markdown: str) -> Message:
+    return Message(title, markdown, markdown_to_text(markdown))
+
+
+def per_minute_limiter(per_minute: float) -> Optional[TokenBucket]:
+    """每分钟 per_minute 条的限速器（桶容量 1，即按固定间隔发送）；per_minute <= 0 表示不限速"""
+    return TokenBucket(per_minute / 60.0, capacity=1) if per_minute > 0 else None
+
+
+# 同一 webhook / key 在进程内共用一个限速器（多次 notify 调用之间同样生效）
+_limiters: Dict[str, Optional[TokenBucket]] = {}
+_limiters_lock = threading.Lock()
+
+
+def _shared_limiter(key: str, per_minute: float) -> Optional[TokenBucket]:
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = per_minute_limiter(per_minute)
+        return _limiters[key]
+
+
+def not_delivered(exc: BaseException) -> bool:
+    """请求失败且确定未送达（连接未建立或被限流），可以安全重发"""
+    if isinstance(exc, requests.ConnectTimeout) or status_of(exc) in THROTTLE_STATUSES:
+        return True
+    if isinstance(exc, requests.ConnectionError):
+        reason = getattr(exc.args[0], "reason", None) if exc.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def _send_with_retry(channel: "Channel", attempt_once: Callable[[], Optional[str]]) -> None:
+    """渠道唯一的重试路径：每次尝试前先从渠道限速器取令牌。
+
+    attempt_once 发送一次：成功返回 None；渠道明确拒绝但可重发（如钉钉发送过快）时返回原因；其余失败抛出。
+    抛出的异常只有确定未送达（not_delivered）时才重发，超时、5xx 等可能已送达的失败直接抛出。
+    """
+    attempt = 0
+    while True:
+        if channel.limiter:
+            channel.limiter.acquire()
+        retry_after = None
+        try:
+            reason = attempt_once()
+        except Exception as e:
+            if not not_delivered(e):
+                raise
+            status = status_of(e)
+            reason = f"HTTP {status}" if status else f"连接失败（{type(e).__name__}）"
+            retry_after = retry_after_of(e)
+        if reason is None:
+            return
+        attempt += 1
+        if attempt >= RETRY_ATTEMPTS:
+            raise NotifyError(f"{reason}，已重试 {RETRY_ATTEMPTS} 次")
+        delay = max(retry_after or 0.0, backoff_delay(attempt))
+        print(f"[WARN] {channel.name} {reason}，{delay:.1f}s 后重试（{attempt + 1}/{RETRY_ATTEMPTS}）")
+        time.sleep(delay)
+
+
+def _post(url: str, endpoint: str, data: Dict) -> requests.Response:
+    """发送一次推送请求（不在传输层重试），非 200 时抛出 NotifyError"""
+    response = request("POST", url, endpoint=endpoint, headers=JSON_HEADERS, json=data, timeout=NOTIFY_TIMEOUT,
+                       attempts=1)
+    if response.status_code != 200:
+        raise NotifyError(f"HTTP {response.status_code}")
+    return response
+
+
+def generate_sign(timestamp: str, secret: str) -> str:
+    string_to_sign = '{}\n{}'.format(timestamp, secret)
+    hmac_code = hmac.new(secret.encode('utf-8'), string_to_sign.encode('utf-8'), digestmod=hashlib.sha256).digest()
+    return urllib.parse.quote_plus(base64.b64encode(hmac_code).decode('utf-8'))
+
+
+class DingTalkChannel:
+    """钉钉群自定义机器人（Markdown 消息），设置了加签密钥时每次发送重新签名"""
+
+    kind = "钉钉"
+
+    def __init__(self, access_token: str, secret: Optional[str] = None, webhook_url: str = DEFAULT_DINGTALK_WEBHOOK,
+                 name: Optional[str] = None, per_minute: float = DINGTALK_RATE_PER_MINUTE) -> None:
+        self.webhook = f"{webhook_url}?access_token={access_token}"
+        self.secret = secret
+        self.name = name or self.kind
+        self.limiter = _shared_limiter(self.webhook, per_minute)
+
+    def _url(self) -> str:
+        if not self.secret:
+            return self.webhook
+        timestamp = str(round(time.time() * 1000))
+        return f"{self.webhook}&timestamp={timestamp}&sign={generate_sign(timestamp, self.secret)}"
+
+    def send(self, message: Message) -> None:
+        data = {"msgtype": "markdown", "markdown": {"title": message.title, "text": message.markdown}}
+
+        def attempt_once() -> Optional[str]:
+            # 每次重发都重新签名（签名带时间戳）
+            result = _post(self._url(), "dingtalk", data).json()
+            if result.get('errcode') == 0:
+                return None
+            if result.get('errcode') == DINGTALK_THROTTLED:
+                return "发送过快"
+            raise NotifyError(result.get('errmsg') or f"errcode {result.get('errcode')}")
+
+        _send_with_retry(self, attempt_once)
+
+
+class BarkChannel:
+    """Bark 设备推送（纯文本）"""
+
+    kind = "Bark"
+
+    def __init__(self, device_key: str, server: str = DEFAULT_BARK_SERVER, name: Optional[str] = None,
+                 per_minute: float = BARK_RATE_PER_MINUTE, sound: str = "minuet", group: str = "阳光采购",
+                 icon: str = "https://blog.qingwalashi.cn/favicon.ico") -> None:
+        self.url = f"{server.rstrip('/')}/push"
+        self.device_key = device_key
+        self.name = name or self.kind
+        self.options = {"sound": sound, "icon": icon, "group": group}
+        self.limiter = _shared_limiter(f"{self.url}#{device_key}", per_minute)
+
+    def send(self, message: Message) -> None:
+        data = {"body": message.text, "title": message.title, "device_key": self.device_key, **self.options}
+        def attempt_once() -> Optional[str]:
+            _post(self.url, "bark", data)
+            return None
+
+        _send_with_retry(self, attempt_once)
+
+
+Channel = Union[DingTalkChannel, BarkChannel]
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def dingtalk_channels_from_env() -> List[DingTalkChannel]:
+    """DINGTALK_ACCESS_TOKEN 可用逗号分隔多个机器人；DINGTALK_SECRET 按相同顺序对应，只给一个时所有机器人共用"""
+    load_dotenv()
+    webhook_url = os.getenv('DINGTALK_WEBHOOK_URL')
+    tokens = _split(os.getenv('DINGTALK_ACCESS_TOKEN'))
+    secrets = _split(os.getenv('DINGTALK_SECRET'))
+    if not webhook_url or not tokens:
+        return []
+    channels = []
+    for i, token in enumerate(tokens):
+        secret = secrets[i] if i < len(secrets) else (secrets[0] if len(secrets) == 1 else None)
+        name = f"钉钉#{i + 1}" if len(tokens) > 1 else "钉钉"
+        channels.append(DingTalkChannel(token, secret, webhook_url=webhook_url, name=name))
+    return channels
+
+
+def bark_channels_from_env() -> List[BarkChannel]:
+    """BARK_KEY 可用逗号分隔多个设备；BARK_SERVER 为自建服务地址（默认官方服务）"""
+    load_dotenv()
+    keys = _split(os.getenv('BARK_KEY'))
+    server = os.getenv('BARK_SERVER') or DEFAULT_BARK_SERVER
+    return [BarkChannel(key, server, name=f"Bark#{i + 1}" if len(keys) > 1 else "Bark") for i, key in enumerate(keys)]
+
+
+def channels_from_env() -> List[Channel]:
+    return [*dingtalk_channels_from_env(), *bark_channels_from_env()]
+
+
+def _deliver(channel: Channel, messages: Sequence[Message]) -> bool:
+    """按顺序向一个渠道发送全部消息，返回是否全部成功"""
+    for message in messages:
+        try:
+            channel.send(message)
+        except Exception as e:
+            metrics.count("notifications", channel=channel.kind, result="failed")
+            print(f"{channel.name}推送失败: {e}")
+            return False
+        metrics.count("notifications", channel=channel.kind, result="sent")
+    print(f"{channel.name}推送成功")
+    return True
+
+
+def notify(messages: Union[Message, Iterable[Message]], channels: Optional[Sequence[Channel]] = None) -> Dict[str, bool]:
+    """向各渠道并发推送，返回 {渠道名: 是否成功}；channels 默认按环境变量配置"""
+    messages = [messages] if isinstance(messages, Message) else list(messages)
+    channels = channels_from_env() if channels is None else list(channels)
+    if not channels:
+        print("警告: 未配置任何推送渠道（钉钉 webhook / BARK_KEY），跳过推送")
+        return {}
+    if len(channels) == 1:
+        return {channels[0].name: _deliver(channels[0], messages)}
+    with ThreadPoolExecutor(max_workers=max(1, min(NOTIFY_CONCURRENCY, len(channels)))) as pool:
+        results = list(pool.map(lambda c: _deliver(c, messages), channels))
+    return {c.name: ok for c, ok in zip(channels, results)}
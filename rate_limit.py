@@ -0,0 +1,38 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """线程安全的令牌桶限速器。
+
+    - rate: 每秒补充的令牌数（即稳定状态下的每秒请求数）
+    - capacity: 桶容量（允许的瞬时突发量），默认与 rate 相同且至少为 1
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """阻塞直到取得令牌。"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
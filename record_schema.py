@@ -0,0 +1,162 @@
+"""
+公告记录的字段映射：声明式地描述“目标字段 <- 原始字段候选”，按响应结构解析一次取值计划，再套用到每条记录。
+
+- BULLETIN_FIELDS：每个目标字段的候选原始字段（按优先级）、取值规则与转换函数
+- BulletinNormalizer：按原始记录的字段集合（同一接口返回的记录结构相同）解析一次取值计划并缓存，
+  计划中每个字段只保留该结构里实际存在的候选字段，逐条记录按计划依次取值；
+  结构不同的记录各自解析，结果与逐字段 or 回退逐条一致
+- Bulletin：清洗后的公告（NamedTuple，比 dict 占用更少内存），写入归档库前经 to_dict() 转为 dict
+- locate_items：按 BULLETIN_ITEM_PATHS 在接口返回中定位公告数组（与流式解析共用同一组路径）
+"""
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from date_normalize import parse_date_to_ymd, parse_to_iso_datetime
+
+BULLETIN_URL_TEMPLATE = "https://ygcg.nbcqjy.org/detail?bulletinId={}"
+
+# GetBulletinList 响应中公告数组可能出现的位置，按优先级排列
+BULLETIN_ITEM_PATHS: List[Tuple[str, ...]] = \
+    [("body", "data", key) for key in ["list", "bulletinList", "items", "rows", "data"]] + \
+    [("body", key) for key in ["list", "bulletinList", "items", "rows"]]
+
+# 取值规则：FIRST_TRUTHY 取第一个非空值（a or b or c），FIRST_NOT_NONE 取第一个不为 None 的值（允许 0、空串）。
+# 默认值为 None 时与不带默认值的 or 链一致：都为空时取最后一个候选字段的原值（如空串），该字段不存在则为 None
+FIRST_TRUTHY = "truthy"
+FIRST_NOT_NONE = "not_none"
+
+
+def _str_or_none(value: Any) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+# (目标字段, 候选原始字段, 取值规则, 全部缺失时的默认值, 转换函数)
+FieldSpec = Tuple[str, Tuple[str, ...], str, Any, Optional[Callable[[Any], Any]]]
+BULLETIN_FIELDS: List[FieldSpec] = [
+    ("prjTypeId", ("prjTypeId", "projectTypeId", "typeId"), FIRST_TRUTHY, None, None),
+    ("publishDate", ("publishDate", "fbDate", "pubDate"), FIRST_TRUTHY, None, parse_date_to_ymd),
+    ("bulletinTitle", ("bulletinTitle", "title"), FIRST_TRUTHY, "", None),
+    ("bulletinContent", ("bulletinContent", "content"), FIRST_TRUTHY, "", None),
+    ("endDate", ("endDate", "bjEndDate", "deadline"), FIRST_TRUTHY, None, parse_to_iso_datetime),
+    ("prjNo", ("prjNo", "projectNo", "code"), FIRST_TRUTHY, None, None),
+    ("kbDate", ("kbDate", "openDate", "bidOpenDate"), FIRST_TRUTHY, None, parse_to_iso_datetime),
+    # autoId 作为 bulletinId（若无则回退 id），规范为字符串
+    ("bulletinId", ("autoId", "id", "bulletinId"), FIRST_NOT_NONE, None, _str_or_none),
+    ("prjId", ("prjId", "projectId", "prjid", "PrjId"), FIRST_TRUTHY, None, None),
+]
+
+
+class Bulletin(NamedTuple):
+    prjTypeId: Optional[str]
+    publishDate: Optional[str]  # YYYY-MM-DD 格式
+    bulletinTitle: str
+    bulletinContent: str
+    endDate: Optional[str]
+    prjNo: Optional[str]
+    kbDate: Optional[str]
+    bulletinId: Optional[str]
+    prjId: Optional[str]
+    # 根据需求：公告的 prjUrl 固定使用 bulletinId 的链接形式
+    prjUrl: Optional[str] = None
+    prjType: Optional[str] = None  # 分类前留空，由 classify_projects 写入
+    prjContent: Optional[str] = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """与 dict.get 相同的读取方式，便于与 dict 记录混用"""
+        return getattr(self, key) if key in self._fields else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(zip(self._fields, self))
+
+
+class FieldPlan(NamedTuple):
+    """单个目标字段的取值计划（按记录结构解析一次）"""
+    keys: Tuple[str, ...]  # 结构中实际存在的候选字段，按优先级
+    rule: str
+    default: Any
+    # or 链语义：没有默认值且最后一个候选字段存在时，全部为空则取该字段的原值（如空串）
+    fallback_key: Optional[str]
+    transform: Optional[Callable[[Any], Any]]
+
+
+def compile_plan(spec: Sequence[FieldSpec], shape: FrozenSet[str]) -> List[FieldPlan]:
+    """按记录结构解析字段映射：每个字段只保留结构中存在的候选字段"""
+    plan = []
+    for _name, candidates, rule, default, transform in spec:
+        keys = tuple(k for k in candidates if k in shape)
+        fallback_key = None
+        if rule == FIRST_TRUTHY and default is None and candidates[-1] in shape:
+            fallback_key = candidates[-1]
+        plan.append(FieldPlan(keys, rule, default, fallback_key, transform))
+    return plan
+
+
+def resolve_field(it: Dict[str, Any], field: FieldPlan) -> Any:
+    """按取值规则从原始记录取出一个字段（未经转换）"""
+    if field.rule == FIRST_NOT_NONE:
+        for key in field.keys:
+            value = it[key]
+            if value is not None:
+                return value
+        return field.default
+    for key in field.keys:
+        value = it[key]
+        if value:
+            return value
+    return it[field.fallback_key] if field.fallback_key else field.default
+
+
+class BulletinNormalizer:
+    """按原始记录结构解析并缓存取值计划，把原始公告（dict）转为 Bulletin"""
+
+    def __init__(self, spec: Sequence[FieldSpec] = BULLETIN_FIELDS) -> None:
+        names = tuple(name for name, *_ in spec)
+        if names + ("prjUrl",) != Bulletin._fields[:len(names) + 1]:
+            raise ValueError("字段映射须与 Bulletin 的字段顺序一致（其后紧跟 prjUrl）")
+        self.spec = spec
+        self._id_index = names.index("bulletinId")
+        self._plans: Dict[FrozenSet[str], List[FieldPlan]] = {}
+
+    def plan_for(self, keys: Iterable[str]) -> List[FieldPlan]:
+        shape = frozenset(keys)
+        plan = self._plans.get(shape)
+        if plan is None:
+            plan = self._plans[shape] = compile_plan(self.spec, shape)
+        return plan
+
+    def apply(self, plan: List[FieldPlan], it: Dict[str, Any]) -> Bulletin:
+        values = []
+        for field in plan:
+            value = resolve_field(it, field)
+            values.append(field.transform(value) if field.transform else value)
+        bulletin_id = values[self._id_index]
+        values.append(BULLETIN_URL_TEMPLATE.format(bulletin_id) if bulletin_id else None)
+        return Bulletin(*values)
+
+    def normalize(self, items: Iterable[Any]) -> Iterator[Bulletin]:
+        """逐条清洗（生成器），非 dict 的元素跳过；结构与上一条相同时直接沿用其计划"""
+        shape_keys = None
+        plan: List[FieldPlan] = []
+        for it in items:
+            if not isinstance(it, dict):
+                continue
+            keys = it.keys()
+            if keys != shape_keys:
+                plan = self.plan_for(keys)
+                shape_keys = keys
+            yield self.apply(plan, it)
+
+
+def locate_items(data: Any, paths: Sequence[Tuple[str, ...]] = BULLETIN_ITEM_PATHS) -> List[Any]:
+    """按路径优先级取出第一个数组，都不存在时返回空列表"""
+    if not isinstance(data, dict):
+        return []
+    for path in paths:
+        node: Any = data
+        for key in path:
+            if not isinstance(node, dict):
+                break
+            node = node.get(key)
+        else:
+            if isinstance(node, list):
+                return node
+    return []
@@ -0,0 +1,110 @@
+"""
+抓取结果的增量合并（upsert）。
+
+抓取脚本每次得到的是“全新”的记录（prjType、prjContent 为 None），
+直接覆盖会丢失此前的分类与抽取结果。这里按主键与已有记录合并：
+
+- 主键：公告按 bulletinId，开标项目按 prjId（缺失时回退 bulletinId）
+- contentHash：标题与正文的哈希；未变化时保留已有的 prjType/prjContent/extractedFields
+- syncStatus：new（新增）/ changed（标题或正文变化）/ unchanged（未变化），供分类只处理增量；
+  分类写入后重置为 unchanged（mark_processed），跳过合并的运行不会重复处理
+"""
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+STATUS_NEW = "new"
+STATUS_CHANGED = "changed"
+STATUS_UNCHANGED = "unchanged"
+
+# 由下游阶段写入、内容未变化时需要保留的字段
+PRESERVED_FIELDS = ("prjType", "prjContent", "extractedFields")
+# 合并过程使用的内部字段，对外发布（看板数据）时去掉
+INTERNAL_FIELDS = ("contentHash", "syncStatus")
+
+BULLETIN_KEYS = ("bulletinId",)
+BULLETIN_HASH_FIELDS = ("bulletinTitle", "bulletinContent")
+OPENING_KEYS = ("prjId", "bulletinId")
+OPENING_HASH_FIELDS = ("prjName",)
+
+
+def record_key(record: Dict[str, Any], key_fields: Sequence[str]) -> Optional[str]:
+    for field in key_fields:
+        value = record.get(field)
+        if value is not None and value != "":
+            return str(value)
+    return None
+
+
+def content_hash(record: Dict[str, Any], hash_fields: Sequence[str]) -> str:
+    h = hashlib.sha1()
+    for field in hash_fields:
+        h.update(str(record.get(field) or "").encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def merge_records(fetched: Iterable[Dict[str, Any]], existing: Iterable[Dict[str, Any]],
+                  key_fields: Sequence[str], hash_fields: Sequence[str],
+                  keep_missing: bool = True) -> List[Dict[str, Any]]:
+    """将本次抓取的记录合并进已有记录，返回合并后的列表（抓取到的在前，保持抓取顺序）。
+
+    - 抓取到且内容未变化：使用新记录，但保留已有的 PRESERVED_FIELDS，标记 unchanged
+    - 抓取到且内容变化：使用新记录（分类/抽取结果重置），标记 changed
+    - 新主键：标记 new
+    - keep_missing=True 时，本次未抓取到的已有记录原样保留并标记 unchanged（增量抓取时使用）
+    无主键的记录视为新增。
+    """
+    old_by_key: Dict[str, Dict[str, Any]] = {}
+    for record in existing or []:
+        key = record_key(record, key_fields)
+        if key:
+            old_by_key[key] = record
+
+    merged: List[Dict[str, Any]] = []
+    seen = set()
+    for record in fetched:
+        key = record_key(record, key_fields)
+        if key in seen:
+            continue
+        new_hash = content_hash(record, hash_fields)
+        old = old_by_key.get(key) if key else None
+        record["contentHash"] = new_hash
+        if old is None:
+            record["syncStatus"] = STATUS_NEW
+        elif (old.get("contentHash") or content_hash(old, hash_fields)) == new_hash:
+            for field in PRESERVED_FIELDS:
+                if field in old:
+                    record[field] = old[field]
+            record["syncStatus"] = STATUS_UNCHANGED
+        else:
+            record["syncStatus"] = STATUS_CHANGED
+        if key:
+            seen.add(key)
+        merged.append(record)
+
+    if keep_missing:
+        for key, old in old_by_key.items():
+            if key not in seen:
+                old.setdefault("contentHash", content_hash(old, hash_fields))
+                old["syncStatus"] = STATUS_UNCHANGED
+                merged.append(old)
+    return merged
+
+
+def count_status(records: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    counts = {STATUS_NEW: 0, STATUS_CHANGED: 0, STATUS_UNCHANGED: 0}
+    for record in records:
+        status = record.get("syncStatus")
+        if status in counts:
+            counts[status] += 1
+    return counts
+
+
+def needs_update(record: Dict[str, Any]) -> bool:
+    """记录是否属于本次增量（新增或变化）；无 syncStatus 的旧数据一律视为需要处理"""
+    return record.get("syncStatus") != STATUS_UNCHANGED
+
+
+def mark_processed(record: Dict[str, Any]) -> None:
+    """增量记录处理完成（已写入分类）后标记为 unchanged，之后跳过合并的运行不会再次把它当作增量"""
+    record["syncStatus"] = STATUS_UNCHANGED
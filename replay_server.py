@@ -0,0 +1,359 @@
+"""
+本地回放服务：门户接口与 OpenAI 兼容 chat.completions 接口的离线替身，用于基准测试与回归测试。
+
+回放数据由 opening_projects.json / purchase_bulletins.json 生成，可按需扩增到任意条数（复制并改写 ID、标题后缀），
+日期按“今天”重排，保证落在抓取窗口内：开标时间分布在今天与明天，公告发布日期分布在今天之前的 3 天内。
+
+接口（与线上一致的请求/响应结构）：
+- POST /api/Portal/GetOpenList         {"pageIndex", "pageSize"}            -> body.data.projectList
+- POST /api/Portal/GetBulletinList     {"pageIndex", "pageSize", "classID"} -> body.data.list（含正文，按发布日期倒序）
+- POST /api/Portal/GetBulletinContent  {"autoID"}                            -> body.data.article.bulletinContent
+- GET  /api/Notoken/GetOnlineInquire?PrjId=...                             -> Body.Data.Remark
+- POST /v1/chat/completions：按提示词类型返回分类（单条/批量）或 prjContent 抽取结果，附带 usage
+- GET  /healthz、/stats：就绪检查与各接口请求计数
+
+延迟与错误可配置：每个请求先等待 latency ± jitter 秒（大模型接口为 llm_latency），再以 error_rate 的概率
+返回 error_status（429/503 时附带 Retry-After: 0）。
+
+用法：
+    python replay_server.py --records 1000 --port 8000 --latency 0.05 --error-rate 0.01
+    # 另一终端：
+    PORTAL_BASE_URL=http://127.0.0.1:8000 INQUIRE_BASE_URL=http://127.0.0.1:8000 \\
+    OPENAI_BASE_URL=http://127.0.0.1:8000/v1 OPENAI_API_KEY=replay python nbygcg.py run --skip push
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+
+from storage import read_content
+
+BEIJING_TZ = ZoneInfo("Asia/Shanghai")
+# 公告发布日期分布的天数（与 fetch_purchase_bulletins.WINDOW_DAYS 一致）
+WINDOW_DAYS = 3
+PRJ_TYPES = ["信息化建设类项目", "信息化服务类项目", "信息化软硬件采购类项目", "工程类项目", "其他项目"]
+_BATCH_LINE_RE = re.compile(r"^(\d+)\.\s*(.+)$", re.M)
+_ID_NAMESPACE = uuid.UUID("6f1c5f0e-9a57-4d39-8f7e-3c1d2b6a0e51")
+
+
+def _load_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _variant(value: Optional[str], n: int) -> Optional[str]:
+    """第 n 轮复制时给标题等字段加后缀，保证扩增后的记录互不相同（第 0 轮保持原样）"""
+    if not value or n == 0:
+        return value
+    return f"{value}（第{n + 1}批）"
+
+
+def _variant_id(value: Optional[str], n: int) -> Optional[str]:
+    if not value or n == 0:
+        return value
+    return str(uuid.uuid5(_ID_NAMESPACE, f"{value}/{n}"))
+
+
+class ReplayData:
+    """回放数据：开标列表、公告列表（原始接口字段）、公告正文与在线答疑正文"""
+
+    def __init__(self, open_list: List[Dict[str, Any]], bulletin_list: List[Dict[str, Any]],
+                 contents: Dict[str, str], inquires: Dict[str, str]) -> None:
+        self.open_list = open_list
+        self.bulletin_list = bulletin_list
+        self.contents = contents
+        self.inquires = inquires
+
+
+def build_replay_data(records: Optional[int] = None, openings_path: str = "opening_projects.json",
+                      bulletins_path: str = "purchase_bulletins.json", today: Optional[date] = None) -> ReplayData:
+    """由两个 JSON 文件生成回放数据，records 为开标项目与公告各自的条数（默认与文件中相同）"""
+    today = today or datetime.now(BEIJING_TZ).date()
+    openings = [p for p in (_load_json(openings_path).get("projects") or []) if isinstance(p, dict)]
+    bulletins = [b for b in _load_json(bulletins_path) if isinstance(b, dict)]
+    bodies = [read_content(b) or "" for b in bulletins]
+    if not openings or not bulletins:
+        raise ValueError("回放数据源为空")
+
+    open_list: List[Dict[str, Any]] = []
+    contents: Dict[str, str] = {}
+    inquires: Dict[str, str] = {}
+    for i in range(records if records is not None else len(openings)):
+        src, n = openings[i % len(openings)], i // len(openings)
+        kb = datetime.combine(today + timedelta(days=i % 2), datetime.min.time()) + timedelta(hours=9, minutes=30 * (i % 16))
+        item = {
+            "prjName": _variant(src.get("prjName"), n),
+            "bulletinId": _variant_id(src.get("bulletinId"), n),
+            "prjId": _variant_id(src.get("prjId"), n),
+            "prjNo": _variant(src.get("prjNo"), n),
+            "kbDate": kb.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        body = bodies[i % len(bodies)]
+        if item["bulletinId"]:
+            contents[item["bulletinId"]] = body
+        if item["prjId"]:
+            inquires[item["prjId"]] = body
+        open_list.append(item)
+    open_list.sort(key=lambda p: p["kbDate"])
+
+    bulletin_list: List[Dict[str, Any]] = []
+    for i in range(records if records is not None else len(bulletins)):
+        src, n = bulletins[i % len(bulletins)], i // len(bulletins)
+        published = today - timedelta(days=1 + i % WINDOW_DAYS)
+        auto_id = _variant_id(src.get("bulletinId"), n)
+        body = bodies[i % len(bodies)]
+        contents[auto_id] = body
+        bulletin_list.append({
+            "autoId": auto_id,
+            "prjTypeId": src.get("prjTypeId"),
+            "publishDate": f"{published.isoformat()} {8 + i % 10:02d}:00:00",
+            "bulletinTitle": _variant(src.get("bulletinTitle"), n),
+            "bulletinContent": body,
+            "endDate": src.get("endDate"),
+            "prjNo": _variant(src.get("prjNo"), n),
+            "kbDate": src.get("kbDate"),
+            "prjId": _variant_id(src.get("prjId"), n),
+        })
+    bulletin_list.sort(key=lambda b: b["publishDate"], reverse=True)
+    return ReplayData(open_list, bulletin_list, contents, inquires)
+
+
+def _page(items: List[Any], payload: Dict[str, Any]) -> List[Any]:
+    index = max(1, int(payload.get("pageIndex") or 1))
+    size = max(1, int(payload.get("pageSize") or 10))
+    return items[(index - 1) * size:index * size]
+
+
+def fake_prj_type(title: str) -> str:
+    """按标题哈希稳定地给出分类：约三分之一为信息化建设类，保证抽取阶段有数据可处理"""
+    digest = int(hashlib.md5(title.encode("utf-8")).hexdigest()[:8], 16)
+    return PRJ_TYPES[0] if digest % 3 == 0 else PRJ_TYPES[digest % len(PRJ_TYPES)]
+
+
+def fake_completion(prompt: str) -> str:
+    """按提示词类型生成模型输出：批量分类、单条分类或采购内容抽取"""
+    if "项目名称列表：" in prompt:
+        items = prompt.split("项目名称列表：", 1)[1]
+        results = [{"id": int(m.group(1)), "prjType": fake_prj_type(m.group(2).strip())}
+                   for m in _BATCH_LINE_RE.finditer(items)]
+        return json.dumps({"results": results}, ensure_ascii=False)
+    if "项目名称：" in prompt:
+        title = prompt.rsplit("项目名称：", 1)[1].strip()
+        return json.dumps({"prjType": fake_prj_type(title)}, ensure_ascii=False)
+    text = " ".join(prompt.split("需甄别）：", 1)[-1].split())
+    return json.dumps({"prjContent": text[:120] or "（回放）无正文"}, ensure_ascii=False)
+
+
+class ReplayConfig:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503,
+                 llm_latency: float = 0.0, seed: Optional[int] = None) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.llm_latency = llm_latency
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def delay(self, base: float) -> float:
+        with self.lock:
+            return max(0.0, base + self.random.uniform(-self.jitter, self.jitter)) if base or self.jitter else 0.0
+
+    def should_fail(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头与正文分两次写出，不关闭 Nagle 时每个 keep-alive 请求会多出约 40ms 的延迟确认等待
+    disable_nagle_algorithm = True
+    server: "ReplayServer"
+
+    def log_message(self, format: str, *args: Any) -> None:  # 不逐条打印访问日志
+        pass
+
+    def _send_json(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            data = json.loads(raw.decode("utf-8")) if raw else {}
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _simulate(self, endpoint: str, llm: bool = False) -> bool:
+        """模拟延迟与错误，返回是否已发送错误响应"""
+        self.server.count(endpoint)
+        config = self.server.config
+        delay = config.delay(config.llm_latency if llm else config.latency)
+        if delay:
+            time.sleep(delay)
+        if not config.should_fail():
+            return False
+        self.server.count(endpoint + ".error")
+        headers = {"Retry-After": "0"} if config.error_status in (429, 503) else None
+        self._send_json(config.error_status, {"error": {"message": "replay injected error"}}, headers)
+        return True
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        data = self.server.data
+        if url.path == "/healthz":
+            self._send_json(200, {"ok": True})
+        elif url.path == "/stats":
+            self._send_json(200, self.server.stats())
+        elif url.path == "/api/Notoken/GetOnlineInquire":
+            if self._simulate("GetOnlineInquire"):
+                return
+            prj_id = (parse_qs(url.query).get("PrjId") or [""])[0]
+            self._send_json(200, {"Body": {"Data": {"Remark": data.inquires.get(prj_id, "")}}})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        path = urlparse(self.path).path
+        payload = self._read_json()
+        data = self.server.data
+        if path == "/api/Portal/GetOpenList":
+            if not self._simulate("GetOpenList"):
+                self._send_json(200, {"body": {"data": {"projectList": _page(data.open_list, payload)}}})
+        elif path == "/api/Portal/GetBulletinList":
+            if not self._simulate("GetBulletinList"):
+                self._send_json(200, {"body": {"data": {"list": _page(data.bulletin_list, payload)}}})
+        elif path == "/api/Portal/GetBulletinContent":
+            if not self._simulate("GetBulletinContent"):
+                content = data.contents.get(str(payload.get("autoID")), "")
+                self._send_json(200, {"body": {"data": {"article": {"bulletinContent": content}}}})
+        elif path.endswith("/chat/completions"):
+            if not self._simulate("chat.completions", llm=True):
+                self._send_json(200, self._completion(payload))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    @staticmethod
+    def _completion(payload: Dict[str, Any]) -> Dict[str, Any]:
+        messages = payload.get("messages") or []
+        prompt = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        content = fake_completion(prompt)
+        # 粗略估算 token 数（约 1.5 个汉字一个 token），供指标统计
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) * 2 // 3
+        completion_tokens = len(content) * 2 // 3
+        return {
+            "id": f"chatcmpl-replay-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model") or "replay",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, data: ReplayData, config: Optional[ReplayConfig] = None, host: str = "127.0.0.1",
+                 port: int = 0) -> None:
+        super().__init__((host, port), ReplayHandler)
+        self.data = data
+        self.config = config or ReplayConfig()
+        self._counts: Dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str) -> None:
+        with self._counts_lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._counts_lock:
+            return dict(self._counts)
+
+    def start(self) -> "ReplayServer":
+        """在后台线程中运行（同进程使用时）"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def env_for(url: str) -> Dict[str, str]:
+    """让抓取、分类、抽取脚本指向回放服务所需的环境变量"""
+    return {
+        "PORTAL_BASE_URL": url,
+        "INQUIRE_BASE_URL": url,
+        "OPENAI_BASE_URL": f"{url}/v1",
+        "OPENAI_API_KEY": "replay",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="门户接口与 chat.completions 的本地回放服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--records", type=int, help="开标项目与公告各生成多少条（默认与 JSON 文件相同）")
+    parser.add_argument("--openings", default="opening_projects.json", help="开标项目数据源")
+    parser.add_argument("--bulletins", default="purchase_bulletins.json", help="采购公告数据源")
+    parser.add_argument("--latency", type=float, default=0.0, help="门户接口延迟（秒）")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="chat.completions 延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟随机浮动范围（± 秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入错误的概率（0~1）")
+    parser.add_argument("--error-status", type=int, default=503, help="注入错误的 HTTP 状态码")
+    parser.add_argument("--seed", type=int, help="随机种子（延迟与错误注入可复现）")
+    args = parser.parse_args()
+
+    data = build_replay_data(args.records, args.openings, args.bulletins)
+    config = ReplayConfig(args.latency, args.jitter, args.error_rate, args.error_status, args.llm_latency, args.seed)
+    server = ReplayServer(data, config, args.host, args.port)
+    print(f"[INFO] 回放服务 {server.url}：开标项目 {len(data.open_list)} 个，公告 {len(data.bulletin_list)} 条")
+    for key, value in env_for(server.url).items():
+        print(f"{key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[SUMMARY] 请求计数：{json.dumps(server.stats(), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+统一的容错调用层：门户接口、大模型接口与推送接口共用。
+
+- 可重试的失败（连接错误、超时、HTTP 408/425/429/5xx）按“全抖动”指数退避重试，最多 RETRY_ATTEMPTS 次
+- 响应带 Retry-After（秒数或 HTTP 日期）时至少等待该时长；429/Retry-After 会让同一主机的所有调用一起暂停，
+  限流时整条流水线随之放慢，而不是各线程继续撞限流
+- 按主机限制同时进行中的请求数（HOST_CONCURRENCY）
+- 熔断：同一主机连续 BREAKER_THRESHOLD 次连接错误/超时/5xx 后熔断 BREAKER_RESET_SECONDS 秒，期间直接抛出
+  CircuitOpenError；到期后放行一个探测请求，成功即恢复（429 说明服务可用，只退避不计入熔断）
+- 其余错误（4xx、解析失败等）不重试，原样抛出，由调用方决定回退策略
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, TypeVar
+from urllib.parse import urlparse
+
+import requests
+
+try:
+    import openai
+except ImportError:  # 可选依赖：仅抓取/推送时无需安装
+    openai = None
+
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "1"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "60"))
+HOST_CONCURRENCY = int(os.getenv("HOST_CONCURRENCY", "8"))
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+# 未设置 OPENAI_BASE_URL 时 openai SDK 使用的地址
+OPENAI_DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+THROTTLE_STATUSES = frozenset({429})
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """目标主机处于熔断状态，调用未发出"""
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc or url
+
+
+def llm_host(base_url: Optional[str] = None) -> str:
+    """大模型接口所在主机，分类与抽取共用同一组并发上限/限流/熔断状态"""
+    return host_of(base_url or OPENAI_DEFAULT_BASE_URL)
+
+
+def status_of(exc: BaseException) -> Optional[int]:
+    """异常对应的 HTTP 状态码（requests.HTTPError 与 openai.APIStatusError），没有则返回 None"""
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after_of(exc: BaseException) -> Optional[float]:
+    """从异常携带的响应头中读取 Retry-After（秒），支持 retry-after-ms、秒数与 HTTP 日期"""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                        ConnectionError, TimeoutError)):
+        return True
+    if openai is not None and isinstance(exc, openai.APIConnectionError):
+        return True
+    return status_of(exc) in RETRY_STATUSES
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """第 attempt 次（从 0 开始）重试前的等待时长：[0, min(cap, base * 2^attempt)] 内均匀随机"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class HostGate:
+    """单个主机的并发上限、限流暂停与熔断状态（线程安全）"""
+
+    def __init__(self, host: str, concurrency: int = HOST_CONCURRENCY, threshold: int = BREAKER_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS) -> None:
+        self.host = host
+        self.slots = threading.BoundedSemaphore(max(1, concurrency))
+        self.threshold = max(1, threshold)
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._paused_until = 0.0
+
+    def enter(self) -> None:
+        """发出请求前调用：熔断中抛出 CircuitOpenError，限流暂停中则等待到期"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self._opened_at is not None:
+                    if self._probing or now - self._opened_at < self.reset_seconds:
+                        raise CircuitOpenError(f"{self.host} 熔断中（连续失败 {self._failures} 次）")
+                    self._probing = True
+                wait = self._paused_until - now
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """记录一次失败，返回是否已处于熔断状态"""
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                if self._opened_at is None or self._probing:
+                    print(f"[WARN] {self.host} 连续失败 {self._failures} 次，熔断 {self.reset_seconds:g}s")
+                self._opened_at = time.monotonic()
+            self._probing = False
+            return self._opened_at is not None
+
+    def release_probe(self) -> None:
+        """探测请求以不计入熔断的结果结束（如 429、4xx）时调用，允许下一次探测"""
+        with self._lock:
+            self._probing = False
+
+
+_gates: Dict[str, HostGate] = {}
+_gates_lock = threading.Lock()
+
+
+def get_gate(host: str) -> HostGate:
+    gate = _gates.get(host)
+    if gate is None:
+        with _gates_lock:
+            gate = _gates.setdefault(host, HostGate(host))
+    return gate
+
+
+def call(host: str, func: Callable[..., T], *args: Any, attempts: int = RETRY_ATTEMPTS, **kwargs: Any) -> T:
+    """在 host 的并发上限与熔断保护下调用 func，可重试的失败按退避策略重试，最终失败时抛出最后一次的异常"""
+    gate = get_gate(host)
+    attempts = max(1, attempts)
+    attempt = 0
+    while True:
+        gate.enter()
+        with gate.slots:
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    gate.release_probe()
+                    raise
+                status = status_of(e)
+                retry_after = retry_after_of(e)
+                if status in THROTTLE_STATUSES:
+                    gate.release_probe()
+                elif gate.record_failure():
+                    raise
+                delay = max(retry_after or 0.0, backoff_delay(attempt))
+                if status in THROTTLE_STATUSES or retry_after:
+                    # 限流：同一主机的其他调用也一起等待
+                    gate.pause(delay)
+                attempt += 1
+                if attempt >= attempts:
+                    raise
+                reason = f"HTTP {status}" if status else type(e).__name__
+                print(f"[WARN] {host} 请求失败（{reason}），{delay:.1f}s 后重试（{attempt + 1}/{attempts}）")
+            else:
+                gate.record_success()
+                return result
+        time.sleep(delay)
@@ -0,0 +1,101 @@
+"""
+基于关键词的项目分类预判（规则阶段）。
+
+- 使用 Aho-Corasick 多模式匹配自动机，一次扫描标题即可找出所有命中的关键词
+- 标题含信息化特征关键词时一律视为“需模型判断”（信息化三类之间的区分交给大模型）
+- 仅当命中的关键词全部指向同一类（工程类项目 / 其他项目）时给出确定结果，否则返回 None
+"""
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+INFO_LABEL = "信息化"
+
+# 关键词表：键为标签，值为关键词列表（匹配前统一做 NFKC 归一化与小写）
+KEYWORD_RULES: Dict[str, List[str]] = {
+    INFO_LABEL: [
+        "信息", "软件", "系统", "平台", "数据", "网络", "网站", "公众号", "小程序", "app",
+        "智慧", "智能", "数字", "信创", "云", "服务器", "计算机", "电脑", "机房", "存储",
+        "交换机", "防火墙", "终端", "监控", "视频", "安防", "弱电", "等保", "等级保护",
+        "运维", "集成", "电子", "人工智能", "ai",
+    ],
+    "工程类项目": [
+        "工程", "施工", "监理", "勘察", "勘测", "造价", "装修", "改造", "修缮", "土建",
+        "拆除", "拆迁", "迁改", "道路", "桥梁", "管网", "管线", "市政", "安装", "检修",
+        "维修", "总承包", "epc", "基建", "消防", "配电", "电力", "环境影响评价", "环评",
+    ],
+    "其他项目": [
+        "物业", "保洁", "保安", "安保", "协管", "巡管", "餐饮", "租金", "租赁", "拍卖",
+        "评估", "审计", "保险", "印刷", "广告", "策划", "会展", "展览", "窗帘", "被服",
+        "服装", "家具", "办公用品", "文具", "车辆", "加油", "劳务", "派遣", "培训",
+        "体检", "药品", "食材",
+    ],
+}
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick 自动机：构建一次，对任意文本 O(n) 找出全部命中关键词"""
+
+    def __init__(self, rules: Dict[str, Iterable[str]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[str, str]]] = [[]]
+        for label, keywords in rules.items():
+            for kw in keywords:
+                self._add(normalize(kw), label)
+        self._build()
+
+    def _add(self, keyword: str, label: str) -> None:
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((keyword, label))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[int, str, str]]:
+        """返回 (结束位置, 关键词, 标签) 列表"""
+        matches: List[Tuple[int, str, str]] = []
+        state = 0
+        for pos, ch in enumerate(normalize(text)):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for keyword, label in self._out[state]:
+                matches.append((pos, keyword, label))
+        return matches
+
+
+_AUTOMATON = KeywordAutomaton(KEYWORD_RULES)
+
+
+def pre_classify(title: str) -> Optional[str]:
+    """规则预判：能确定时返回“工程类项目”或“其他项目”，否则返回 None（交给大模型）"""
+    labels = {label for _, _, label in _AUTOMATON.find(title)}
+    if not labels or INFO_LABEL in labels or len(labels) > 1:
+        return None
+    return labels.pop()
@@ -0,0 +1,168 @@
+"""
+送入大模型前的正文裁剪：按章节打分，在 token 预算内优先保留与采购内容相关的章节。
+
+- 按标题行（“一、”“（二）”“2.1”“第三章”“【采购需求】”“xxx：”等）把清洗后的正文切分为章节，并识别标题层级
+- 章节得分 = 标题命中关键词的权重 × 2 + 正文命中关键词的权重（按命中次数，封顶）+ 上级标题得分，表格行额外加分；
+  “投标人资格要求 / 招标文件的获取 / 保证金 / 联系方式”等模板化章节及其小节为负分
+- 负分章节直接丢弃，其余按得分从高到低装入预算，输出时恢复原文顺序；正文本身不超过预算时原样返回，
+  未选中任何内容时退回正文开头（预算内）
+- token 数按“中日韩字符 1 个、其他字符 4 个约 1 个”粗略估算
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+SELECTOR_VERSION = "2"
+
+# 关键词权重：正数为采购内容相关，负数为模板化内容
+KEYWORD_WEIGHTS = {
+    "采购内容": 6, "采购需求": 6, "招标范围": 6, "项目概况": 5, "建设内容": 5, "服务内容": 5,
+    "采购清单": 5, "货物清单": 5, "项目内容": 5, "标项": 4, "标段": 4, "包件": 3, "技术要求": 3,
+    "主要内容": 3, "工作内容": 3, "数量": 2, "预算": 2, "最高限价": 3, "控制价": 2, "服务期": 2,
+    "工期": 1, "交付": 2, "系统": 1, "平台": 1, "软件": 1, "硬件": 1, "设备": 1, "模块": 1,
+    "投标人资格": -6, "资格要求": -6, "供应商资格": -6, "招标文件的获取": -6, "获取招标文件": -6,
+    "采购文件的获取": -6, "投标文件的递交": -5, "响应文件提交": -5, "保证金": -4, "电子保函": -4,
+    "开标": -3, "联系方式": -6, "联系人": -3, "发布公告的媒介": -6, "公告期限": -4, "监督": -3,
+    "政府采购政策": -4, "特别说明": -3, "其他补充事宜": -3, "招标条件": -2, "注意事项": -3,
+}
+# 单个关键词在正文中最多计分的次数
+MAX_KEYWORD_HITS = 3
+TABLE_ROW_BONUS = 1
+TABLE_BONUS_CAP = 6
+# 正文开头（标题/引言）的额外得分，保证项目名称等基本信息优先保留
+LEAD_BONUS = 4
+
+# 标题行及其层级（0 为章，1 为一级条目，数字越大层级越低）
+HEADING_PATTERNS = [
+    (0, re.compile(r"^\s*第[一二三四五六七八九十百]+[章节部分]")),
+    (1, re.compile(r"^\s*[一二三四五六七八九十]+[、．.]")),
+    (1, re.compile(r"^\s*【[^】]{1,20}】")),
+    (2, re.compile(r"^\s*\d+[.．]\d+(?:[.．]\d+)*[、．.]?(?=\D)")),
+    (1, re.compile(r"^\s*\d+[、．.](?!\d)")),
+    (2, re.compile(r"^\s*[（(][一二三四五六七八九十]+[）)]")),
+    (3, re.compile(r"^\s*[（(]\d+[）)]")),
+]
+# 以冒号结尾的短行（如“采购需求：”）也视为标题
+SHORT_HEADING_MAX = 30
+SHORT_HEADING_LEVEL = 3
+CJK_RE = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    cjk = len(CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def heading_level(line: str) -> Optional[int]:
+    """标题行返回层级，非标题返回 None"""
+    for level, pattern in HEADING_PATTERNS:
+        if pattern.match(line):
+            return level
+    stripped = line.strip()
+    if len(stripped) <= SHORT_HEADING_MAX and stripped.endswith(("：", ":")):
+        return SHORT_HEADING_LEVEL
+    return None
+
+
+def split_sections(text: str) -> List[Tuple[Optional[int], List[str]]]:
+    """按标题行切分为章节，返回 (标题层级, 行列表)；首个标题之前的内容单独成节（层级为 None）"""
+    sections: List[Tuple[Optional[int], List[str]]] = []
+    level: Optional[int] = None
+    current: List[str] = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        line_level = heading_level(line)
+        if line_level is not None and current:
+            sections.append((level, current))
+            level, current = line_level, []
+        elif line_level is not None:
+            level = line_level
+        current.append(line)
+    if current:
+        sections.append((level, current))
+    return sections
+
+
+def heading_score(heading: str) -> int:
+    return sum(weight * 2 for keyword, weight in KEYWORD_WEIGHTS.items() if keyword in heading)
+
+
+def score_section(lines: List[str], index: int = 0, parent_score: int = 0) -> int:
+    """章节得分；parent_score 为所属上级标题的得分（如“3. 投标人资格要求”下的各小节继承其负分）"""
+    heading, body = lines[0], "\n".join(lines[1:])
+    score = heading_score(heading) + parent_score
+    for keyword, weight in KEYWORD_WEIGHTS.items():
+        hits = body.count(keyword)
+        if hits:
+            score += weight * min(hits, MAX_KEYWORD_HITS)
+    table_rows = sum(1 for line in lines if " | " in line)
+    score += min(table_rows * TABLE_ROW_BONUS, TABLE_BONUS_CAP)
+    if index == 0:
+        score += LEAD_BONUS
+    return score
+
+
+def select_sections(text: str, token_budget: int) -> str:
+    """在 token_budget 内按得分挑选章节，按原文顺序拼接返回"""
+    if not text or token_budget <= 0 or estimate_tokens(text) <= token_budget:
+        return text
+    ranked: List[Tuple[int, int, str]] = []
+    # 各层级当前所在标题的得分，供下级小节继承
+    parents: Dict[int, int] = {}
+    for index, (level, lines) in enumerate(split_sections(text)):
+        if level is None:
+            ranked.append((score_section(lines, index), index, "\n".join(lines)))
+            continue
+        parent_score = sum(score for lvl, score in parents.items() if lvl < level)
+        ranked.append((score_section(lines, index, parent_score), index, "\n".join(lines)))
+        parents = {lvl: score for lvl, score in parents.items() if lvl < level}
+        parents[level] = heading_score(lines[0])
+    ranked.sort(key=lambda r: (-r[0], r[1]))
+
+    chosen: List[Tuple[int, str]] = []
+    remaining = token_budget
+    for score, index, section in ranked:
+        if remaining <= 0 or score < 0:
+            break
+        cost = estimate_tokens(section)
+        if cost <= remaining:
+            chosen.append((index, section))
+            remaining -= cost
+        elif score > 0 and not chosen:
+            # 得分最高的章节本身超出预算时截取其开头部分
+            chosen.append((index, _truncate(section, remaining)))
+            remaining = 0
+    chosen.sort()
+    selected = "\n".join(section for _, section in chosen)
+    if not selected.strip():
+        # 所有章节均为负分等情况下没有选中内容：退回正文开头，而不是送出空正文
+        return _truncate(text, token_budget)
+    return selected
+
+
+def _truncate(text: str, token_budget: int) -> str:
+    """按行截取正文开头；装不下的那一行截取其前部（单行超出预算时不会得到空串）"""
+    out = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            head = _clip_line(line, token_budget - used - 1)
+            if head:
+                out.append(head)
+            break
+        out.append(line)
+        used += cost
+    return "\n".join(out)
+
+
+def _clip_line(line: str, token_budget: int) -> str:
+    """截取单行中估算 token 数不超过 token_budget 的前缀"""
+    if token_budget <= 0:
+        return ""
+    used = 0.0
+    for i, ch in enumerate(line):
+        used += 1 if CJK_RE.match(ch) else 0.25
+        if used > token_budget:
+            return line[:i]
+    return line
@@ -0,0 +1,440 @@
+"""
+历史归档存储（SQLite，WAL 模式）。
+
+- openings / bulletins 两张表保存全部历史记录，完整记录以 JSON 存于 data 列，常用字段单独成列并建索引
+- fts 为 FTS5 全文索引（trigram 分词，适合中文），覆盖标题与清洗后的正文/采购内容；
+  fts_docs 记录每条索引对应的记录与内容签名，签名未变的记录写入时不重建索引（正文转文本只在内容变化时进行）
+- meta 表保存导出窗口；opening_projects.json / purchase_bulletins.json 由 export_* 按窗口从库中导出
+- 公告正文 HTML 不写入 purchase_bulletins.json，而是按内容哈希存为 bulletin_contents/<sha1>.html，
+  列表中的记录只保留 contentUrl，看板在打开详情时再按需加载
+
+首次使用时若库为空，会从现有的两个 JSON 文件导入数据。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from html_text import html_to_text
+from record_store import BULLETIN_KEYS, OPENING_KEYS, content_hash, record_key
+
+DB_PATH = os.getenv("NBYGCG_DB_PATH", "nbygcg.db")
+OPENINGS_JSON = "opening_projects.json"
+BULLETINS_JSON = "purchase_bulletins.json"
+CONTENT_DIR = "bulletin_contents"
+# 导出 purchase_bulletins.json 时从记录中移除、只保存在库中的字段
+EXPORT_STRIPPED_FIELDS = ("bulletinContent",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS openings (
+    key         TEXT PRIMARY KEY,
+    bulletinId  TEXT,
+    prjId       TEXT,
+    prjName     TEXT,
+    kbDate      TEXT,
+    prjType     TEXT,
+    prjContent  TEXT,
+    data        TEXT NOT NULL,
+    updated_at  TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS idx_openings_kbdate ON openings(kbDate);
+CREATE INDEX IF NOT EXISTS idx_openings_prjtype ON openings(prjType);
+CREATE INDEX IF NOT EXISTS idx_openings_bulletinid ON openings(bulletinId);
+
+CREATE TABLE IF NOT EXISTS bulletins (
+    bulletinId    TEXT PRIMARY KEY,
+    bulletinTitle TEXT,
+    publishDate   TEXT,
+    kbDate        TEXT,
+    endDate       TEXT,
+    prjType       TEXT,
+    prjContent    TEXT,
+    data          TEXT NOT NULL,
+    updated_at    TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS idx_bulletins_publishdate ON bulletins(publishDate);
+CREATE INDEX IF NOT EXISTS idx_bulletins_kbdate ON bulletins(kbDate);
+CREATE INDEX IF NOT EXISTS idx_bulletins_prjtype ON bulletins(prjType);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class Archive:
+    def __init__(self, path: str = DB_PATH) -> None:
+        db_dir = os.path.dirname(path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._init_fts()
+        self._conn.commit()
+
+    def _init_fts(self) -> None:
+        fresh = self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'fts_docs'").fetchone() is None
+        if fresh:
+            # 旧版索引没有 fts_docs 对照表，无法判断哪些记录已索引，整体重建
+            self._conn.execute("DROP TABLE IF EXISTS fts")
+        try:
+            self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5(title, content, tokenize='trigram')")
+        except sqlite3.OperationalError:
+            # 旧版 SQLite 无 trigram 分词器时退回默认分词
+            self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5(title, content)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fts_docs (kind TEXT NOT NULL, key TEXT NOT NULL, signature TEXT NOT NULL, "
+            "PRIMARY KEY (kind, key))"
+        )
+        if fresh:
+            for key, data in self._conn.execute("SELECT key, data FROM openings").fetchall():
+                self._index_opening(key, json.loads(data))
+            for key, data in self._conn.execute("SELECT bulletinId, data FROM bulletins").fetchall():
+                self._index_bulletin(key, json.loads(data))
+
+    # ---------------- 写入 ----------------
+    def _index(self, kind: str, key: str, signature: str, title: str, content: Callable[[], str]) -> None:
+        """写入一条全文索引；签名与已索引的一致时跳过，content 只在需要重建时才计算"""
+        row = self._conn.execute("SELECT rowid, signature FROM fts_docs WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+        if row and row[1] == signature:
+            return
+        if row:
+            rowid = row[0]
+            self._conn.execute("DELETE FROM fts WHERE rowid = ?", (rowid,))
+            self._conn.execute("UPDATE fts_docs SET signature = ? WHERE rowid = ?", (signature, rowid))
+        else:
+            rowid = self._conn.execute(
+                "INSERT INTO fts_docs(kind, key, signature) VALUES (?, ?, ?)", (kind, key, signature)
+            ).lastrowid
+        self._conn.execute("INSERT INTO fts(rowid, title, content) VALUES (?, ?, ?)", (rowid, title, content()))
+
+    def _index_opening(self, key: str, r: Dict[str, Any]) -> None:
+        self._index("opening", key, content_hash(r, ("prjName", "prjContent")), r.get("prjName") or "",
+                    lambda: r.get("prjContent") or "")
+
+    def _index_bulletin(self, key: str, r: Dict[str, Any]) -> None:
+        def content() -> str:
+            return "\n".join(t for t in (r.get("prjContent"), html_to_text(r.get("bulletinContent") or "")) if t)
+
+        self._index("bulletin", key, content_hash(r, ("bulletinTitle", "prjContent", "bulletinContent")),
+                    r.get("bulletinTitle") or "", content)
+
+    def upsert_openings(self, records: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        with self._lock:
+            for r in records:
+                key = record_key(r, OPENING_KEYS)
+                if not key:
+                    continue
+                self._conn.execute(
+                    """
+                    INSERT INTO openings(key, bulletinId, prjId, prjName, kbDate, prjType, prjContent, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        bulletinId = excluded.bulletinId, prjId = excluded.prjId, prjName = excluded.prjName,
+                        kbDate = excluded.kbDate, prjType = excluded.prjType, prjContent = excluded.prjContent,
+                        data = excluded.data, updated_at = datetime('now')
+                    """,
+                    (key, r.get("bulletinId"), r.get("prjId"), r.get("prjName"), r.get("kbDate"),
+                     r.get("prjType"), r.get("prjContent"), json.dumps(r, ensure_ascii=False)),
+                )
+                self._index_opening(key, r)
+                count += 1
+            self._conn.commit()
+        return count
+
+    def upsert_bulletins(self, records: Iterable[Dict[str, Any]]) -> int:
+        """写入公告；传入的记录整体替换库中记录，只有导出时移除的字段（EXPORT_STRIPPED_FIELDS）未携带时沿用库中值。
+
+        其余字段不沿用：正文修订后旧的抽取结果（extractedFields 等）不会残留在新记录上。
+        """
+        count = 0
+        with self._lock:
+            for r in records:
+                key = record_key(r, BULLETIN_KEYS)
+                if not key:
+                    continue
+                missing = [field for field in EXPORT_STRIPPED_FIELDS if field not in r]
+                if missing:
+                    row = self._conn.execute("SELECT data FROM bulletins WHERE bulletinId = ?", (key,)).fetchone()
+                    if row:
+                        old = json.loads(row[0])
+                        r = {**r, **{field: old[field] for field in missing if field in old}}
+                self._conn.execute(
+                    """
+                    INSERT INTO bulletins(bulletinId, bulletinTitle, publishDate, kbDate, endDate, prjType, prjContent, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(bulletinId) DO UPDATE SET
+                        bulletinTitle = excluded.bulletinTitle, publishDate = excluded.publishDate,
+                        kbDate = excluded.kbDate, endDate = excluded.endDate, prjType = excluded.prjType,
+                        prjContent = excluded.prjContent, data = excluded.data, updated_at = datetime('now')
+                    """,
+                    (key, r.get("bulletinTitle"), r.get("publishDate"), r.get("kbDate"), r.get("endDate"),
+                     r.get("prjType"), r.get("prjContent"), json.dumps(r, ensure_ascii=False)),
+                )
+                self._index_bulletin(key, r)
+                count += 1
+            self._conn.commit()
+        return count
+
+    # ---------------- 查询 ----------------
+    def _query(self, sql: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    @staticmethod
+    def _where(clauses: List[str], params: List[Any], column: str, low: Optional[str], high: Optional[str],
+               prj_types: Optional[Sequence[str]]) -> None:
+        if low:
+            clauses.append(f"{column} >= ?")
+            params.append(low)
+        if high:
+            # 日期时间字段（YYYY-MM-DDTHH:MM:SS）按日期前缀比较，包含 high 当天
+            clauses.append(f"substr({column}, 1, 10) <= ?")
+            params.append(high)
+        if prj_types:
+            clauses.append(f"prjType IN ({','.join('?' for _ in prj_types)})")
+            params.extend(prj_types)
+
+    def query_openings(self, kb_from: Optional[str] = None, kb_to: Optional[str] = None,
+                       prj_types: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """按开标日期区间（含两端，YYYY-MM-DD）与项目类型查询开标项目，按开标日期升序"""
+        clauses: List[str] = []
+        params: List[Any] = []
+        self._where(clauses, params, "kbDate", kb_from, kb_to, prj_types)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._query(f"SELECT data FROM openings {where} ORDER BY kbDate, rowid", params)
+
+    def query_bulletins(self, publish_from: Optional[str] = None, publish_to: Optional[str] = None,
+                        prj_types: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """按发布日期区间（含两端，YYYY-MM-DD）与项目类型查询公告，按发布日期倒序"""
+        clauses: List[str] = []
+        params: List[Any] = []
+        self._where(clauses, params, "publishDate", publish_from, publish_to, prj_types)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._query(f"SELECT data FROM bulletins {where} ORDER BY publishDate DESC, rowid", params)
+
+    def search(self, text: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """全文检索标题与正文，返回 [{"kind", "key", "title"}]，按相关度排序。
+
+        trigram 分词只能匹配 3 个字及以上的词，更短的关键词退回 LIKE 扫描（按写入顺序倒序）。
+        """
+        text = (text or "").strip()
+        if not text:
+            return []
+        if len(text) >= 3:
+            where, order, params = "fts MATCH ?", "rank", ['"' + text.replace('"', '""') + '"']
+        else:
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where, order = "fts.title LIKE ? ESCAPE '\\' OR fts.content LIKE ? ESCAPE '\\'", "fts.rowid DESC"
+            params = [pattern, pattern]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT d.kind, d.key, fts.title FROM fts JOIN fts_docs d ON d.rowid = fts.rowid "
+                f"WHERE {where} ORDER BY {order} LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [{"kind": k, "key": key, "title": t} for k, key, t in rows]
+
+    # ---------------- 导出窗口 ----------------
+    def set_meta(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, json.dumps(value, ensure_ascii=False))
+            )
+            self._conn.commit()
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            o = self._conn.execute("SELECT 1 FROM openings LIMIT 1").fetchone()
+            b = self._conn.execute("SELECT 1 FROM bulletins LIMIT 1").fetchone()
+        return o is None and b is None
+
+    def close(self) -> None:
+        with self._lock:
+            # 合并 WAL，库文件单独复制或上传（缓存、数据分支）时也包含最新数据
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+
+
+def _write_json(content: Any, path: str) -> None:
+    save_dir = os.path.dirname(path)
+    if save_dir and not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(content, f, ensure_ascii=False, indent=4)
+
+
+def _read_json(path: str) -> Any:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def export_openings(archive: Archive, path: Optional[str] = OPENINGS_JSON) -> Dict[str, Any]:
+    """按 meta 中的开标窗口导出 opening_projects.json；path 为 None 时只返回数据"""
+    window = archive.get_meta("openings_window") or {}
+    data = {
+        "today": window.get("today"),
+        "future_date": window.get("future_date"),
+        "projects": archive.query_openings(window.get("today"), window.get("future_date")) if window else [],
+    }
+    if path:
+        _write_json(data, path)
+    return data
+
+
+def write_content_blob(html: str, content_dir: str = CONTENT_DIR) -> str:
+    """按内容哈希写入正文文件（已存在则跳过），返回相对路径"""
+    digest = hashlib.sha1(html.encode("utf-8")).hexdigest()
+    rel = f"{content_dir}/{digest}.html"
+    if not os.path.exists(rel):
+        os.makedirs(content_dir, exist_ok=True)
+        with open(rel, "w", encoding="utf-8") as f:
+            f.write(html)
+    return rel
+
+
+def read_content(record: Dict[str, Any]) -> Optional[str]:
+    """读取公告正文：记录内联了 bulletinContent 时直接返回，否则按 contentUrl 读取正文文件"""
+    html = record.get("bulletinContent")
+    if html:
+        return html
+    url = record.get("contentUrl")
+    if not url:
+        return None
+    try:
+        with open(url, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def export_bulletins(archive: Archive, path: Optional[str] = BULLETINS_JSON,
+                     content_dir: str = CONTENT_DIR) -> List[Dict[str, Any]]:
+    """按 meta 中的发布日期窗口导出 purchase_bulletins.json（摘要记录）。
+
+    正文 HTML 拆分为 content_dir 下按内容哈希命名的文件，记录中以 contentUrl 引用；
+    不再被当前导出引用的正文文件会被删除（完整历史保存在库中）。
+    path 为 None 时只返回窗口内的完整记录（含正文），不写任何文件。
+    """
+    window = archive.get_meta("bulletins_window") or {}
+    data = archive.query_bulletins(window.get("from"), window.get("to")) if window else []
+    if not path:
+        return data
+    referenced = set()
+    for record in data:
+        # 库中缺正文（如由拆分后的 JSON 导入）时沿用已有的正文文件
+        html = read_content(record)
+        for field in EXPORT_STRIPPED_FIELDS:
+            record.pop(field, None)
+        if html:
+            record["contentUrl"] = write_content_blob(html, content_dir)
+            referenced.add(os.path.basename(record["contentUrl"]))
+        else:
+            record.pop("contentUrl", None)
+    if os.path.isdir(content_dir):
+        for name in os.listdir(content_dir):
+            if name.endswith(".html") and name not in referenced:
+                os.remove(os.path.join(content_dir, name))
+    _write_json(data, path)
+    return data
+
+
+def bootstrap_from_json(archive: Archive, openings_path: str = OPENINGS_JSON,
+                        bulletins_path: str = BULLETINS_JSON) -> None:
+    """库为空时，从现有的 JSON 文件导入数据与导出窗口"""
+    openings = _read_json(openings_path)
+    if isinstance(openings, dict):
+        archive.upsert_openings(openings.get("projects") or [])
+        if openings.get("today"):
+            archive.set_meta("openings_window", {"today": openings.get("today"), "future_date": openings.get("future_date")})
+    bulletins = _read_json(bulletins_path)
+    if isinstance(bulletins, list) and bulletins:
+        archive.upsert_bulletins(bulletins)
+        dates = sorted(b.get("publishDate") for b in bulletins if b.get("publishDate"))
+        if dates:
+            archive.set_meta("bulletins_window", {"from": dates[0], "to": dates[-1]})
+
+
+def open_archive(path: str = DB_PATH) -> Archive:
+    archive = Archive(path)
+    if archive.is_empty():
+        bootstrap_from_json(archive)
+    return archive
+
+
+def save_openings(data: Dict[str, Any], path: str = OPENINGS_JSON, archive: Optional[Archive] = None) -> None:
+    """写入开标项目并重新导出 JSON（供分类、抽取等脚本保存结果）；未传入 archive 时临时打开"""
+    own = archive is None
+    archive = archive or open_archive()
+    try:
+        archive.upsert_openings(data.get("projects") or [])
+        if data.get("today"):
+            archive.set_meta("openings_window", {"today": data.get("today"), "future_date": data.get("future_date")})
+        export_openings(archive, path)
+    finally:
+        if own:
+            archive.close()
+
+
+def save_bulletins(data: List[Dict[str, Any]], path: str = BULLETINS_JSON, archive: Optional[Archive] = None) -> None:
+    """写入采购公告并重新导出 JSON（导出窗口沿用 meta 中的设置）；未传入 archive 时临时打开"""
+    own = archive is None
+    archive = archive or open_archive()
+    try:
+        archive.upsert_bulletins(data)
+        export_bulletins(archive, path)
+    finally:
+        if own:
+            archive.close()
+
+
+def load_openings() -> List[Dict[str, Any]]:
+    """读取当前窗口内的开标项目：库存在时查库，否则读 JSON"""
+    if not os.path.exists(DB_PATH):
+        data = _read_json(OPENINGS_JSON)
+        return (data or {}).get("projects") or []
+    archive = open_archive()
+    try:
+        window = archive.get_meta("openings_window") or {}
+        return archive.query_openings(window.get("today"), window.get("future_date"))
+    finally:
+        archive.close()
+
+
+def load_bulletins(publish_from: Optional[str] = None, publish_to: Optional[str] = None,
+                   prj_types: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """按发布日期与类型读取公告：库存在时走索引查询，否则读 JSON 后在内存中过滤"""
+    if os.path.exists(DB_PATH):
+        archive = open_archive()
+        try:
+            return archive.query_bulletins(publish_from, publish_to, prj_types)
+        finally:
+            archive.close()
+    data = _read_json(BULLETINS_JSON)
+    result = []
+    for b in data if isinstance(data, list) else []:
+        pd = b.get("publishDate") or ""
+        if publish_from and pd < publish_from:
+            continue
+        if publish_to and pd[:10] > publish_to:
+            continue
+        if prj_types and b.get("prjType") not in prj_types:
+            continue
+        result.append(b)
+    return result
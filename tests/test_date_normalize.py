@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+import pytest
+
+from date_normalize import parse_date_to_ymd, parse_iso_to_display, parse_kb_datetime, parse_to_iso_datetime
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2026-03-02", "2026-03-02"),
+    ("2026-03-02 09:30:00", "2026-03-02"),
+    ("2026/3/2", "2026-03-02"),
+    ("发布于 2026-3-2 上午", "2026-03-02"),
+    ("２０２６-０３-０２", "2026-03-02"),
+    ("20260302", "2026-03-02"),
+    ("待定", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_date_to_ymd(value, expected):
+    assert parse_date_to_ymd(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2026-03-02 09:30:00", "2026-03-02T09:30:00"),
+    ("2026-03-02T09:30:00", "2026-03-02T09:30:00"),
+    (" 2026/3/2 9:05 ", "2026-03-02T09:05:00"),
+    ("2026-03-02", "2026-03-02T00:00:00"),
+    ("明天", None),
+])
+def test_parse_to_iso_datetime(value, expected):
+    assert parse_to_iso_datetime(value) == expected
+
+
+def test_display_and_kb_datetime():
+    assert parse_iso_to_display("2026-03-02T09:30:00") == "2026-03-02 09:30"
+    assert parse_iso_to_display("2026-03-02xx") == "2026-03-02 00:00"
+    assert parse_iso_to_display("bad") == ""
+    assert parse_kb_datetime("2026-03-02T09:30:00").utcoffset() == timedelta(hours=8)
+    assert parse_kb_datetime("2026-03-02T01:30:00+00:00").hour == 9
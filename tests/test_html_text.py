@@ -0,0 +1,26 @@
+from html_text import html_to_text
+
+
+def test_table_rows_become_pipe_separated_lines():
+    html = (
+        "<p>招标公告</p>"
+        "<table><thead><tr><th>标段</th><th>服务内容</th><th>最高限价</th></tr></thead>"
+        "<tbody><tr><td>1</td><td><span>机房</span>运维</td><td>100 万元</td></tr>"
+        "<tr><td>2</td><td>网络<br>安全</td><td></td></tr></tbody></table>"
+        "<p>其他说明</p>"
+    )
+    lines = html_to_text(html).splitlines()
+    assert lines[0] == "招标公告"
+    assert lines[1] == "标段 | 服务内容 | 最高限价"
+    assert lines[2] == "1 | 机房运维 | 100 万元"
+    assert lines[3].rstrip() == "2 | 网络 安全 |"
+    assert lines[-1] == "其他说明"
+
+
+def test_scripts_styles_and_entities():
+    html = "<style>p{}</style><script>var a = '<td>';</script><div>A&amp;B&nbsp;C</div><!-- x -->"
+    assert html_to_text(html) == "A&B C"
+
+
+def test_empty_input():
+    assert html_to_text("") == ""
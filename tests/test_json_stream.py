@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from json_stream import iter_array_items, scan_fields
+
+DOC = {
+    "code": 0,
+    "body": {
+        "meta": {"list": "不是数组"},
+        "data": {"total": 2, "list": [{"title": "含 ] 与 \" 的标题", "n": [1, {"k": None}]}, 2.5, "x"]},
+    },
+}
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1024])
+def test_items_survive_any_chunking(size):
+    raw = json.dumps(DOC, ensure_ascii=False)
+    items = list(iter_array_items(chunked(raw, size), [("body", "data", "list")]))
+    assert [json.loads(item) for item in items] == DOC["body"]["data"]["list"]
+
+
+def test_first_matching_path_in_document_order():
+    raw = json.dumps({"body": {"rows": [1], "data": {"list": [2]}}})
+    paths = [("body", "data", "list"), ("body", "rows")]
+    assert list(iter_array_items([raw], paths)) == ["1"]
+
+
+def test_missing_path_or_non_object_yields_nothing():
+    assert list(iter_array_items(['{"body": {}}'], [("body", "data", "list")])) == []
+    assert list(iter_array_items(["[1, 2]"], [("body",)])) == []
+
+
+def test_scan_fields_decodes_only_requested_keys():
+    raw = json.dumps({"bulletinContent": "<p>正文</p>", "publishDate": "2026-03-02", "id": 7})
+    assert scan_fields(raw, ["publishDate", "id"]) == {"publishDate": "2026-03-02", "id": 7}
+    assert scan_fields(raw, ["missing"]) == {}
+    assert scan_fields("[]", ["id"]) == {}
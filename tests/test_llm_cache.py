@@ -0,0 +1,67 @@
+import pytest
+
+import llm_cache
+from llm_cache import SQLiteCache, make_key, normalize_title
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+def open_cache(tmp_path, **kwargs):
+    return SQLiteCache(str(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+def test_ttl_expires_entries(tmp_path, clock):
+    cache = open_cache(tmp_path, namespace="t", ttl_seconds=60)
+    cache.set("k", "v")
+    clock.now += 59
+    assert cache.get("k") == "v"
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.evict() == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+def test_lru_evicts_least_recently_accessed(tmp_path, clock):
+    cache = open_cache(tmp_path, namespace="t", max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+        clock.now += 1
+    assert cache.get("a") == "a"
+    assert cache.evict() == 1
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" and cache.get("c") == "c"
+    cache.close()
+
+
+def test_namespaces_share_a_file_independently(tmp_path, clock):
+    extract = open_cache(tmp_path, namespace="extract", max_entries=1)
+    classify = open_cache(tmp_path, namespace="classify")
+    extract.set("k", "e")
+    classify.set("k", "c")
+    clock.now += 1
+    extract.set("k2", "e2")
+    assert extract.evict() == 1
+    assert classify.get("k") == "c"
+    assert extract.get("k") is None
+    extract.close()
+    classify.close()
+
+
+def test_keys_normalize_titles():
+    assert normalize_title(" ＡＢＣ 项目\t") == "abc项目"
+    assert make_key(normalize_title("ＡＢＣ 项目"), "m") == make_key("abc项目", "m")
+    assert make_key("a", "bc") != make_key("ab", "c")
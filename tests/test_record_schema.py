@@ -0,0 +1,61 @@
+import itertools
+
+from record_schema import (BULLETIN_FIELDS, BULLETIN_URL_TEMPLATE, FIRST_NOT_NONE, Bulletin, BulletinNormalizer,
+                           compile_plan, locate_items)
+
+
+def reference(it):
+    """逐字段 or 回退的原始写法，作为取值计划的对照"""
+    values = {}
+    for name, candidates, rule, default, transform in BULLETIN_FIELDS:
+        if rule == FIRST_NOT_NONE:
+            value = next((it.get(k) for k in candidates if it.get(k) is not None), default)
+        else:
+            value = None
+            for k in candidates:
+                value = it.get(k)
+                if value:
+                    break
+            if not value:
+                value = default if default is not None else value
+        values[name] = transform(value) if transform else value
+    bulletin_id = values["bulletinId"]
+    values["prjUrl"] = BULLETIN_URL_TEMPLATE.format(bulletin_id) if bulletin_id else None
+    return values
+
+
+def test_plan_keeps_only_present_candidates():
+    plan = compile_plan(BULLETIN_FIELDS, frozenset({"title", "autoId", "id", "fbDate"}))
+    by_name = dict(zip((spec[0] for spec in BULLETIN_FIELDS), plan))
+    assert by_name["bulletinTitle"].keys == ("title",)
+    assert by_name["bulletinId"].keys == ("autoId", "id")
+    assert by_name["publishDate"].keys == ("fbDate",)
+    assert by_name["prjNo"].keys == ()
+
+
+def test_matches_or_chain_across_shapes():
+    normalizer = BulletinNormalizer()
+    values = [None, "", 0, "2026-03-02 09:30:00", 15]
+    keys = ["autoId", "id", "title", "bulletinTitle", "publishDate", "pubDate", "kbDate", "prjId", "code"]
+    for combo in itertools.product(values, repeat=3):
+        for start in range(0, len(keys), 3):
+            it = dict(zip(keys[start:start + 3], combo))
+            result = next(normalizer.normalize([it]))
+            assert isinstance(result, Bulletin)
+            assert result.to_dict() == {**reference(it), "prjType": None, "prjContent": None}, it
+
+
+def test_normalize_skips_non_dicts_and_reuses_plans():
+    normalizer = BulletinNormalizer()
+    items = [{"autoId": 1, "title": "a"}, "x", {"autoId": 2, "title": "b"}, {"id": 3}]
+    results = list(normalizer.normalize(items))
+    assert [b.bulletinId for b in results] == ["1", "2", "3"]
+    assert results[1].prjUrl == BULLETIN_URL_TEMPLATE.format("2")
+    assert len(normalizer._plans) == 2
+
+
+def test_locate_items_by_path_priority():
+    data = {"body": {"list": [1], "data": {"rows": [2]}}}
+    assert locate_items(data) == [2]
+    assert locate_items({"body": {}}) == []
+    assert locate_items([]) == []
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+import requests
+
+import resilience
+from resilience import CircuitOpenError, HostGate, call
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """阈值 2、熔断 0.05s 的独立主机，重试不等待"""
+    gate = HostGate("test.invalid", threshold=2, reset_seconds=0.05)
+    monkeypatch.setitem(resilience._gates, gate.host, gate)
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt: 0.0)
+    return gate
+
+
+def failing(counter, exc):
+    def func():
+        counter.append(1)
+        raise exc
+    return func
+
+
+def http_error(status):
+    resp = requests.Response()
+    resp.status_code = status
+    return requests.HTTPError(f"{status}", response=resp)
+
+
+def test_breaker_opens_after_threshold_and_short_circuits(gate):
+    calls = []
+    with pytest.raises(requests.ConnectionError):
+        call(gate.host, failing(calls, requests.ConnectionError("refused")), attempts=5)
+    assert len(calls) == 2
+    with pytest.raises(CircuitOpenError):
+        call(gate.host, failing(calls, requests.ConnectionError("refused")))
+    assert len(calls) == 2
+
+
+def test_half_open_probe_success_closes_breaker(gate):
+    with pytest.raises(requests.ConnectionError):
+        call(gate.host, failing([], requests.ConnectionError("refused")), attempts=2)
+    time.sleep(0.06)
+    assert call(gate.host, lambda: "ok") == "ok"
+    assert call(gate.host, lambda: "again") == "again"
+
+
+def test_failed_probe_reopens_immediately(gate):
+    with pytest.raises(requests.ConnectionError):
+        call(gate.host, failing([], requests.ConnectionError("refused")), attempts=2)
+    time.sleep(0.06)
+    calls = []
+    with pytest.raises(requests.ConnectionError):
+        call(gate.host, failing(calls, requests.ConnectionError("refused")), attempts=3)
+    assert len(calls) == 1
+    with pytest.raises(CircuitOpenError):
+        call(gate.host, lambda: "ok")
+
+
+def test_throttling_is_retried_but_not_counted(gate):
+    calls = []
+    with pytest.raises(requests.HTTPError):
+        call(gate.host, failing(calls, http_error(429)), attempts=4)
+    assert len(calls) == 4
+    assert call(gate.host, lambda: "ok") == "ok"
+
+
+def test_non_retryable_error_is_raised_once(gate):
+    calls = []
+    with pytest.raises(requests.HTTPError):
+        call(gate.host, failing(calls, http_error(404)), attempts=5)
+    with pytest.raises(ValueError):
+        call(gate.host, failing(calls, ValueError("bad")), attempts=5)
+    assert len(calls) == 2
+    assert call(gate.host, lambda: "ok") == "ok"
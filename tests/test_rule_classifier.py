@@ -0,0 +1,23 @@
+from rule_classifier import KeywordAutomaton, pre_classify
+
+
+def test_automaton_finds_overlapping_keywords():
+    automaton = KeywordAutomaton({"a": ["he", "she", "hers"], "b": ["his"]})
+    assert automaton.find("ushers") == [(3, "she", "a"), (3, "he", "a"), (5, "hers", "a")]
+
+
+def test_automaton_normalizes_fullwidth_and_case():
+    automaton = KeywordAutomaton({"x": ["epc"]})
+    assert automaton.find("某ＥＰＣ项目") == [(3, "epc", "x")]
+
+
+def test_single_label_is_decided():
+    assert pre_classify("某小区道路改造工程") == "工程类项目"
+    assert pre_classify("物业保洁服务") == "其他项目"
+
+
+def test_info_keyword_or_mixed_labels_go_to_model():
+    assert pre_classify("智慧平台建设") is None
+    assert pre_classify("机房改造工程") is None
+    assert pre_classify("物业用房维修") is None
+    assert pre_classify("会议纪要") is None